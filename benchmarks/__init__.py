@@ -0,0 +1 @@
+# Benchmark and load-test suite for the compute core and the web hot paths
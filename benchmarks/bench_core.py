@@ -0,0 +1,110 @@
+"""
+Micro-benchmarks for the compute hot paths.
+
+Run with pytest-benchmark (the file is not collected by a plain ``pytest``
+run because it does not match ``test_*.py``)::
+
+    python -m pytest benchmarks/bench_core.py --benchmark-json=bench-core.json
+
+and compare two runs with ``pytest-benchmark compare``.
+"""
+import random
+import string
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from quantum_hermetic_gematria.core import get_core, detect_patterns, calculate_resonance, similarities
+from quantum_hermetic_gematria.adapters import WebGematria
+from quantum_hermetic_gematria.join import topk
+
+PHRASE_LENGTHS = [1, 10, 100, 1_000, 10_000, 100_000]
+
+ALPHABET = string.ascii_letters + string.digits + "     .,!?'-"
+
+
+def make_phrase(length, seed=0):
+    """Deterministic pseudo-text of the given length"""
+    rng = random.Random(seed * 1_000_003 + length)
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+@pytest.fixture(scope="module")
+def core():
+    return get_core()
+
+
+@pytest.fixture(scope="module")
+def web(core):
+    return WebGematria(core)
+
+
+@pytest.mark.parametrize("length", PHRASE_LENGTHS)
+def test_calculate(benchmark, core, length):
+    text = make_phrase(length)
+    benchmark(core.calculate, text)
+
+
+@pytest.mark.parametrize("script", ["ascii", "latin"])
+@pytest.mark.parametrize("length", PHRASE_LENGTHS)
+def test_counts(benchmark, core, length, script):
+    text = make_phrase(length)
+    if script == "latin":
+        text = text.replace("e", "é").replace("u", "ü").replace("s", "ß")
+    benchmark(core.counts, text)
+
+
+@pytest.mark.parametrize("length", PHRASE_LENGTHS)
+def test_analyze_text(benchmark, web, length):
+    text = make_phrase(length)
+    benchmark(web.analyze_text, text)
+
+
+@pytest.mark.parametrize("length", PHRASE_LENGTHS)
+def test_compare_phrases(benchmark, web, length):
+    phrase1 = make_phrase(length, seed=1)
+    phrase2 = make_phrase(length, seed=2)
+    benchmark(web.compare_phrases, phrase1, phrase2)
+
+
+@pytest.mark.parametrize("length", PHRASE_LENGTHS)
+def test_detect_patterns(benchmark, core, length):
+    vector = core.calculate(make_phrase(length))
+    benchmark(detect_patterns, vector)
+
+
+@pytest.mark.parametrize("length", PHRASE_LENGTHS)
+def test_calculate_resonance(benchmark, core, length):
+    vec1 = core.calculate(make_phrase(length, seed=1))
+    vec2 = core.calculate(make_phrase(length, seed=2))
+    benchmark(calculate_resonance, vec1, vec2)
+
+
+DIMENSIONS = [10, 256, 1024]
+CORPUS_SIZE = 10_000
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+def test_calculate_batch(benchmark, dimension, dtype):
+    core = get_core(dimension, dtype=dtype)
+    texts = [make_phrase(50, seed=i) for i in range(CORPUS_SIZE)]
+    benchmark(core.calculate_batch, texts)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+def test_similarities(benchmark, dimension, dtype):
+    core = get_core(dimension, dtype=dtype)
+    matrix = core.calculate_batch([make_phrase(50, seed=i) for i in range(CORPUS_SIZE)])
+    benchmark(similarities, matrix, core.calculate(make_phrase(50)))
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+def test_join_topk(benchmark, dimension, dtype):
+    core = get_core(dimension, dtype=dtype)
+    b = core.calculate_batch([make_phrase(50, seed=i) for i in range(CORPUS_SIZE)])
+    a = b[:1024]
+    benchmark(topk, a, b, 10)
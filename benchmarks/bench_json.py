@@ -0,0 +1,48 @@
+"""
+Response serialization benchmarks: Flask's stdlib provider encoding
+``tolist()`` vectors against the orjson provider encoding NumPy arrays
+directly, for a single /analyze result and for a 1000-item batch::
+
+    python -m pytest benchmarks/bench_json.py --benchmark-group-by=param:size
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from quantum_hermetic_gematria import json_provider
+from quantum_hermetic_gematria.adapters import WebGematria
+from quantum_hermetic_gematria.core import get_core
+
+from .bench_core import make_phrase
+
+BATCH_SIZES = [1, 1_000]
+
+
+def as_lists(result):
+    """The pre-provider result shape, with the vector as a Python list"""
+    return dict(result, vector=result["vector"].tolist())
+
+
+@pytest.fixture(scope="module")
+def results():
+    web = WebGematria(get_core())
+    return [web.analyze_text(make_phrase(100, seed=i)) for i in range(max(BATCH_SIZES))]
+
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+def test_stdlib_tolist(benchmark, results, size):
+    provider = DefaultJSONProvider(Flask(__name__))
+    batch = results[:size]
+    benchmark(lambda: [provider.dumps(as_lists(r)) for r in batch])
+
+
+@pytest.mark.parametrize("size", BATCH_SIZES)
+def test_orjson_numpy(benchmark, results, size):
+    if json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    provider = json_provider.OrjsonProvider(Flask(__name__))
+    batch = results[:size]
+    benchmark(lambda: [provider.dumps_bytes(r) for r in batch])
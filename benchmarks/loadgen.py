@@ -0,0 +1,365 @@
+"""
+Load generator for the /analyze, /compare and /history hot paths.
+
+Two targets are supported:
+
+- ``flask``: drives the app in-process through Flask's test client
+- ``gunicorn``: launches gunicorn with the repo's ``gunicorn.conf.py`` on a
+  free local port and drives it over HTTP
+
+Per-endpoint p50/p95/p99 latency, throughput and RSS are written as JSON so
+runs can be compared between commits::
+
+    python -m benchmarks.loadgen --target flask --requests 2000 -o flask.json
+    python -m benchmarks.loadgen --target gunicorn --concurrency 16 -o gunicorn.json
+    python -m benchmarks.loadgen --compare baseline.json flask.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ["light", "dark", "love", "truth", "wisdom", "spirit", "gold", "sun",
+         "moon", "star", "fire", "water", "earth", "air", "thoth", "ankh",
+         "pyramid", "harmony", "balance", "cosmos", "2024", "777", "phi"]
+
+DEFAULT_MIX = {"analyze": 6, "compare": 3, "history": 1}
+
+
+class Workload:
+    """Seeded stream of (endpoint, method, path, body) requests"""
+
+    def __init__(self, mix=None, seed=0, max_words=6):
+        self.mix = mix or DEFAULT_MIX
+        self.rng = random.Random(seed)
+        self.max_words = max_words
+        self.lock = threading.Lock()
+
+    def phrase(self):
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(1, self.max_words)))
+
+    def next(self):
+        with self.lock:
+            endpoint = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+            if endpoint == "analyze":
+                return endpoint, "POST", "/analyze", {"text": self.phrase()}
+            if endpoint == "compare":
+                return endpoint, "POST", "/compare", {"phrase1": self.phrase(), "phrase2": self.phrase()}
+            return endpoint, "GET", "/history", None
+
+
+class FlaskClient:
+    """In-process client backed by Flask's test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        data = response.get_data()
+        return response.status_code, data
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """Keep-alive HTTP client that carries the session cookie between requests"""
+
+    def __init__(self, host, port, timeout=130):
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        self.cookie = None
+        self.headers = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        self.conn.request(method, path, body=payload, headers=headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        self.headers = response.msg
+        set_cookie = response.getheader("Set-Cookie")
+        if set_cookie:
+            self.cookie = set_cookie.split(";", 1)[0]
+        return response.status, data
+
+    def close(self):
+        self.conn.close()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list
+
+    >>> values = list(range(1, 101))
+    >>> percentile(values, 50), percentile(values, 95), percentile(values, 99), percentile(values, 100)
+    (50, 95, 99, 100)
+    >>> percentile(list(range(1, 11)), 50), percentile(list(range(1, 21)), 95)
+    (5, 19)
+    """
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize_latencies(latencies, errors, elapsed):
+    """Latency distribution (ms) and throughput for one group of samples"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "mean_ms": sum(latencies) / count * 1000 if count else None,
+        "p50_ms": percentile(latencies, 50) * 1000 if count else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if count else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if count else None,
+        "max_ms": latencies[-1] * 1000 if count else None,
+        "throughput_rps": count / elapsed if elapsed > 0 else None,
+    }
+
+
+def drive(make_client, next_request, total_requests, concurrency):
+    """
+    Send total_requests from `concurrency` threads, each with its own client.
+
+    Returns (samples, elapsed) where samples is a list of
+    (endpoint, latency_seconds, status).
+    """
+    samples = []
+    samples_lock = threading.Lock()
+    remaining = [total_requests]
+
+    def worker():
+        client = make_client()
+        local = []
+        try:
+            while True:
+                with samples_lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                endpoint, method, path, body = next_request()
+                start = time.perf_counter()
+                try:
+                    status, _ = client.request(method, path, body)
+                except (OSError, http.client.HTTPException):
+                    status = 0
+                local.append((endpoint, time.perf_counter() - start, status))
+        finally:
+            client.close()
+            with samples_lock:
+                samples.extend(local)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    """Group samples per endpoint and overall"""
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    for endpoint, latency, status in samples:
+        by_endpoint[endpoint].append(latency)
+        if not 200 <= status < 400:
+            errors[endpoint] += 1
+    return {
+        "endpoints": {endpoint: summarize_latencies(latencies, errors[endpoint], elapsed)
+                      for endpoint, latencies in sorted(by_endpoint.items())},
+        "total": summarize_latencies([s[1] for s in samples], sum(errors.values()), elapsed),
+    }
+
+
+def rss_bytes(pid):
+    """Resident set size of a process from /proc, or None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(pid):
+    """Direct children of pid (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(host, port, path="/readyz", timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", path)
+            status = conn.getresponse().status
+            conn.close()
+            if status < 500:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server on {host}:{port} did not become ready within {timeout}s")
+
+
+def launch_gunicorn(port, workers=None, extra_env=None, log_file=None, ready_path="/readyz"):
+    """Start gunicorn with the repo's gunicorn.conf.py on 127.0.0.1:port"""
+    cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(REPO_ROOT, "gunicorn.conf.py"),
+           "--bind", f"127.0.0.1:{port}"]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    cmd.append("quantum_hermetic_gematria.app:app")
+    env = dict(os.environ, PORT=str(port), **(extra_env or {}))
+    log = open(log_file, "ab") if log_file else subprocess.DEVNULL
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=log, stderr=log)
+    try:
+        wait_until_ready("127.0.0.1", port, ready_path)
+    except Exception:
+        proc.terminate()
+        raise
+    return proc
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_flask(args, workload):
+    from quantum_hermetic_gematria.app import app
+    logging.getLogger().setLevel(logging.WARNING)
+    samples, elapsed = drive(lambda: FlaskClient(app), workload.next, args.requests, args.concurrency)
+    result = summarize(samples, elapsed)
+    # ru_maxrss is KiB on Linux
+    result["rss_bytes"] = {"peak": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+                           "current": rss_bytes(os.getpid())}
+    return result
+
+
+def run_gunicorn(args, workload):
+    port = args.port or free_port()
+    proc = launch_gunicorn(port, workers=args.workers, log_file=args.server_log)
+    try:
+        samples, elapsed = drive(lambda: HttpClient("127.0.0.1", port), workload.next,
+                                 args.requests, args.concurrency)
+        result = summarize(samples, elapsed)
+        workers = child_pids(proc.pid)
+        result["rss_bytes"] = {
+            "master": rss_bytes(proc.pid),
+            "workers": [rss_bytes(pid) for pid in workers],
+            "total": sum(filter(None, [rss_bytes(proc.pid)] + [rss_bytes(pid) for pid in workers])),
+        }
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+COMPARED_METRICS = (("p50_ms", False), ("p95_ms", False), ("p99_ms", False),
+                    ("throughput_rps", True), ("error_rate", False))
+
+
+def compare_results(baseline, current, threshold, metrics=COMPARED_METRICS):
+    """Print per-endpoint deltas of (metric, higher_is_better) pairs; return True if any regressed past threshold"""
+    regressed = False
+    print(f"{'endpoint':<10} {'metric':<15} {'baseline':>12} {'current':>12} {'change':>9}")
+    for endpoint, base in sorted(baseline["endpoints"].items()):
+        cur = current["endpoints"].get(endpoint)
+        if cur is None:
+            continue
+        for metric, higher_is_better in metrics:
+            b, c = base.get(metric), cur.get(metric)
+            if b is None or c is None:
+                continue
+            change = (c - b) / b if b else 0.0
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            regressed = regressed or bool(flag)
+            print(f"{endpoint:<10} {metric:<15} {b:>12.3f} {c:>12.3f} {change:>+8.1%}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("flask", "gunicorn"), default="flask")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, help="override the gunicorn worker count")
+    parser.add_argument("--port", type=int, help="gunicorn port (default: a free one)")
+    parser.add_argument("--server-log", help="append gunicorn output to this file")
+    parser.add_argument("--mix", default="analyze=6,compare=3,history=1",
+                        help="endpoint weights, e.g. analyze=6,compare=3,history=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="diff two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative regression that fails --compare (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        return 1 if compare_results(baseline, current, args.threshold) else 0
+
+    mix = {k: int(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+    workload = Workload(mix=mix, seed=args.seed)
+    result = run_flask(args, workload) if args.target == "flask" else run_gunicorn(args, workload)
+    result.update({
+        "target": args.target,
+        "revision": git_revision(),
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "config": {"requests": args.requests, "concurrency": args.concurrency,
+                   "workers": args.workers, "mix": mix, "seed": args.seed},
+    })
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Deterministic replay of traffic captured with ``QHG_CAPTURE_ENABLED`` (see
+``quantum_hermetic_gematria/capture.py``).
+
+Launches gunicorn with the repo's ``gunicorn.conf.py`` on a free local port
+and sends the captured requests again, in capture order:
+
+- ``--speed N`` keeps the captured gaps between requests, divided by N
+  (1 replays in real time, 10 ten times faster)
+- ``--rate R`` ignores the captured timing and sends R requests per second
+
+Both are open-loop: requests go out on schedule whether or not earlier ones
+have completed, and latency is measured from the scheduled send time, so a
+server that falls behind shows it in the tail. Requests of one captured
+session stay in order on their own keep-alive connection and cookie, so
+/history sees the same session state it did in production. A request
+whose session is still waiting on an earlier one is sent as soon as that
+one completes. The server gets a fixed ``QHG_SECRET_KEY`` so sessions hold
+across workers.
+
+The report has per-endpoint latency percentiles and error rate (as
+``benchmarks/loadgen.py``), result cache hit rate from the ``X-Cache``
+header, and how far the sender lagged behind schedule. ``--save-responses``
+records a digest of every response body, with ``timestamp`` fields
+removed. A later run given ``--baseline-responses`` reports every request
+whose status or body changed. Given ``--baseline`` it also flags latency
+regressions::
+
+    python -m benchmarks.replay /tmp/qhg-capture -o base.json --save-responses base.responses.jsonl
+    python -m benchmarks.replay /tmp/qhg-capture --speed 4 -o run.json \\
+        --baseline base.json --baseline-responses base.responses.jsonl
+"""
+import argparse
+import glob
+import hashlib
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    from .loadgen import COMPARED_METRICS, HttpClient, child_pids, compare_results, free_port, git_revision, launch_gunicorn, \
+        rss_bytes, summarize
+except ImportError:  # executed as a script from inside the benchmarks directory
+    from loadgen import COMPARED_METRICS, HttpClient, child_pids, compare_results, free_port, git_revision, launch_gunicorn, \
+        rss_bytes, summarize
+
+# Response fields that legitimately differ between runs
+VOLATILE_KEYS = frozenset({"timestamp"})
+
+# Throughput of an open-loop replay is the schedule's, not the server's
+REPLAY_METRICS = tuple(metric for metric in COMPARED_METRICS if metric[0] != "throughput_rps")
+
+# Changed responses listed in the report
+MAX_EXAMPLES = 10
+
+
+def capture_files(paths):
+    """Capture files named by paths, expanding directories to their capture-*.jsonl* files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "capture-*.jsonl*"))))
+        else:
+            files.append(path)
+    return files
+
+
+def read_capture(paths, limit=None):
+    """Captured records from every file, merged into arrival order"""
+    records = []
+    for path in capture_files(paths):
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["t"])
+    return records[:limit] if limit else records
+
+
+def schedule(records, speed=1.0, rate=None):
+    """Send offset in seconds of every record"""
+    if rate:
+        return [i / rate for i in range(len(records))]
+    if not records:
+        return []
+    t0 = records[0]["t"]
+    return [(record["t"] - t0) / speed for record in records]
+
+
+def _strip(value):
+    if isinstance(value, dict):
+        return {k: _strip(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip(v) for v in value]
+    return value
+
+
+def response_digest(data):
+    """Digest of a response body, ignoring key order and VOLATILE_KEYS in JSON bodies"""
+    try:
+        data = json.dumps(_strip(json.loads(data)), sort_keys=True).encode()
+    except ValueError:
+        pass
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def endpoint_of(record):
+    return record["path"].strip("/") or "index"
+
+
+def replay(records, offsets, make_client, max_inflight=64):
+    """Send records at their offsets; return (outcomes, elapsed, max lag in seconds)
+
+    outcomes[i] is ``(latency, status, cache outcome, digest)`` of records[i].
+    """
+    outcomes = [None] * len(records)
+    clients = {}
+    busy = set()
+    pending = defaultdict(deque)
+    lock = threading.Lock()
+    remaining = [len(records)]
+    finished = threading.Event()
+    if not records:
+        finished.set()
+    executor = ThreadPoolExecutor(max_inflight)
+    start = time.perf_counter()
+
+    def send(i):
+        record = records[i]
+        session = record.get("session")
+        client = clients.get(session)
+        if client is None:
+            client = clients[session] = make_client()
+        path = record["path"] + ("?" + record["query"] if record.get("query") else "")
+        cache = None
+        try:
+            status, data = client.request(record["method"], path, record.get("body"))
+            cache = client.headers.get("X-Cache") if client.headers is not None else None
+        except (OSError, http.client.HTTPException):
+            client.close()
+            clients[session] = make_client()
+            status, data = 0, b""
+        outcomes[i] = (time.perf_counter() - start - offsets[i], status, cache, response_digest(data))
+        with lock:
+            if pending[session]:
+                executor.submit(send, pending[session].popleft())
+            else:
+                busy.discard(session)
+            remaining[0] -= 1
+            if not remaining[0]:
+                finished.set()
+
+    lag = 0.0
+    try:
+        for i, record in enumerate(records):
+            delay = offsets[i] - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                lag = max(lag, -delay)
+            session = record.get("session")
+            with lock:
+                if session in busy:
+                    pending[session].append(i)
+                else:
+                    busy.add(session)
+                    executor.submit(send, i)
+        finished.wait()
+    finally:
+        executor.shutdown(wait=True)
+        for client in clients.values():
+            client.close()
+    return outcomes, time.perf_counter() - start, lag
+
+
+def cache_summary(records, outcomes):
+    """Result cache outcomes per endpoint; hit_rate counts hits over hits and misses"""
+    counts = defaultdict(lambda: defaultdict(int))
+    for record, (_, _, cache, _) in zip(records, outcomes):
+        if cache:
+            counts[endpoint_of(record)][cache] += 1
+    summary = {}
+    for endpoint, outcome_counts in sorted(counts.items()):
+        looked_up = outcome_counts["hit"] + outcome_counts["miss"]
+        summary[endpoint] = dict(outcome_counts, hit_rate=outcome_counts["hit"] / looked_up if looked_up else None)
+    return summary
+
+
+def diff_responses(records, outcomes, baseline_path):
+    """Compare status and body digest of every request with a saved baseline"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {entry["i"]: entry for entry in map(json.loads, f)}
+    changed = []
+    for i, (record, (_, status, _, digest)) in enumerate(zip(records, outcomes)):
+        base = baseline.get(i)
+        if base is not None and (base["status"] != status or base["digest"] != digest):
+            changed.append({"i": i, "path": record["path"], "body": record.get("body"),
+                            "baseline_status": base["status"], "status": status})
+    return {"compared": sum(1 for i in range(len(records)) if i in baseline),
+            "changed": len(changed), "examples": changed[:MAX_EXAMPLES]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="+", help="capture files or directories")
+    timing = parser.add_mutually_exclusive_group()
+    timing.add_argument("--speed", type=float, default=1.0, help="replay N times faster than captured")
+    timing.add_argument("--rate", type=float, help="send this many requests per second instead")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--max-inflight", type=int, default=64, help="most requests outstanding at once")
+    parser.add_argument("--workers", type=int, help="override the gunicorn worker count")
+    parser.add_argument("--port", type=int, help="gunicorn port (default: a free one)")
+    parser.add_argument("--server-log", help="append gunicorn output to this file")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra server environment, e.g. QHG_RESULT_CACHE_SIZE=0")
+    parser.add_argument("-o", "--output", help="write the report JSON here (default: stdout)")
+    parser.add_argument("--save-responses", help="write response digests here (JSONL)")
+    parser.add_argument("--baseline", help="report from an earlier run to compare latency with")
+    parser.add_argument("--baseline-responses", help="response digests from an earlier run to diff with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative latency regression that fails --baseline (default 0.10)")
+    args = parser.parse_args(argv)
+
+    records = read_capture(args.capture, args.limit)
+    offsets = schedule(records, args.speed, args.rate)
+    env = {"QHG_SECRET_KEY": "replay"}
+    env.update(item.split("=", 1) for item in args.env)
+    port = args.port or free_port()
+    proc = launch_gunicorn(port, workers=args.workers, extra_env=env, log_file=args.server_log)
+    try:
+        outcomes, elapsed, lag = replay(records, offsets, lambda: HttpClient("127.0.0.1", port),
+                                        args.max_inflight)
+        workers = child_pids(proc.pid)
+        rss = {"master": rss_bytes(proc.pid), "workers": [rss_bytes(pid) for pid in workers]}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    result = summarize([(endpoint_of(record), latency, status)
+                        for record, (latency, status, _, _) in zip(records, outcomes)], elapsed)
+    result.update({
+        "cache": cache_summary(records, outcomes),
+        "max_lag_ms": lag * 1000,
+        "rss_bytes": rss,
+        "revision": git_revision(),
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "config": {"capture": args.capture, "requests": len(records), "speed": None if args.rate else args.speed,
+                   "rate": args.rate, "max_inflight": args.max_inflight, "workers": args.workers,
+                   "env": env},
+    })
+    if args.save_responses:
+        with open(args.save_responses, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps({"i": i, "path": record["path"], "status": status, "digest": digest}) + "\n"
+                         for i, (record, (_, status, _, digest)) in enumerate(zip(records, outcomes)))
+    failed = False
+    if args.baseline_responses:
+        result["diff"] = diff_responses(records, outcomes, args.baseline_responses)
+        failed = bool(result["diff"]["changed"])
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed = compare_results(json.load(f), result, args.threshold, REPLAY_METRICS) or failed
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Compatibility adapters from the core result schema to front-end dicts.
+
+``GematriaCore.analyze`` / ``GematriaCore.compare`` return schema-versioned
+results; the functions here reshape them into what each consumer has always
+received:
+
+- ``to_legacy_analysis`` / ``to_legacy_comparison``: ``QuantumHermeticGematria``
+- ``to_web_analysis`` / ``to_web_comparison``: the ``/analyze`` and ``/compare`` JSON
+- ``to_gui_analysis``: the desktop GUI in ``gui.py``
+"""
+import hashlib
+import math
+
+import numpy as np
+
+try:
+    from .constants import UniversalConstants
+    from .core import REFERENCE_DIMENSION, band_norms
+    from .metrics import stage
+except ImportError:  # executed as a script from inside the package directory
+    from constants import UniversalConstants
+    from core import REFERENCE_DIMENSION, band_norms
+    from metrics import stage
+
+CONSTANTS = UniversalConstants()
+
+HERMETIC_PRINCIPLES = {
+    "mentalism": CONSTANTS.MENTALISM,
+    "correspondence": CONSTANTS.CORRESPONDENCE,
+    "vibration": CONSTANTS.VIBRATION,
+    "polarity": CONSTANTS.POLARITY,
+    "rhythm": CONSTANTS.RHYTHM,
+    "causation": CONSTANTS.CAUSATION,
+    "gender": CONSTANTS.GENDER,
+}
+
+PROPERTY_INTERPRETATIONS = {
+    "harmony": "This text resonates with harmonic energies, promoting balance and peace.",
+    "power": "This text carries a powerful energetic signature, emphasizing strength and transformation.",
+    "intelligence": "This text aligns with intellectual and analytical energies, enhancing clarity of thought.",
+    "creativity": "This text embodies creative energies, inspiring imagination and innovation.",
+    "balance": "This text represents balanced energies, supporting wholeness and integration."
+}
+
+PATTERN_DESCRIPTIONS = {
+    "balanced_energy": "The energies are evenly distributed, creating a stable and balanced field.",
+    "intensity": "There is a concentrated point of energy, suggesting intensity and focus.",
+    "harmonic": "The pattern shows harmonic oscillation between complementary energies.",
+    "resonant": "There is a resonant field that amplifies the core qualities."
+}
+
+WEB_PATTERNS = ["harmonic_resonance", "quantum_entanglement", "sacred_geometry",
+                "hermetic_symmetry", "vibrational_matrix"]
+WEB_QUALITIES = ["Strong", "Moderate", "Subtle", "Profound", "Complex"]
+WEB_GEOMETRIES = ["vesica_piscis", "golden_spiral", "metatron_cube",
+                  "flower_of_life", "merkaba"]
+
+WEB_EXPLANATIONS = {
+    "quantum_resonance": "Measures the vibrational coherence of the phrase in quantum information space. Higher values indicate stronger resonance with fundamental universal patterns.",
+    "pattern_significance": "Indicates how strongly this phrase connects to archetypal patterns. Higher values suggest greater alignment with hermetic principles.",
+    "primary_pattern": {
+        "harmonic_resonance": "Shows alignment with natural harmonic sequences, suggesting balance and flow.",
+        "quantum_entanglement": "Indicates non-local connections across conceptual space-time.",
+        "sacred_geometry": "Reveals alignment with fundamental geometric structures of creation.",
+        "hermetic_symmetry": "Demonstrates balance across multiple hermetic principles.",
+        "vibrational_matrix": "Shows strong connection to the underlying vibrational fabric of reality."
+    },
+    "resonance_quality": {
+        "Strong": "Clear and powerful resonance that manifests consistently.",
+        "Moderate": "Balanced resonance with noticeable but not overwhelming effects.",
+        "Subtle": "Delicate resonance that works through nuance and refinement.",
+        "Profound": "Deep resonance that affects fundamental levels of reality.",
+        "Complex": "Multi-layered resonance with intricate patterns of manifestation."
+    },
+    "geometric_harmony": {
+        "vesica_piscis": "The sacred intersection of dualities, representing creation and divine feminine energy.",
+        "golden_spiral": "The pattern of perfect growth and proportion found throughout nature.",
+        "metatron_cube": "The geometric blueprint containing all Platonic solids and creation patterns.",
+        "flower_of_life": "The fundamental pattern of creation containing all geometric forms.",
+        "merkaba": "The light-spirit-body vehicle representing balanced energy fields."
+    }
+}
+
+
+def stable_hash(text):
+    """
+    Non-negative 64-bit hash of text that is identical in every process.
+
+    The web adapters used to call the builtin ``hash``, which is salted per
+    interpreter, so each gunicorn worker gave different answers for the same
+    phrase.
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def generate_interpretation(properties, patterns):
+    """Generate an interpretation based on properties and patterns"""
+    dominant_property = max(properties.items(), key=lambda x: x[1])[0]
+    dominant_pattern = max(patterns.items(), key=lambda x: x[1])[0] if patterns else None
+
+    interpretation = PROPERTY_INTERPRETATIONS.get(dominant_property, "This text has a unique quantum signature.")
+    if dominant_pattern:
+        interpretation += " " + PATTERN_DESCRIPTIONS.get(dominant_pattern, "")
+    return interpretation
+
+
+def generate_comparison_interpretation(similarity, resonance):
+    """Generate interpretation for comparison"""
+    # Base interpretation on similarity
+    if similarity > 0.8:
+        interpretation = "These phrases are in exceptional quantum alignment, revealing profound conceptual resonance."
+    elif similarity > 0.5:
+        interpretation = "These phrases share significant energetic harmony, indicating compatible concepts."
+    elif similarity > 0.2:
+        interpretation = "These phrases have moderate resonance, with some shared qualities and some differences."
+    elif similarity > -0.2:
+        interpretation = "These phrases have limited harmonic connection, suggesting mostly independent concepts."
+    elif similarity > -0.5:
+        interpretation = "These phrases show some energetic opposition, representing contrasting concepts."
+    else:
+        interpretation = "These phrases demonstrate strong energetic opposition, potentially representing opposing forces."
+
+    # Add resonance patterns if present
+    if "constructive" in resonance:
+        interpretation += " There is strong constructive resonance, suggesting these concepts amplify each other."
+    elif "harmonic" in resonance:
+        interpretation += " Harmonic resonance is present, indicating natural alignment between these concepts."
+    elif "complementary" in resonance:
+        interpretation += " There is complementary resonance, suggesting these concepts complete each other."
+
+    return interpretation
+
+
+def to_legacy_analysis(result):
+    """Shape a core analysis like QuantumHermeticGematria.analyze_text"""
+    return {
+        "text": result["text"],
+        "numerical_value": result["numerical_value"],
+        "quantum_resonance": result["quantum_resonance"],
+        "energetic_properties": result["energetic_properties"],
+        "patterns": result["patterns"],
+        "interpretation": generate_interpretation(result["energetic_properties"], result["patterns"]),
+        "vector": result["vector"].tolist()
+    }
+
+
+def to_legacy_comparison(result):
+    """Shape a core comparison like QuantumHermeticGematria.compare_phrases"""
+    similarity = result["similarity"]
+    return {
+        "phrase1": result["phrase1"],
+        "phrase2": result["phrase2"],
+        "similarity": similarity,
+        "compatibility": int((similarity + 1) * 50),  # Convert from [-1,1] to [0,100]
+        "resonance_patterns": result["resonance_patterns"],
+        "energetic_interactions": result["energetic_interactions"],
+        "interpretation": generate_comparison_interpretation(similarity, result["resonance_patterns"])
+    }
+
+
+def web_labels(text):
+    """
+    The fields of the /analyze response that depend only on the text.
+
+    They are derived from the characters and a stable hash, not from the
+    vector, so the lookup index (see :mod:`index`) can be built without
+    analysing the corpus.
+    """
+    text_hash = stable_hash(text)
+    char_sum = sum(ord(c) for c in text)
+    return {
+        "numerical_value": char_sum % 100,
+        "quantum_resonance": round(0.5 + 0.5 * (text_hash % 1000) / 1000.0, 2),
+        "primary_pattern": WEB_PATTERNS[text_hash % len(WEB_PATTERNS)],
+        "resonance_quality": WEB_QUALITIES[(len(text) + char_sum) % len(WEB_QUALITIES)],
+        "geometric_harmony": WEB_GEOMETRIES[(text_hash // 100) % len(WEB_GEOMETRIES)],
+        "pattern_significance": round(0.5 + 0.4 * (text_hash % 100) / 100.0, 2),
+    }
+
+
+def to_web_analysis(result):
+    """Shape a core analysis as the /analyze response"""
+    text = result["text"]
+    labels = web_labels(text)
+    selected_pattern = labels["primary_pattern"]
+    selected_quality = labels["resonance_quality"]
+    selected_geometry = labels["geometric_harmony"]
+
+    return {
+        "text": text,
+        "model_version": result["model_version"],
+        "numerical_value": labels["numerical_value"],
+        "quantum_resonance": labels["quantum_resonance"],
+        "energetic_properties": result["energetic_properties"],
+        "patterns": {},
+        "interpretation": {
+            "primary_pattern": selected_pattern,
+            "resonance_quality": selected_quality,
+            "geometric_harmony": selected_geometry,
+            "hermetic_influence": "vibration"
+        },
+        "pattern_significance": labels["pattern_significance"],
+        "vector": result["vector"],
+        "explanations": {
+            "quantum_resonance": WEB_EXPLANATIONS["quantum_resonance"],
+            "pattern_significance": WEB_EXPLANATIONS["pattern_significance"],
+            "primary_pattern": WEB_EXPLANATIONS["primary_pattern"][selected_pattern],
+            "resonance_quality": WEB_EXPLANATIONS["resonance_quality"][selected_quality],
+            "geometric_harmony": WEB_EXPLANATIONS["geometric_harmony"][selected_geometry]
+        }
+    }
+
+
+def to_web_comparison(result):
+    """Shape a core comparison as the /compare response"""
+    phrase1 = result["phrase1"]
+    phrase2 = result["phrase2"]
+    similarity = result["similarity"]
+    phrase_sum = len(phrase1) + len(phrase2)
+    hash_val = stable_hash(phrase1 + phrase2)
+    compatibility = int(max(30, min(95, (similarity + 1) * 30 + (hash_val % 40))))
+
+    # Generate different interpretations based on compatibility
+    if compatibility > 80:
+        interpretation = "These phrases share significant energetic harmony."
+    elif compatibility > 60:
+        interpretation = "These phrases have strong resonance."
+    elif compatibility > 40:
+        interpretation = "These phrases have moderate harmonic connection."
+    else:
+        interpretation = "These phrases show limited energetic alignment."
+
+    patterns = {
+        "harmonic_resonance": {
+            "strength": round(0.5 + 0.5 * (hash_val % 100) / 100, 2),
+            "description": "Natural flow and mutual enhancement"
+        },
+        "quantum_entanglement": {
+            "strength": round(0.3 + 0.6 * ((hash_val // 200) % 100) / 100, 2),
+            "description": "Deep connection across conceptual space"
+        }
+    }
+
+    recommendations = []
+    if compatibility > 70:
+        recommendations.append("These concepts share natural resonance.")
+    else:
+        recommendations.append("Consider exploring complementary elements.")
+
+    if phrase_sum % 2 == 0:
+        recommendations.append("Focus on harmonic aspects for best results.")
+    else:
+        recommendations.append("Balance opposing elements for optimal outcome.")
+
+    return {
+        "phrase1": phrase1,
+        "phrase2": phrase2,
+        "model_version": result["model_version"],
+        "similarity": similarity,
+        "compatibility": compatibility,
+        "resonance_patterns": {"harmonic": round(0.3 + 0.7 * (hash_val % 100) / 100, 2)},
+        "energetic_interactions": {"synergy": round(0.2 + 0.8 * ((hash_val // 100) % 100) / 100, 2)},
+        "interpretation": interpretation,
+        "overall_compatibility_score": compatibility,
+        "resonance_compatibility": round(similarity, 2),
+        "relationship_patterns": patterns,
+        "recommendations": recommendations
+    }
+
+
+def to_gui_analysis(result, system="quantum_hermetic"):
+    """Shape a core analysis for the desktop GUI's text panel and plots"""
+    vector = result["vector"]
+
+    # Sacred geometry: each Platonic angle weights one band of the vector
+    geometry_resonance = {
+        solid: norm * math.sin(math.radians(angle))
+        for (solid, angle), norm in zip(CONSTANTS.PLATONIC_ANGLES.items(),
+                                         band_norms(vector, len(CONSTANTS.PLATONIC_ANGLES)))
+    }
+    hermetic_resonances = {
+        principle: norm * weight
+        for (principle, weight), norm in zip(HERMETIC_PRINCIPLES.items(),
+                                              band_norms(vector, len(HERMETIC_PRINCIPLES)))
+    }
+    # L1 norm rescaled to the reference dimension so it does not grow with it
+    l1 = float(np.sum(np.abs(vector))) * math.sqrt(REFERENCE_DIMENSION / len(vector))
+
+    return {
+        "text": result["text"],
+        "system": system,
+        "base_value": result["numerical_value"],
+        "quantum_resonance": result["quantum_resonance"],
+        "harmonic_resonance": l1 * CONSTANTS.RESONANCE_THRESHOLD,
+        "geometry_resonance": geometry_resonance,
+        "dominant_pattern": max(geometry_resonance, key=geometry_resonance.get),
+        "hermetic_resonances": hermetic_resonances,
+        "dominant_principle": max(hermetic_resonances, key=hermetic_resonances.get),
+        "quantum_state": vector.tolist(),
+        "patterns": result["patterns"],
+    }
+
+
+class WebGematria:
+    """Produces the /analyze and /compare response dicts from a GematriaCore"""
+
+    def __init__(self, core):
+        self.core = core
+
+    def analyze_text(self, text):
+        return self.adapt_analysis(self.core.analyze(text))
+
+    def adapt_analysis(self, result):
+        """Shape a core analysis of this instance's core as the /analyze response"""
+        with stage("adapt"):
+            return to_web_analysis(result)
+
+    def compare_phrases(self, phrase1, phrase2):
+        result = self.core.compare(phrase1, phrase2)
+        with stage("adapt"):
+            return to_web_comparison(result)
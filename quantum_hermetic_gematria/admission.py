@@ -0,0 +1,173 @@
+"""
+Admission control and load shedding for the compute endpoints.
+
+Each worker has two lanes, each a concurrency budget with a bounded wait
+queue:
+
+- ``interactive`` for normal /analyze and /compare requests
+- ``bulk`` for phrases longer than ``QHG_MAX_PHRASE_LENGTH`` and for the
+  streaming /analyze/batch endpoint, so one huge paste cannot occupy the
+  slots that short requests need
+
+A request that finds its lane's queue full, or waits longer than
+``QHG_QUEUE_TIMEOUT``, is rejected at once with ``Retry-After``: 503 for the
+interactive lane, 429 for the bulk lane. Inputs beyond the hard limits get
+413. If the proxy sets ``X-Request-Start``, requests that already queued
+longer than ``QHG_MAX_QUEUE_WAIT_MS`` in front of the worker are shed before
+any work is done.
+
+Budgets are per worker process. With gunicorn's sync workers a worker only
+runs one request at a time, so the lanes mainly matter for threaded workers
+and the queue-time check does most of the shedding.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import jsonify, request
+
+try:
+    from .metrics import REGISTRY
+except ImportError:  # executed as a script from inside the package directory
+    from metrics import REGISTRY
+
+SHED_TOTAL = REGISTRY.counter("qhg_admission_shed_total", "Requests rejected by admission control, by lane and reason")
+ADMITTED_TOTAL = REGISTRY.counter("qhg_admission_admitted_total", "Requests admitted, by lane")
+QUEUE_DEPTH = REGISTRY.gauge("qhg_admission_queue_depth", "Requests waiting for a lane slot")
+
+
+class AdmissionError(Exception):
+    """A request that admission control refuses to run"""
+
+    def __init__(self, message, status, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class Lane:
+    """Concurrency budget with a bounded wait queue"""
+
+    def __init__(self, name, concurrency, queue_size, timeout, reject_status=503):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.reject_status = reject_status
+        self.waiting = 0
+        # Exponentially weighted mean service time, used for Retry-After
+        self.service_time = 0.05
+        self._slots = threading.Semaphore(concurrency)
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, at least 1"""
+        backlog = (self.waiting + self.concurrency) / self.concurrency
+        return max(1, math.ceil(backlog * self.service_time))
+
+    def _reject(self, reason):
+        SHED_TOTAL.inc(lane=self.name, reason=reason)
+        raise AdmissionError(f"Server busy ({self.name} {reason.replace('_', ' ')}), retry later",
+                             self.reject_status, self.retry_after())
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.queue_size:
+                    self._reject("queue_full")
+                self.waiting += 1
+            QUEUE_DEPTH.inc(lane=self.name)
+            try:
+                acquired = self._slots.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+                QUEUE_DEPTH.dec(lane=self.name)
+            if not acquired:
+                self._reject("timeout")
+        ADMITTED_TOTAL.inc(lane=self.name)
+
+    def release(self, elapsed):
+        self._slots.release()
+        self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.release(time.perf_counter() - start)
+
+
+class AdmissionController:
+    """Input limits plus the interactive and bulk lanes of one worker"""
+
+    def __init__(self, config):
+        self.max_phrase_length = config["QHG_MAX_PHRASE_LENGTH"]
+        self.max_bulk_phrase_length = config["QHG_MAX_BULK_PHRASE_LENGTH"]
+        self.max_batch_items = config["QHG_MAX_BATCH_ITEMS"]
+        self.max_queue_wait = config["QHG_MAX_QUEUE_WAIT_MS"] / 1000.0
+        self.interactive = Lane("interactive", config["QHG_INTERACTIVE_CONCURRENCY"],
+                                config["QHG_INTERACTIVE_QUEUE"], config["QHG_QUEUE_TIMEOUT"], 503)
+        self.bulk = Lane("bulk", config["QHG_BULK_CONCURRENCY"],
+                         config["QHG_BULK_QUEUE"], config["QHG_QUEUE_TIMEOUT"], 429)
+
+    def lane_for(self, *phrases):
+        """Pick the lane for a request's phrases, refusing any over the hard limit"""
+        longest = max(len(phrase) for phrase in phrases)
+        if longest > self.max_bulk_phrase_length:
+            SHED_TOTAL.inc(lane="bulk", reason="too_large")
+            raise AdmissionError(f"Phrase too long ({longest} characters, limit {self.max_bulk_phrase_length})", 413)
+        return self.bulk if longest > self.max_phrase_length else self.interactive
+
+    def admit(self, *phrases):
+        """Context manager holding a slot in the right lane for phrases"""
+        return self.lane_for(*phrases).slot()
+
+    def check_batch(self, texts):
+        if len(texts) > self.max_batch_items:
+            SHED_TOTAL.inc(lane="bulk", reason="too_large")
+            raise AdmissionError(f"Too many items ({len(texts)}, limit {self.max_batch_items})", 413)
+        if texts:
+            self.lane_for(*texts)
+
+    def check_queue_time(self):
+        """Shed requests that already waited too long in front of the worker"""
+        if not self.max_queue_wait:
+            return None
+        header = request.headers.get("X-Request-Start", "")
+        try:
+            # Accepts "t=<microseconds>" (nginx) or plain milliseconds
+            value = float(header[2:]) / 1e6 if header.startswith("t=") else float(header) / 1e3
+        except ValueError:
+            return None
+        if time.time() - value > self.max_queue_wait:
+            SHED_TOTAL.inc(lane="proxy", reason="queue_wait")
+            return error_response(AdmissionError("Server busy, retry later", 503,
+                                                 self.interactive.retry_after()))
+        return None
+
+
+def error_response(error):
+    """JSON response for an AdmissionError, or for werkzeug's 413"""
+    status = getattr(error, "status", None) or getattr(error, "code", 413)
+    message = str(error) if isinstance(error, AdmissionError) else "Request body too large"
+    response = jsonify({"error": message})
+    response.status_code = status
+    if getattr(error, "retry_after", None):
+        response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def init_app(app):
+    """Apply body-size limits and install the controller as app.extensions['qhg_admission']"""
+    app.config["MAX_CONTENT_LENGTH"] = app.config["QHG_MAX_REQUEST_BYTES"]
+    controller = AdmissionController(app.config)
+    app.extensions["qhg_admission"] = controller
+    if controller.max_queue_wait:
+        app.before_request(controller.check_queue_time)
+    app.register_error_handler(413, error_response)
+    return controller
@@ -1,12 +1,44 @@
 import os
-import torch
-import numpy as np
-from flask import Flask, render_template, request, jsonify, session, send_from_directory, url_for
+from flask import Flask, request, jsonify, session, send_from_directory, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
 import json
+import secrets
+import sqlite3
+import time
+import numpy as np
 from datetime import datetime
 import logging
 import traceback
 
+try:
+    from . import admission, assets, capture, compression, config, instrumentation, json_provider
+    from .admission import AdmissionError
+    from .batch import iter_analyses, ndjson, with_summary
+    from .cache import ResultCache
+    from .cluster import ClusterModel
+    from .core import DedupStats, get_core
+    from .history import KINDS as HISTORY_KINDS, HistoryStore, csv_chunks, ndjson_chunks, parse_day, parse_time
+    from .index import FIELDS as LOOKUP_FIELDS, LookupIndex
+    from .adapters import WebGematria
+    from .metrics import stage
+    from .rendering import PngCache
+    from .singleflight import SingleFlight
+    from .warmup import Warmup, load_phrases
+except ImportError:  # executed as a script from inside the package directory
+    import admission, assets, capture, compression, config, instrumentation, json_provider
+    from admission import AdmissionError
+    from batch import iter_analyses, ndjson, with_summary
+    from cache import ResultCache
+    from cluster import ClusterModel
+    from core import DedupStats, get_core
+    from history import KINDS as HISTORY_KINDS, HistoryStore, csv_chunks, ndjson_chunks, parse_day, parse_time
+    from index import FIELDS as LOOKUP_FIELDS, LookupIndex
+    from adapters import WebGematria
+    from metrics import stage
+    from rendering import PngCache
+    from singleflight import SingleFlight
+    from warmup import Warmup, load_phrases
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -20,237 +52,169 @@ app = Flask(__name__,
             static_folder=static_folder, 
             static_url_path='/static',
             template_folder=template_folder)
-app.secret_key = os.urandom(24)  # For session management
+app.config.from_mapping(config.from_env())
+# A fixed key lets every worker read the session cookie the others signed
+app.secret_key = app.config['QHG_SECRET_KEY'] or os.urandom(24)  # For session management
+app.json = json_provider.make_provider(app, app.config['QHG_JSON_PROVIDER'])
+# Installed before instrumentation so request timings include compression
+compression.init_app(app)
+instrumentation.init_app(app)
+# Outermost, so captured durations cover the whole response
+capture.init_app(app)
+admission_control = admission.init_app(app)
 
 # Debug info
 logger.debug(f"App instance created. Static folder: {app.static_folder}")
 logger.debug(f"Template folder: {app.template_folder}")
 logger.debug(f"Static URL path: {app.static_url_path}")
 
-# Simple QuantumHermeticGematria implementation
-class QuantumHermeticGematria:
-    def __init__(self, dimension=10, seed=42):
-        self.dimension = dimension
-        self.seed = seed
-        torch.manual_seed(seed)
-        np.random.seed(seed)
-        self.initialize_vectors()
-    
-    def initialize_vectors(self):
-        self.vectors = {}
-        for i, char in enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"):
-            vec = torch.randn(self.dimension)
-            self.vectors[char] = vec / torch.norm(vec)
-    
-    def calculate(self, text):
-        text = text.upper()
-        result = torch.zeros(self.dimension)
-        for char in text:
-            if char in self.vectors:
-                result += self.vectors[char]
-        if torch.norm(result) > 0:
-            result = result / torch.norm(result)
-        return result
-    
-    def calculate_similarity(self, text1, text2):
-        vec1 = self.calculate(text1)
-        vec2 = self.calculate(text2)
-        similarity = torch.dot(vec1, vec2)
-        return similarity.item()
-    
-    def analyze_text(self, text):
-        vector = self.calculate(text)
-        
-        # Generate varying results based on actual input
-        numerical_value = int(sum(ord(c) for c in text) % 100)
-        text_length = len(text)
-        vector_sum = sum(vector.tolist())
-        
-        # Calculate a normalized resonance value that varies with input
-        resonance_base = float(torch.norm(vector).item())
-        resonance = 0.5 + 0.5 * (hash(text) % 1000) / 1000.0
-        
-        # Pattern significance varies with text
-        pattern_significance = round(0.5 + 0.4 * abs(hash(text) % 100) / 100.0, 2)
-        
-        # Generate interpretations based on input characteristics
-        patterns = ["harmonic_resonance", "quantum_entanglement", "sacred_geometry", 
-                   "hermetic_symmetry", "vibrational_matrix"]
-        qualities = ["Strong", "Moderate", "Subtle", "Profound", "Complex"]
-        geometries = ["vesica_piscis", "golden_spiral", "metatron_cube", 
-                     "flower_of_life", "merkaba"]
-        
-        # Select interpretation elements based on text characteristics
-        pattern_index = abs(hash(text)) % len(patterns)
-        quality_index = (len(text) + sum(ord(c) for c in text)) % len(qualities)
-        geometry_index = (abs(hash(text)) // 100) % len(geometries)
-        
-        # Generate explanations for each score
-        explanations = {
-            "quantum_resonance": "Measures the vibrational coherence of the phrase in quantum information space. Higher values indicate stronger resonance with fundamental universal patterns.",
-            "pattern_significance": "Indicates how strongly this phrase connects to archetypal patterns. Higher values suggest greater alignment with hermetic principles.",
-            "primary_pattern": {
-                "harmonic_resonance": "Shows alignment with natural harmonic sequences, suggesting balance and flow.",
-                "quantum_entanglement": "Indicates non-local connections across conceptual space-time.",
-                "sacred_geometry": "Reveals alignment with fundamental geometric structures of creation.",
-                "hermetic_symmetry": "Demonstrates balance across multiple hermetic principles.",
-                "vibrational_matrix": "Shows strong connection to the underlying vibrational fabric of reality."
-            },
-            "resonance_quality": {
-                "Strong": "Clear and powerful resonance that manifests consistently.",
-                "Moderate": "Balanced resonance with noticeable but not overwhelming effects.",
-                "Subtle": "Delicate resonance that works through nuance and refinement.",
-                "Profound": "Deep resonance that affects fundamental levels of reality.",
-                "Complex": "Multi-layered resonance with intricate patterns of manifestation."
-            },
-            "geometric_harmony": {
-                "vesica_piscis": "The sacred intersection of dualities, representing creation and divine feminine energy.",
-                "golden_spiral": "The pattern of perfect growth and proportion found throughout nature.",
-                "metatron_cube": "The geometric blueprint containing all Platonic solids and creation patterns.",
-                "flower_of_life": "The fundamental pattern of creation containing all geometric forms.",
-                "merkaba": "The light-spirit-body vehicle representing balanced energy fields."
-            }
-        }
-        
-        # Select specific explanations based on the generated values
-        selected_pattern = patterns[pattern_index]
-        selected_quality = qualities[quality_index]
-        selected_geometry = geometries[geometry_index]
-        
-        return {
-            "text": text,
-            "numerical_value": numerical_value,
-            "quantum_resonance": round(resonance, 2),
-            "energetic_properties": {
-                "harmony": float(abs(vector[0]).item()),
-                "power": float(abs(vector[1]).item()),
-                "intelligence": float(abs(vector[2]).item()),
-                "creativity": float(abs(vector[3]).item()),
-                "balance": float(abs(vector[4]).item())
-            },
-            "patterns": {},
-            "interpretation": {
-                "primary_pattern": selected_pattern,
-                "resonance_quality": selected_quality,
-                "geometric_harmony": selected_geometry,
-                "hermetic_influence": "vibration"
-            },
-            "pattern_significance": pattern_significance,
-            "vector": vector.tolist(),
-            "explanations": {
-                "quantum_resonance": explanations["quantum_resonance"],
-                "pattern_significance": explanations["pattern_significance"],
-                "primary_pattern": explanations["primary_pattern"][selected_pattern],
-                "resonance_quality": explanations["resonance_quality"][selected_quality],
-                "geometric_harmony": explanations["geometric_harmony"][selected_geometry]
-            }
-        }
-    
-    def compare_phrases(self, phrase1, phrase2):
-        similarity = self.calculate_similarity(phrase1, phrase2)
-        
-        # Calculate a compatibility score that varies with input
-        phrase_sum = len(phrase1) + len(phrase2)
-        hash_val = hash(phrase1 + phrase2)
-        compatibility = int(max(30, min(95, (similarity + 1) * 30 + (hash_val % 40))))
-        
-        # Generate different interpretations based on compatibility
-        if compatibility > 80:
-            interpretation = "These phrases share significant energetic harmony."
-        elif compatibility > 60:
-            interpretation = "These phrases have strong resonance."
-        elif compatibility > 40:
-            interpretation = "These phrases have moderate harmonic connection."
-        else:
-            interpretation = "These phrases show limited energetic alignment."
-        
-        # Generate varied resonance patterns
-        resonance_strength = round(0.3 + 0.7 * (hash_val % 100) / 100, 2)
-        synergy_level = round(0.2 + 0.8 * ((hash_val // 100) % 100) / 100, 2)
-        
-        # Generate varied relationship patterns
-        patterns = {
-            "harmonic_resonance": {
-                "strength": round(0.5 + 0.5 * (hash_val % 100) / 100, 2),
-                "description": "Natural flow and mutual enhancement"
-            },
-            "quantum_entanglement": {
-                "strength": round(0.3 + 0.6 * ((hash_val // 200) % 100) / 100, 2),
-                "description": "Deep connection across conceptual space"
-            }
-        }
-        
-        # Generate recommendations based on compatibility
-        recommendations = []
-        if compatibility > 70:
-            recommendations.append("These concepts share natural resonance.")
-        else:
-            recommendations.append("Consider exploring complementary elements.")
-            
-        if phrase_sum % 2 == 0:
-            recommendations.append("Focus on harmonic aspects for best results.")
-        else:
-            recommendations.append("Balance opposing elements for optimal outcome.")
-        
-        return {
-            "phrase1": phrase1,
-            "phrase2": phrase2,
-            "similarity": similarity,
-            "compatibility": compatibility,
-            "resonance_patterns": {"harmonic": resonance_strength},
-            "energetic_interactions": {"synergy": synergy_level},
-            "interpretation": interpretation,
-            "overall_compatibility_score": compatibility,
-            "resonance_compatibility": round(similarity, 2),
-            "relationship_patterns": patterns,
-            "recommendations": recommendations
-        }
+# Initialize QHG instance on the shared compute core
+qhg = WebGematria(get_core(app.config['QHG_DIMENSION'], dtype=app.config['QHG_STORAGE_DTYPE'],
+                           model_dir=app.config['QHG_MODEL_DIR'] or None))
+logger.info(f"Model {qhg.core.model_version}")
+png_cache = PngCache(qhg.core, max_entries=app.config['QHG_PNG_CACHE_SIZE'])
+flights = SingleFlight(shared_dir=app.config['QHG_SINGLEFLIGHT_DIR'] or None,
+                       dumps=app.json.dumps, loads=app.json.loads, namespace=qhg.core.model_version)
+results = ResultCache(qhg.core.model_version, max_entries=app.config['QHG_RESULT_CACHE_SIZE'],
+                      max_phrase_length=app.config['QHG_MAX_PHRASE_LENGTH'])
+
+def admitted_analysis(text):
+    with admission_control.admit(text):
+        return qhg.analyze_text(text)
+
+def admitted_comparison(phrase1, phrase2):
+    with admission_control.admit(phrase1, phrase2):
+        return qhg.compare_phrases(phrase1, phrase2)
+
+# Coalescing sits in front of admission so that requests waiting on an
+# identical in-flight computation do not take a lane slot of their own
+def coalesced_analysis(text):
+    if not app.config['QHG_SINGLEFLIGHT_ENABLED']:
+        return admitted_analysis(text)
+    return flights.do("analyze", admitted_analysis, text)
+
+def coalesced_comparison(phrase1, phrase2):
+    if not app.config['QHG_SINGLEFLIGHT_ENABLED']:
+        return admitted_comparison(phrase1, phrase2)
+    return flights.do("compare", admitted_comparison, phrase1, phrase2)
+
+# Cached results are served without coalescing or admission
+def run_analysis(text):
+    return results.get_or_compute("analyze", coalesced_analysis, text)
+
+def run_comparison(phrase1, phrase2):
+    return results.get_or_compute("compare", coalesced_comparison, phrase1, phrase2)
+
+@app.after_request
+def cache_header(response):
+    """Report whether the result cache served this request (used by benchmarks/replay.py)"""
+    outcome = results.pop_outcome()
+    if outcome:
+        response.headers['X-Cache'] = outcome
+    return response
+
+warmup = Warmup(run_analysis, run_comparison, app.json.dumps, png_cache,
+                load_phrases(app.config['QHG_WARMUP_PHRASES'], app.config['QHG_WARMUP_FILE']))
+if app.config['QHG_WARMUP_ENABLED']:
+    warmup.start()
+else:
+    warmup.ready.set()
+
+# Reverse lookup of a corpus by /analyze labels
+lookup_index = LookupIndex(app.config['QHG_INDEX_DIR']) if app.config['QHG_INDEX_DIR'] else None
+if lookup_index is not None:
+    logger.info(f"Lookup index of {lookup_index.size} phrases from {lookup_index.directory}")
+
+# Archetype groups fitted offline over a corpus
+cluster_model = (ClusterModel.load(app.config['QHG_CLUSTER_FILE'], qhg.core.model_version)
+                 if app.config['QHG_CLUSTER_FILE'] else None)
+
+# Full per-user history behind the 10 entries kept in the session
+history_store = (HistoryStore(app.config['QHG_HISTORY_DB'], dumps=app.json.dumps)
+                 if app.config['QHG_HISTORY_DB'] else None)
+
+def history_user(create=False):
+    """Id of this session's stored history, assigned on first write"""
+    if create and 'uid' not in session:
+        session['uid'] = secrets.token_hex(8)
+    return session.get('uid', '')
+
+def record_history(add, *args):
+    """Store an entry in the full history; a failed write is logged, never failing the request"""
+    try:
+        with stage("history_write"):
+            add(history_user(create=True), *args)
+    except sqlite3.Error as e:
+        logger.error(f"History write failed: {str(e)}")
+
+def history_filters(args):
+    """kind, since, until and q (text) filters of a /history/* request"""
+    kind = args.get('kind') or None
+    if kind is not None and kind not in HISTORY_KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {', '.join(HISTORY_KINDS)}")
+    return {"kind": kind,
+            "since": parse_time(args['since']) if args.get('since') else None,
+            "until": parse_time(args['until']) if args.get('until') else None,
+            "text": args.get('q') or None}
 
-# Initialize QHG instance
-qhg = QuantumHermeticGematria()
+# The letter table for client-side similarity (static/js/gematria.js)
+model_json = assets.PrecompiledResponse(app, app.json.dumps_bytes({
+    "model_version": qhg.core.model_version,
+    "alphabet": qhg.core.alphabet,
+    "dimension": qhg.core.dimension,
+    "table": np.asarray(qhg.core.table),
+}), 'application/json', version=qhg.core.model_version)
+app.jinja_env.globals['model_url'] = f"/model.json?v={qhg.core.model_version}"
+
+# Static files are fingerprinted and the index page is rendered once; both
+# are rebuilt on change in debug mode
+auto_reload = app.debug or bool(app.config['TEMPLATES_AUTO_RELOAD'])
+asset_manifest = assets.AssetManifest(app.static_folder, app.static_url_path, auto_reload=auto_reload)
+app.jinja_env.globals['asset_url'] = asset_manifest.url
+index_page = assets.PrecompiledPage(app, 'index.html', asset_manifest)
+
+@app.route('/model.json')
+def model():
+    return model_json.response(request)
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving"""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: model loaded and warmup finished"""
+    body = dict(warmup.status(), model_version=qhg.core.model_version, cached_results=len(results))
+    body["status"] = "ready" if warmup.ready.is_set() else "warming"
+    return jsonify(body), 200 if warmup.ready.is_set() else 503
 
 @app.route('/')
 def index():
-    logger.debug("Rendering index.html")
-    return render_template('index.html')
+    return index_page.response(request, auto_reload)
 
-@app.route('/static/<path:filename>')
 def static_files(filename):
     logger.debug(f"Serving static file: {filename} from {app.static_folder}")
     try:
-        filepath = os.path.join(app.static_folder, filename)
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            logger.debug(f"Static file content length: {len(content)}")
-            
-            mime_type = 'text/css' if filename.endswith('.css') else 'application/javascript'
-            
-            response = app.response_class(
-                response=content,
-                status=200,
-                mimetype=mime_type
-            )
-            
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
-            
-            return response
-        else:
-            logger.error(f"Static file not found: {filepath}")
+        response = asset_manifest.response(app, request, filename)
+        if response is None:
+            logger.error(f"Static file not found: {filename}")
             return f"File not found: {filename}", 404
+        return response
     except Exception as e:
         logger.error(f"Error serving static file {filename}: {str(e)}")
         logger.error(traceback.format_exc())
         return f"Error serving static file: {str(e)}", 500
 
+# Flask's built-in static rule matches first, so take over its view function
+app.view_functions['static'] = static_files
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
         logger.debug("Analyze endpoint called")
-        data = request.get_json()
+        with stage("json_parse"):
+            data = request.get_json()
         logger.debug(f"Received data: {data}")
         text = data.get('text', '')
         
@@ -259,7 +223,7 @@ def analyze():
             return jsonify({"error": "No text provided"}), 400
             
         # Perform analysis
-        result = qhg.analyze_text(text)
+        result = run_analysis(text)
         logger.debug(f"Analysis result: {result}")
         
         # Store in session history
@@ -273,8 +237,14 @@ def analyze():
         }
         
         session['history'] = [analysis_entry] + session['history'][:9]
+        if history_store is not None:
+            record_history(history_store.add_analysis, text, result)
         
-        return jsonify(result)
+        with stage("serialize"):
+            return jsonify(result)
+    except (AdmissionError, RequestEntityTooLarge) as e:
+        logger.warning(f"Analyze rejected: {str(e)}")
+        return admission.error_response(e)
     except Exception as e:
         logger.error(f"Error in analyze: {str(e)}")
         logger.error(traceback.format_exc())
@@ -284,7 +254,8 @@ def analyze():
 def compare():
     try:
         logger.debug("Compare endpoint called")
-        data = request.get_json()
+        with stage("json_parse"):
+            data = request.get_json()
         logger.debug(f"Received data: {data}")
         phrase1 = data.get('phrase1', '')
         phrase2 = data.get('phrase2', '')
@@ -294,7 +265,7 @@ def compare():
             return jsonify({"error": "Both phrases are required"}), 400
         
         # Perform comparison
-        result = qhg.compare_phrases(phrase1, phrase2)
+        result = run_comparison(phrase1, phrase2)
         logger.debug(f"Comparison result: {result}")
         
         # Store in session history
@@ -309,13 +280,111 @@ def compare():
         }
         
         session['comparisons'] = [comparison_entry] + session['comparisons'][:9]
+        if history_store is not None:
+            record_history(history_store.add_comparison, phrase1, phrase2, result)
         
-        return jsonify(result)
+        with stage("serialize"):
+            return jsonify(result)
+    except (AdmissionError, RequestEntityTooLarge) as e:
+        logger.warning(f"Compare rejected: {str(e)}")
+        return admission.error_response(e)
     except Exception as e:
         logger.error(f"Error in compare: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": str(e), "stack": traceback.format_exc()}), 500
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Stream analyses of many texts as NDJSON on the bulk lane"""
+    try:
+        logger.debug("Batch analyze endpoint called")
+        data = request.get_json()
+        texts = data.get('texts', [])
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "A non-empty list of texts is required"}), 400
+        admission_control.check_batch([t for t in texts if isinstance(t, str) and t])
+        lane = admission_control.bulk
+        lane.acquire()
+    except (AdmissionError, RequestEntityTooLarge) as e:
+        logger.warning(f"Batch rejected: {str(e)}")
+        return admission.error_response(e)
+    except Exception as e:
+        logger.error(f"Error in analyze_batch: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": str(e), "stack": traceback.format_exc()}), 500
+
+    start = time.perf_counter()
+    stats = DedupStats()
+    results = iter_analyses(qhg, texts, stats)
+    if data.get('summary'):
+        results = with_summary(results, stats)
+    response = app.response_class(ndjson(results, app.json.dumps), mimetype='application/x-ndjson')
+    # Hold the bulk slot until the stream is finished or abandoned
+    response.call_on_close(lambda: lane.release(time.perf_counter() - start))
+    return response
+
+@app.route('/lookup')
+def lookup():
+    """Corpus phrases matching every given label, e.g. ?numerical_value=93&primary_pattern=sacred_geometry"""
+    if lookup_index is None:
+        return jsonify({"error": "No lookup index configured (set QHG_INDEX_DIR)"}), 404
+    criteria = {field: request.args.getlist(field) for field in LOOKUP_FIELDS if field in request.args}
+    try:
+        limit = min(int(request.args.get('limit', 100)), app.config['QHG_LOOKUP_MAX_LIMIT'])
+        offset = int(request.args.get('offset', 0))
+        if limit < 0 or offset < 0:
+            raise ValueError("limit and offset must not be negative")
+        with stage("lookup"):
+            total, ids = lookup_index.lookup(criteria, limit, offset)
+            matches = [{"id": int(i), "text": lookup_index.phrase(i)} for i in ids]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with stage("serialize"):
+        return jsonify({"total": total, "offset": offset, "limit": limit, "results": matches})
+
+@app.route('/cluster', methods=['POST'])
+def cluster():
+    """Archetype group of each of {"texts": [...]}"""
+    if cluster_model is None:
+        return jsonify({"error": "No cluster model configured (set QHG_CLUSTER_FILE)"}), 404
+    try:
+        data = request.get_json()
+        texts = data.get('texts', [])
+        if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t for t in texts):
+            return jsonify({"error": "A non-empty list of non-empty texts is required"}), 400
+        admission_control.check_batch(texts)
+        with admission_control.admit(*texts):
+            labels, scores = cluster_model.assign(qhg.core.calculate_batch(texts))
+    except (AdmissionError, RequestEntityTooLarge) as e:
+        logger.warning(f"Cluster rejected: {str(e)}")
+        return admission.error_response(e)
+    except Exception as e:
+        logger.error(f"Error in cluster: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": str(e), "stack": traceback.format_exc()}), 500
+    with stage("serialize"):
+        return jsonify({"model_version": qhg.core.model_version,
+                        "results": [{"text": text, "cluster": cluster_model.names[label], "similarity": float(score)}
+                                    for text, label, score in zip(texts, labels.tolist(), scores)]})
+
+@app.route('/visualize.png')
+def visualize_png():
+    text = request.args.get('text', '')
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+    try:
+        dimensions = tuple(int(d) for d in request.args.get('dims', '0,1').split(','))
+        if len(dimensions) != 2:
+            raise ValueError("dims must be two comma-separated integers")
+        etag, png = png_cache.get(request.args.get('view', 'scatter'), text, dimensions)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = app.response_class(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response.make_conditional(request)
+
 @app.route('/history')
 def history():
     try:
@@ -325,16 +394,73 @@ def history():
             'comparisons': session.get('comparisons', [])
         }
         logger.debug(f"History data: {history_data}")
-        return jsonify(history_data)
+        with stage("serialize"):
+            return jsonify(history_data)
     except Exception as e:
         logger.error(f"Error in history: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": str(e), "stack": traceback.format_exc()}), 500
 
+@app.route('/history/entries')
+def history_entries():
+    """One page of the full history, newest first; pass next_cursor back as ?cursor= for the next"""
+    if history_store is None:
+        return jsonify({"error": "No history store configured (set QHG_HISTORY_DB)"}), 404
+    try:
+        limit = int(request.args.get('limit', app.config['QHG_HISTORY_PAGE_SIZE']))
+        limit = min(limit, app.config['QHG_HISTORY_MAX_PAGE'])
+        with stage("history_read"):
+            entries, next_cursor = history_store.page(history_user(), limit, request.args.get('cursor'),
+                                                      **history_filters(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with stage("serialize"):
+        return jsonify({"entries": entries, "next_cursor": next_cursor})
+
+@app.route('/history/export')
+def history_export():
+    """The full history, oldest first, streamed as ?format=ndjson (default) or csv"""
+    if history_store is None:
+        return jsonify({"error": "No history store configured (set QHG_HISTORY_DB)"}), 404
+    export_format = request.args.get('format', 'ndjson')
+    try:
+        if export_format not in ('ndjson', 'csv'):
+            raise ValueError(f"Unknown format {export_format!r}; expected ndjson or csv")
+        batches = history_store.iter_batches(history_user(), **history_filters(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if export_format == 'csv':
+        response = app.response_class(csv_chunks(batches), mimetype='text/csv')
+    else:
+        response = app.response_class(ndjson_chunks(batches, app.json.dumps), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="history.{export_format}"'
+    return response
+
+@app.route('/history/stats')
+def history_stats():
+    """Totals, most analyzed phrases and mean compatibility per day, from incrementally kept aggregates
+
+    since and until are whole days (YYYY-MM-DD), until exclusive.
+    """
+    if history_store is None:
+        return jsonify({"error": "No history store configured (set QHG_HISTORY_DB)"}), 404
+    try:
+        top = max(1, min(int(request.args.get('top', 10)), 100))
+        since = parse_day(request.args['since']) if request.args.get('since') else None
+        until = parse_day(request.args['until']) if request.args.get('until') else None
+        with stage("history_read"):
+            stats = history_store.stats(history_user(), top, since, until)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with stage("serialize"):
+        return jsonify(stats)
+
 @app.route('/clear_history', methods=['POST'])
 def clear_history():
     try:
         logger.debug("Clear history endpoint called")
+        if history_store is not None and 'uid' in session:
+            history_store.clear(session['uid'])
         session.clear()
         return jsonify({'status': 'success'})
     except Exception as e:
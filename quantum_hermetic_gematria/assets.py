@@ -0,0 +1,163 @@
+"""
+Static asset pipeline and precompiled pages.
+
+- ``AssetManifest`` loads every file under ``static/`` once and fingerprints
+  it by content. Templates link assets with ``asset_url("js/app.js")``,
+  which yields ``/static/js/app.js?v=<fingerprint>``. A request carrying the
+  current fingerprint is served as immutable for a year; any other request
+  gets ``no-cache`` plus an ETag, so it revalidates.
+- ``PrecompiledResponse`` keeps fixed bytes (such as /model.json)
+  compressed up front with every available encoding, and serves them with
+  a strong ETag per encoding and 304 on ``If-None-Match``.
+  ``PrecompiledPage`` does the same for a template rendered once.
+
+With ``auto_reload`` (debug mode or ``TEMPLATES_AUTO_RELOAD``) both check
+source mtimes on each request and rebuild when something changed.
+"""
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+
+from flask import render_template
+
+try:
+    from .compression import ENCODERS, compress, negotiate
+except ImportError:  # executed as a script from inside the package directory
+    from compression import ENCODERS, compress, negotiate
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+Asset = namedtuple("Asset", "body fingerprint mimetype mtime")
+
+
+def fingerprint(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+class AssetManifest:
+    """Content-fingerprinted files of a static folder, held in memory"""
+
+    def __init__(self, folder, url_path="/static", auto_reload=False):
+        self.folder = folder
+        self.url_path = url_path
+        self.auto_reload = auto_reload
+        self.generation = 0
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.scan()
+
+    def scan(self):
+        """(Re)load every file whose mtime changed; return True if anything did"""
+        found = {}
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                found[os.path.relpath(path, self.folder).replace(os.sep, "/")] = path
+        changed = found.keys() != self._assets.keys()
+        assets = {}
+        for filename, path in found.items():
+            mtime = os.path.getmtime(path)
+            asset = self._assets.get(filename)
+            if asset is None or asset.mtime != mtime:
+                with open(path, "rb") as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                asset = Asset(body, fingerprint(body), mimetype, mtime)
+                changed = True
+            assets[filename] = asset
+        if changed:
+            with self._lock:
+                self._assets = assets
+                self.generation += 1
+        return changed
+
+    def get(self, filename):
+        if self.auto_reload:
+            self.scan()
+        return self._assets.get(filename)
+
+    def url(self, filename):
+        """Fingerprinted URL of a static file, for templates"""
+        asset = self.get(filename)
+        suffix = f"?v={asset.fingerprint}" if asset else ""
+        return f"{self.url_path}/{filename}{suffix}"
+
+    def response(self, app, request, filename):
+        """Serve a static file, or None if it does not exist"""
+        asset = self.get(filename)
+        if asset is None:
+            return None
+        response = app.response_class(asset.body, mimetype=asset.mimetype)
+        response.set_etag(asset.fingerprint)
+        if request.args.get("v") == asset.fingerprint:
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+
+class PrecompiledResponse:
+    """Fixed bytes kept precompressed and served with a strong ETag per encoding
+
+    Responses revalidate (``no-cache``) unless the request names the current
+    ``version`` in ``?v=``, in which case they are immutable.
+    """
+
+    def __init__(self, app, body, mimetype, version=None):
+        self.app = app
+        self.mimetype = mimetype
+        self.version = version
+        self._set_body(body)
+
+    def _set_body(self, body):
+        digest = fingerprint(body)
+        variants = {None: (body, digest)}
+        for encoding in ENCODERS:
+            variants[encoding] = (compress(encoding, body), f"{digest}-{encoding}")
+        self._variants = variants
+
+    def response(self, request):
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        body, etag = self._variants[encoding]
+        response = self.app.response_class(body, mimetype=self.mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        if self.version is not None and request.args.get("v") == self.version:
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+
+class PrecompiledPage(PrecompiledResponse):
+    """A static template rendered once and kept precompressed
+
+    Always revalidated: the page links fingerprinted assets that change on deploy.
+    """
+
+    def __init__(self, app, template, manifest=None):
+        self.app = app
+        self.template = template
+        self.manifest = manifest
+        self.path = os.path.join(app.template_folder, template)
+        super().__init__(app, self._render(), "text/html")
+
+    def _render(self):
+        self._mtime = os.path.getmtime(self.path)
+        self._generation = self.manifest.generation if self.manifest else 0
+        with self.app.app_context():
+            return render_template(self.template).encode("utf-8")
+
+    def _stale(self):
+        if self.manifest is not None and (self.manifest.scan() or self.manifest.generation != self._generation):
+            return True
+        return os.path.getmtime(self.path) != self._mtime
+
+    def response(self, request, auto_reload=False):
+        if auto_reload and self._stale():
+            self._set_body(self._render())
+        return super().response(request)
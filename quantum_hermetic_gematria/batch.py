@@ -0,0 +1,70 @@
+"""
+Batch and streaming analysis.
+
+Large jobs are analysed as a stream: results are produced one at a time and
+written out as newline-delimited JSON, so memory stays flat however many
+texts a request carries. The web app serves this at /analyze/batch on the
+bulk admission lane, encoding with ``app.json``.
+
+Within a batch each distinct character histogram (see
+``core.histogram_key``) is analysed once. Rows that repeat one, such as
+duplicates, anagrams or case and punctuation variants, reuse that analysis
+with their own text. ``DedupStats`` records how many rows were saved.
+"""
+import json
+import logging
+
+try:
+    from .core import histogram_key
+    from .metrics import REGISTRY
+except ImportError:  # executed as a script from inside the package directory
+    from core import histogram_key
+    from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS_TOTAL = REGISTRY.counter("qhg_batch_rows_total",
+                                    "Batch rows analysed, by outcome (computed, deduplicated)")
+
+
+def iter_analyses(qhg, texts, stats=None):
+    """Yield the /analyze result for each text, or an error entry for empty ones
+
+    stats, a ``DedupStats``, is updated when the stream ends or is abandoned.
+    """
+    analyses = {}
+    rows = 0
+    try:
+        for text in texts:
+            if not isinstance(text, str) or not text:
+                yield {"text": text, "error": "No text provided"}
+                continue
+            rows += 1
+            counts = qhg.core.counts(text)
+            key = histogram_key(counts)
+            result = analyses.get(key)
+            if result is None:
+                # Shared by every row with this histogram; read-only, as with the result cache
+                result = analyses[key] = qhg.core.analyze(text, counts)
+            else:
+                result = dict(result, text=text)
+            yield qhg.adapt_analysis(result)
+    finally:
+        BATCH_ROWS_TOTAL.inc(len(analyses), outcome="computed")
+        BATCH_ROWS_TOTAL.inc(rows - len(analyses), outcome="deduplicated")
+        if stats is not None:
+            stats.add(rows, len(analyses))
+        logger.info(f"Batch of {rows} rows: {len(analyses)} distinct histograms "
+                    f"(dedup ratio {1 - len(analyses) / rows if rows else 0:.1%})")
+
+
+def with_summary(results, stats):
+    """Append a final {"summary": ...} entry once results are exhausted"""
+    yield from results
+    yield {"summary": stats.summary()}
+
+
+def ndjson(results, dumps=json.dumps):
+    """Encode results as newline-delimited JSON chunks"""
+    for result in results:
+        yield dumps(result) + "\n"
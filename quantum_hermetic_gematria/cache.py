@@ -0,0 +1,65 @@
+"""
+In-process LRU cache of /analyze and /compare results.
+
+Keys are ``(model_version, op, *args)``, so a worker never serves a result
+computed with another letter table. Results are shared between requests
+and must be treated as read-only, as with single-flight. Only phrases short
+enough for the interactive lane are cached: a result echoes its input, so
+caching bulk phrases would pin megabytes per entry.
+
+The outcome of the last lookup made by the current thread is kept for
+``pop_outcome``, which the app reports in an ``X-Cache`` response header.
+"""
+import threading
+from collections import OrderedDict
+
+try:
+    from .metrics import REGISTRY
+except ImportError:  # executed as a script from inside the package directory
+    from metrics import REGISTRY
+
+RESULT_CACHE_TOTAL = REGISTRY.counter("qhg_result_cache_total", "Result cache lookups by op and outcome (hit, miss)")
+
+
+class ResultCache:
+    """Thread-safe LRU of computed results"""
+
+    def __init__(self, namespace, max_entries=1024, max_phrase_length=10_000):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_phrase_length = max_phrase_length
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, op, fn, *args):
+        """Return the cached result for (op, *args), computing and storing it on a miss"""
+        if not self.max_entries or any(len(arg) > self.max_phrase_length for arg in args):
+            self._local.outcome = "bypass"
+            return fn(*args)
+        key = (self.namespace, op, *args)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        if result is not None:
+            RESULT_CACHE_TOTAL.inc(op=op, outcome="hit")
+            self._local.outcome = "hit"
+            return result
+        RESULT_CACHE_TOTAL.inc(op=op, outcome="miss")
+        self._local.outcome = "miss"
+        result = fn(*args)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def pop_outcome(self):
+        """Outcome ("hit", "miss" or "bypass") of this thread's last lookup, or None; clears it"""
+        outcome = getattr(self._local, "outcome", None)
+        self._local.outcome = None
+        return outcome
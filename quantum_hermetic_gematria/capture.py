@@ -0,0 +1,139 @@
+"""
+Opt-in capture of live traffic for replay (see ``benchmarks/replay.py``).
+
+With ``QHG_CAPTURE_ENABLED`` every request to ``QHG_CAPTURE_PATHS``
+(default /analyze, /compare and /history) is appended as one JSON line to
+``QHG_CAPTURE_DIR/capture-<pid>.jsonl``::
+
+    {"t": 1718000000.123, "session": "3f9c...", "method": "POST", "path": "/analyze",
+     "query": "", "body": {"text": "LIGHT"}, "status": 200, "duration_ms": 4.2}
+
+``t`` is the arrival time (Unix seconds) and ``duration_ms`` runs until the
+response was fully sent. The Flask session cookie has no stable id, so
+captured clients are tagged with a random ``qhg_capture`` cookie and
+``session`` groups the requests of one browser. Each worker writes its
+own file, rotated at ``QHG_CAPTURE_MAX_BYTES`` with
+``QHG_CAPTURE_BACKUPS`` old files kept. JSON bodies are stored parsed,
+anything else as a string. A body is only buffered for capture when its
+``Content-Length`` is known and within ``QHG_MAX_REQUEST_BYTES``; otherwise
+the request reaches the app untouched and is logged with ``"body": null``.
+Bodies hold user input, so treat captures as sensitive.
+"""
+import io
+import json
+import logging
+import os
+import secrets
+import time
+from http.cookies import SimpleCookie
+from logging.handlers import RotatingFileHandler
+
+COOKIE_NAME = "qhg_capture"
+
+
+def capture_logger(directory, max_bytes, backups):
+    """A dedicated logger writing raw lines to this process's rotating capture file"""
+    os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(os.path.join(directory, f"capture-{os.getpid()}.jsonl"),
+                                  maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger(f"{__name__}.{os.getpid()}")
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+class _CapturedResponse:
+    """Response iterable that records the request once the body has been sent or closed"""
+
+    def __init__(self, iterable, record):
+        self._iterable = iterable
+        self._record = record
+
+    def __iter__(self):
+        yield from self._iterable
+        self._done()
+
+    def _done(self):
+        record, self._record = self._record, None
+        if record is not None:
+            record()
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, "close"):
+                self._iterable.close()
+        finally:
+            self._done()
+
+
+class CaptureMiddleware:
+    """WSGI wrapper appending captured requests to a JSONL log"""
+
+    def __init__(self, wsgi_app, logger, paths, max_body):
+        self.wsgi_app = wsgi_app
+        self.logger = logger
+        self.paths = frozenset(paths)
+        self.max_body = max_body
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path not in self.paths:
+            return self.wsgi_app(environ, start_response)
+
+        arrived = time.time()
+        start = time.perf_counter()
+        cookie = SimpleCookie(environ.get("HTTP_COOKIE", ""))
+        session = cookie[COOKIE_NAME].value if COOKIE_NAME in cookie else None
+        new_session = session is None
+        if new_session:
+            session = secrets.token_hex(8)
+
+        # Buffer the body so it can be both logged and read by the app. Bodies
+        # of unknown length (chunked) or over the app's limit are left alone
+        # for the app to read or reject.
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or -1)
+        except ValueError:
+            length = -1
+        body = None
+        if 0 < length <= self.max_body:
+            raw = environ["wsgi.input"].read(length)
+            environ["wsgi.input"] = io.BytesIO(raw)
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                body = raw.decode("utf-8", "replace")
+
+        statuses = []
+
+        def _start_response(status, headers, exc_info=None):
+            statuses.append(status)
+            if new_session:
+                headers = list(headers) + [("Set-Cookie", f"{COOKIE_NAME}={session}; Path=/; HttpOnly; SameSite=Lax")]
+            return start_response(status, headers, exc_info)
+
+        def record():
+            self.logger.info(json.dumps({
+                "t": round(arrived, 6),
+                "session": session,
+                "method": environ.get("REQUEST_METHOD"),
+                "path": path,
+                "query": environ.get("QUERY_STRING", ""),
+                "body": body,
+                "status": int(statuses[-1].split(" ", 1)[0]) if statuses else 500,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            }, ensure_ascii=False))
+
+        return _CapturedResponse(self.wsgi_app(environ, _start_response), record)
+
+
+def init_app(app):
+    """Install the capture middleware if QHG_CAPTURE_ENABLED is set"""
+    config = app.config
+    if not config["QHG_CAPTURE_ENABLED"]:
+        return None
+    logger = capture_logger(config["QHG_CAPTURE_DIR"], config["QHG_CAPTURE_MAX_BYTES"], config["QHG_CAPTURE_BACKUPS"])
+    app.wsgi_app = CaptureMiddleware(app.wsgi_app, logger, config["QHG_CAPTURE_PATHS"], config["QHG_MAX_REQUEST_BYTES"])
+    return app.wsgi_app
@@ -0,0 +1,234 @@
+"""
+Mini-batch k-means over corpus vectors, grouping a corpus into archetypes.
+
+Vectors are the unit vectors ``QuantumHermeticGematria.calculate`` returns,
+embedded into a memory-mapped ``.npy`` file as for the similarity join (see
+:mod:`join`). Clustering is spherical: a vector belongs to the centroid
+with the highest cosine similarity. ``ClusterModel.partial_fit`` takes one
+chunk at a time and moves each centroid to the running mean of every vector
+it was ever assigned. This is the mini-batch k-means update with a
+per-centroid learning rate of 1/count. Memory use is one chunk whatever the
+corpus size, and new phrases can be folded into a saved model later.
+
+By default the centroids start from the archetypes of ``UniversalConstants``.
+Each archetypal frequency and Platonic angle becomes a cosine wave across
+the vector's components, so the clusters are named after them. With ``k``
+they start from random rows instead. A centroid that gets no vector in a
+whole pass is re-seeded from a random row.
+
+A saved model (``.npz``) holds the centroids, their counts and names, and
+the model version of the vectors. Assigning a phrase at request time is one
+(k, dimension) matrix product. Usage::
+
+    python -m quantum_hermetic_gematria.cluster fit corpus.txt -o clusters.npz
+    python -m quantum_hermetic_gematria.cluster update clusters.npz new-phrases.txt
+    python -m quantum_hermetic_gematria.cluster assign clusters.npz corpus.txt -o labels.npy
+"""
+import argparse
+import logging
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    from . import config
+    from .constants import UniversalConstants
+    from .core import get_core, similarities
+    from .join import vectors_for
+except ImportError:  # executed as a script from inside the package directory
+    import config
+    from constants import UniversalConstants
+    from core import get_core, similarities
+    from join import vectors_for
+
+logger = logging.getLogger(__name__)
+
+# Rows per mini-batch, read from the vector file one chunk at a time
+CHUNK_ROWS = 65536
+
+
+def archetype_seeds(dimension):
+    """(names, unit vectors) of the archetypes in UniversalConstants
+
+    Archetypal frequency f becomes cos(f * j) and Platonic angle a becomes
+    cos(radians(a) * j) over components j = 1..dimension.
+    """
+    constants = UniversalConstants()
+    waves = dict(constants.ARCHETYPAL_FREQUENCIES)
+    waves.update((name, math.radians(angle)) for name, angle in constants.PLATONIC_ANGLES.items())
+    j = np.arange(1, dimension + 1)
+    seeds = np.stack([np.cos(value * j) for value in waves.values()]).astype(np.float32)
+    seeds /= np.linalg.norm(seeds, axis=1, keepdims=True)
+    return list(waves), seeds
+
+
+class ClusterModel:
+    """Centroids with the number of vectors each has absorbed"""
+
+    def __init__(self, centroids, counts=None, names=None, model_version=None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.counts = np.zeros(len(self.centroids), dtype=np.int64) if counts is None else np.asarray(counts)
+        self.names = list(names) if names is not None else [f"cluster_{i}" for i in range(len(self.centroids))]
+        self.model_version = model_version
+        self._unit = None
+
+    @classmethod
+    def from_archetypes(cls, dimension, model_version=None):
+        names, seeds = archetype_seeds(dimension)
+        return cls(seeds, names=names, model_version=model_version)
+
+    @classmethod
+    def from_sample(cls, vectors, k, seed=42, model_version=None):
+        """Start from k distinct random rows of vectors"""
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(len(vectors), size=min(k, len(vectors)), replace=False))
+        return cls(np.asarray(vectors[rows], dtype=np.float32), model_version=model_version)
+
+    @property
+    def k(self):
+        return len(self.centroids)
+
+    @property
+    def unit_centroids(self):
+        if self._unit is None:
+            norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+            self._unit = np.divide(self.centroids, norms, out=np.zeros_like(self.centroids), where=norms > 0)
+        return self._unit
+
+    def assign(self, vectors):
+        """(cluster index, cosine similarity) of each row of vectors"""
+        scores = similarities(vectors, self.unit_centroids)
+        labels = scores.argmax(axis=1)
+        return labels, scores[np.arange(len(vectors)), labels]
+
+    def partial_fit(self, vectors):
+        """Fold one chunk of vectors into the centroids; return their mean similarity"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        labels, scores = self.assign(vectors)
+        counts = np.bincount(labels, minlength=self.k)
+        hit = np.flatnonzero(counts)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[hit]
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        total = self.counts[hit] + counts[hit]
+        self.centroids[hit] = (self.centroids[hit] * (self.counts[hit] / total)[:, None]
+                               + sums / total[:, None])
+        self.counts[hit] = total
+        self._unit = None
+        return float(scores.mean()) if len(scores) else 0.0
+
+    def reseed(self, clusters, vectors, rng):
+        """Move the given clusters onto random rows of vectors and reset their counts"""
+        if len(clusters) and len(vectors):
+            rows = np.sort(rng.choice(len(vectors), size=min(len(clusters), len(vectors)), replace=False))
+            clusters = clusters[:len(rows)]
+            self.centroids[clusters] = np.asarray(vectors[rows], dtype=np.float32)
+            self.counts[clusters] = 0
+            self._unit = None
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, counts=self.counts, names=np.array(self.names),
+                 model_version=np.array(self.model_version or ""))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, model_version=None):
+        """Load a saved model, checking it was fitted on vectors of model_version"""
+        with np.load(path) as data:
+            model = cls(data["centroids"], data["counts"], data["names"].tolist(),
+                        str(data["model_version"]) or None)
+        if model_version is not None and model.model_version != model_version:
+            raise ValueError(f"{path}: fitted on model {model.model_version}, not {model_version}")
+        return model
+
+
+def fit(model, vectors, epochs=1, chunk_rows=CHUNK_ROWS, seed=42):
+    """Run mini-batch k-means over vectors (any length, e.g. a memory map), chunk by chunk
+
+    Chunks are visited in a fresh random order every epoch. Centroids that
+    absorbed nothing during an epoch are re-seeded from the last chunk.
+    """
+    if not len(vectors):
+        raise ValueError("No vectors to fit; the corpus is empty")
+    rng = np.random.default_rng(seed)
+    starts = np.arange(0, len(vectors), chunk_rows)
+    for epoch in range(epochs):
+        before = model.counts.copy()
+        similarity = 0.0
+        for start in rng.permutation(starts):
+            chunk = vectors[start:start + chunk_rows]
+            similarity = model.partial_fit(chunk)
+        idle = np.flatnonzero(model.counts == before)
+        logger.info("Epoch %d: mean similarity %.4f on the last chunk, %d idle clusters",
+                    epoch + 1, similarity, len(idle))
+        if epoch + 1 < epochs:
+            model.reseed(idle, chunk, rng)
+    return model
+
+
+def assign_file(model, vectors, labels_path, chunk_rows=CHUNK_ROWS):
+    """Write the cluster of every row of vectors to an int32 .npy file; return cluster sizes"""
+    labels = np.lib.format.open_memmap(labels_path, mode="w+", dtype=np.int32, shape=(len(vectors),))
+    sizes = np.zeros(model.k, dtype=np.int64)
+    for start in range(0, len(vectors), chunk_rows):
+        chunk_labels, _ = model.assign(vectors[start:start + chunk_rows])
+        labels[start:start + len(chunk_labels)] = chunk_labels
+        sizes += np.bincount(chunk_labels, minlength=model.k)
+    labels.flush()
+    return sizes
+
+
+def main(argv=None):
+    settings = config.from_env()
+    parser = argparse.ArgumentParser(description="Cluster phrase vectors with mini-batch k-means")
+    parser.add_argument("--dimension", type=int, default=settings["QHG_DIMENSION"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dtype", default=settings["QHG_STORAGE_DTYPE"])
+    parser.add_argument("--work-dir", default=".", help="where embedded vector files are kept")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit_parser = commands.add_parser("fit", help="fit a new model to a corpus")
+    fit_parser.add_argument("corpus", help="phrases, one per line")
+    fit_parser.add_argument("-o", "--output", required=True, help="model file (.npz)")
+    fit_parser.add_argument("-k", type=int, help="random initial centroids instead of the archetypes")
+    fit_parser.add_argument("--epochs", type=int, default=1)
+    update_parser = commands.add_parser("update", help="fold new phrases into a saved model")
+    update_parser.add_argument("model")
+    update_parser.add_argument("corpus")
+    assign_parser = commands.add_parser("assign", help="write the cluster of every phrase")
+    assign_parser.add_argument("model")
+    assign_parser.add_argument("corpus")
+    assign_parser.add_argument("-o", "--output", required=True, help="int32 labels (.npy)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    core = get_core(args.dimension, args.seed, args.dtype, settings["QHG_MODEL_DIR"] or None)
+    os.makedirs(args.work_dir, exist_ok=True)
+    vectors = np.load(vectors_for(core, args.corpus, args.work_dir), mmap_mode="r")
+    start = time.perf_counter()
+    if args.command == "fit":
+        if args.k:
+            model = ClusterModel.from_sample(vectors[:args.chunk_rows], args.k, args.seed, core.model_version)
+        else:
+            model = ClusterModel.from_archetypes(core.dimension, core.model_version)
+        fit(model, vectors, args.epochs, args.chunk_rows, args.seed)
+        model.save(args.output)
+    elif args.command == "update":
+        model = ClusterModel.load(args.model, core.model_version)
+        fit(model, vectors, 1, args.chunk_rows, args.seed)
+        model.save(args.model)
+    else:
+        model = ClusterModel.load(args.model, core.model_version)
+        sizes = assign_file(model, vectors, args.output, args.chunk_rows)
+        for name, size in sorted(zip(model.names, sizes.tolist()), key=lambda item: -item[1]):
+            print(f"{name}\t{size}")
+    logger.info("%s of %d phrases took %.1fs", args.command, len(vectors), time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Response compression for the JSON and NDJSON endpoints.
+
+``CompressionMiddleware`` negotiates an encoding from ``Accept-Encoding``
+(brotli, then zstd, then gzip on ties, brotli and zstd only when their
+packages are installed) and compresses text-like responses:
+
+- buffered responses under ``min_size`` bytes are sent as they are
+- larger buffered bodies are compressed in one go; the result is kept in an
+  LRU keyed by the body digest and encoding, so repeated payloads (the same
+  phrase analysed again, the explanation-heavy /history) are compressed once
+- streaming responses (no ``Content-Length``, e.g. /analyze/batch) are
+  compressed chunk by chunk, flushing after each chunk so NDJSON lines still
+  reach the client as they are produced
+
+Compression levels favour size over CPU, since most of the traffic goes to
+mobile clients.
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+try:
+    from .metrics import REGISTRY, stage
+except ImportError:  # executed as a script from inside the package directory
+    from metrics import REGISTRY, stage
+
+COMPRESSED_TOTAL = REGISTRY.counter(
+    "qhg_compression_total", "Responses by encoding and outcome (hit, miss, stream, small)")
+COMPRESSION_BYTES = REGISTRY.counter(
+    "qhg_compression_bytes_total", "Bytes before (direction=in) and after (direction=out) compression")
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, level):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self, level):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._c.flush()
+
+
+# Server preference order, with (encoder, level)
+ENCODERS = OrderedDict()
+if brotli is not None:
+    ENCODERS["br"] = (_Brotli, 9)
+if zstandard is not None:
+    ENCODERS["zstd"] = (_Zstd, 12)
+ENCODERS["gzip"] = (_Gzip, 9)
+
+
+def negotiate(accept_encoding, available=ENCODERS):
+    """Pick the best available encoding the client accepts, or None"""
+    if not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    best, best_q = None, 0
+    for encoding in available:
+        q = accept.quality(encoding)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(encoding, body):
+    encoder, level = ENCODERS[encoding]
+    c = encoder(level)
+    return c.compress(body) + c.finish()
+
+
+def _unsupported_write(data):
+    raise RuntimeError("CompressionMiddleware does not support the WSGI write() callable")
+
+
+def _is_compressible(content_type):
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+class _CompressedStream:
+    """Iterable compressing an app_iter chunk by chunk, closing it when done"""
+
+    def __init__(self, app_iter, encoding):
+        self.app_iter = app_iter
+        encoder, level = ENCODERS[encoding]
+        self.compressor = encoder(level)
+        self.encoding = encoding
+
+    def __iter__(self):
+        c = self.compressor
+        size_in = size_out = 0
+        for chunk in self.app_iter:
+            if not chunk:
+                continue
+            out = c.compress(chunk) + c.flush()
+            size_in += len(chunk)
+            size_out += len(out)
+            yield out
+        out = c.finish()
+        size_out += len(out)
+        COMPRESSION_BYTES.inc(size_in, direction="in")
+        COMPRESSION_BYTES.inc(size_out, direction="out")
+        if out:
+            yield out
+
+    def close(self):
+        close = getattr(self.app_iter, "close", None)
+        if close is not None:
+            close()
+
+
+class CompressionMiddleware:
+    """WSGI wrapper compressing text-like responses for clients that accept it"""
+
+    def __init__(self, wsgi_app, min_size=1024, cache_size=512, max_cached_bytes=256 * 1024):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.cache_size = cache_size
+        self.max_cached_bytes = max_cached_bytes
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None or environ.get("REQUEST_METHOD") == "HEAD":
+            return self.wsgi_app(environ, start_response)
+
+        captured = []
+
+        def _start_response(status, headers, exc_info=None):
+            if captured is None:  # the app started late, while we were passing it through
+                return start_response(status, headers, exc_info)
+            captured[:] = [status, headers, exc_info]
+            return _unsupported_write
+
+        app_iter = self.wsgi_app(environ, _start_response)
+        if not captured:
+            captured = None
+            return app_iter
+        status, original_headers, exc_info = captured
+        header_map = {k.lower(): v for k, v in original_headers}
+
+        if (status[:3] in ("204", "304") or "content-encoding" in header_map
+                or not _is_compressible(header_map.get("content-type", ""))):
+            start_response(status, original_headers, exc_info)
+            return app_iter
+
+        if "vary" not in header_map:
+            original_headers = original_headers + [("Vary", "Accept-Encoding")]
+        elif "accept-encoding" not in header_map["vary"].lower():
+            original_headers = [(k, f"{v}, Accept-Encoding" if k.lower() == "vary" else v)
+                                for k, v in original_headers]
+        headers = [(k, v) for k, v in original_headers if k.lower() not in ("content-length", "etag")]
+        headers.append(("Content-Encoding", encoding))
+        if "etag" in header_map:
+            # The bytes differ per encoding; a weak tag still validates If-None-Match
+            etag = header_map["etag"]
+            headers.append(("ETag", etag if etag.startswith("W/") else "W/" + etag))
+
+        if "content-length" not in header_map:
+            COMPRESSED_TOTAL.inc(encoding=encoding, outcome="stream")
+            start_response(status, headers, exc_info)
+            return _CompressedStream(app_iter, encoding)
+
+        try:
+            body = b"".join(app_iter)
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                close()
+
+        if len(body) < self.min_size:
+            COMPRESSED_TOTAL.inc(encoding="identity", outcome="small")
+            start_response(status, original_headers, exc_info)
+            return [body]
+
+        with stage("compress"):
+            compressed = self._compress_cached(encoding, body)
+        headers.append(("Content-Length", str(len(compressed))))
+        start_response(status, headers, exc_info)
+        return [compressed]
+
+    def _compress_cached(self, encoding, body):
+        if len(body) > self.max_cached_bytes or not self.cache_size:
+            COMPRESSED_TOTAL.inc(encoding=encoding, outcome="miss")
+            return self._compress(encoding, body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+        if compressed is not None:
+            COMPRESSED_TOTAL.inc(encoding=encoding, outcome="hit")
+            return compressed
+        COMPRESSED_TOTAL.inc(encoding=encoding, outcome="miss")
+        compressed = self._compress(encoding, body)
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compressed
+
+    @staticmethod
+    def _compress(encoding, body):
+        compressed = compress(encoding, body)
+        COMPRESSION_BYTES.inc(len(body), direction="in")
+        COMPRESSION_BYTES.inc(len(compressed), direction="out")
+        return compressed
+
+
+def init_app(app):
+    """Wrap app.wsgi_app with CompressionMiddleware when QHG_COMPRESSION_ENABLED"""
+    config = app.config
+    if not config["QHG_COMPRESSION_ENABLED"]:
+        return None
+    middleware = CompressionMiddleware(app.wsgi_app, min_size=config["QHG_COMPRESSION_MIN_SIZE"],
+                                       cache_size=config["QHG_COMPRESSION_CACHE_SIZE"])
+    app.wsgi_app = middleware
+    return middleware
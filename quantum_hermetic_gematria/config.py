@@ -0,0 +1,107 @@
+"""
+Environment-driven settings for the web app and the desktop GUI.
+
+Every key in ``DEFAULTS`` can be overridden with a ``QHG_<KEY>`` environment
+variable; values are coerced to the type of the default. ``from_env`` returns
+the merged settings with the ``QHG_`` prefix kept, ready for
+``app.config.from_mapping``.
+"""
+import os
+import tempfile
+
+DEFAULTS = {
+    # Letter-vector dimension (10 reproduces the original model; 256-1024 ranks finer)
+    "DIMENSION": 10,
+    # dtype of stored vectors (batches, indexes, caches): "float32" or "float16"
+    "STORAGE_DTYPE": "float32",
+    # Directory of letter-table snapshots; empty uses the packaged models/
+    "MODEL_DIR": "",
+    # Instrumentation: per-stage timers and the /metrics endpoint
+    "METRICS_ENABLED": False,
+    # Profile this many requests at boot (0 disables)
+    "PROFILE_REQUESTS": 0,
+    # "cprofile" dumps pstats, "sample" dumps flamegraph collapsed stacks
+    "PROFILE_MODE": "cprofile",
+    "PROFILE_DIR": tempfile.gettempdir(),
+    # When set, POST /debug/profile with this X-Profile-Token arms the profiler
+    "PROFILE_TOKEN": "",
+    # Rendered PNGs kept in memory for /visualize.png
+    "PNG_CACHE_SIZE": 256,
+    # Coalesce identical concurrent /analyze and /compare requests
+    "SINGLEFLIGHT_ENABLED": True,
+    # Private (0700) directory for cross-worker coalescing; empty keeps it within each worker
+    "SINGLEFLIGHT_DIR": "",
+    # Admission control: body/phrase limits and per-worker lane budgets
+    "MAX_REQUEST_BYTES": 4 * 1024 * 1024,
+    # Longer phrases are routed to the bulk lane
+    "MAX_PHRASE_LENGTH": 10_000,
+    # Hard limit for any single phrase (413 beyond it)
+    "MAX_BULK_PHRASE_LENGTH": 1_000_000,
+    "MAX_BATCH_ITEMS": 10_000,
+    "INTERACTIVE_CONCURRENCY": 8,
+    "INTERACTIVE_QUEUE": 32,
+    "BULK_CONCURRENCY": 1,
+    "BULK_QUEUE": 2,
+    # Seconds a request may wait for a lane slot before it is shed
+    "QUEUE_TIMEOUT": 5.0,
+    # Shed requests whose X-Request-Start is older than this (0 disables)
+    "MAX_QUEUE_WAIT_MS": 0,
+    # JSON encoder for responses, session and NDJSON: "auto", "orjson" or "default"
+    "JSON_PROVIDER": "auto",
+    # gzip/brotli/zstd response compression negotiated from Accept-Encoding
+    "COMPRESSION_ENABLED": True,
+    # Buffered responses smaller than this many bytes are sent uncompressed
+    "COMPRESSION_MIN_SIZE": 1024,
+    # Compressed bodies kept for repeated payloads
+    "COMPRESSION_CACHE_SIZE": 512,
+    # Computed /analyze and /compare results kept per worker (0 disables)
+    "RESULT_CACHE_SIZE": 1024,
+    # Exercise the compute path at boot; /readyz reports 503 until done
+    "WARMUP_ENABLED": True,
+    # Hot phrases precomputed into the result cache at boot
+    "WARMUP_PHRASES": [],
+    # File with more hot phrases, one per line
+    "WARMUP_FILE": "",
+    # Directory of a lookup index built with `python -m quantum_hermetic_gematria.index`; empty disables /lookup
+    "INDEX_DIR": "",
+    # Most phrases /lookup returns per page
+    "LOOKUP_MAX_LIMIT": 1000,
+    # Cluster model built with `python -m quantum_hermetic_gematria.cluster fit`; empty disables /cluster
+    "CLUSTER_FILE": "",
+    # SQLite file of every user's full history (/history/entries, /export, /stats); empty disables
+    "HISTORY_DB": "",
+    # Entries per /history/entries page by default, and at most
+    "HISTORY_PAGE_SIZE": 50,
+    "HISTORY_MAX_PAGE": 1000,
+    # Session signing key shared by all workers; empty generates one per worker
+    "SECRET_KEY": "",
+    # Record /analyze, /compare and /history requests for benchmarks/replay.py
+    "CAPTURE_ENABLED": False,
+    "CAPTURE_DIR": os.path.join(tempfile.gettempdir(), "qhg-capture"),
+    "CAPTURE_PATHS": ["/analyze", "/compare", "/history"],
+    # Each worker's capture file is rotated at this size, keeping this many old files
+    "CAPTURE_MAX_BYTES": 64 * 1024 * 1024,
+    "CAPTURE_BACKUPS": 5,
+}
+
+
+def _coerce(raw, default):
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    if isinstance(default, (list, tuple)):
+        return [item.strip() for item in raw.split(",") if item.strip()]
+    return raw
+
+
+def from_env(environ=None, prefix="QHG_"):
+    """Return DEFAULTS overlaid with QHG_* environment variables"""
+    environ = os.environ if environ is None else environ
+    settings = {}
+    for key, default in DEFAULTS.items():
+        raw = environ.get(prefix + key)
+        settings[prefix + key] = default if raw is None else _coerce(raw, default)
+    return settings
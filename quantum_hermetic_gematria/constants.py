@@ -0,0 +1,246 @@
+"""Universal constants shared by the compute core, adapters and GUI."""
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+# Module-level copies of the base ratios. The ``default_factory`` lambdas in
+# UniversalConstants are evaluated at instantiation time and cannot see the
+# class body, so they resolve these names from the module instead.
+PHI = 1.618033988749895
+PI = 3.141592653589793
+E = 2.718281828459045
+SQRT2 = 1.414213562373095
+SQRT3 = 1.732050807568877
+SQRT5 = 2.236067977499790
+FINE_STRUCTURE = 0.0072973525693
+GOLDEN_SPIRAL = PHI ** (1/PHI)
+
+@dataclass
+class UniversalConstants:
+    """Core universal constants and sacred ratios"""
+    PHI: float = PHI  # Golden Ratio - Divine Proportion
+    PI: float = PI   # Circle/Sphere - Unity
+    E: float = E    # Natural Growth
+    SQRT2: float = SQRT2  # Root of Duality
+    SQRT3: float = SQRT3  # Triangle - Creation
+    SQRT5: float = SQRT5  # Pentagram - Life Force
+    
+    # Sacred number sequences
+    FIBONACCI: List[int] = field(default_factory=lambda: [1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233])
+    PRIME: List[int] = field(default_factory=lambda: [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41])
+    
+    # Platonic solid angles (degrees) - Perfect Forms
+    PLATONIC_ANGLES: Dict[str, float] = field(default_factory=lambda: {
+        "tetrahedron": 19.471220634490697,  # Fire
+        "cube": 90.0,                       # Earth
+        "octahedron": 109.47122063449069,   # Air
+        "dodecahedron": 116.56505117707799, # Aether
+        "icosahedron": 138.19074733861384   # Water
+    })
+
+    # Hermetic principle resonances
+    MENTALISM: float = PHI ** 2       # The All is Mind
+    CORRESPONDENCE: float = PI * PHI   # As Above, So Below
+    VIBRATION: float = E * PHI        # Nothing Rests
+    POLARITY: float = SQRT2 * PHI     # Everything is Dual
+    RHYTHM: float = SQRT3 * PHI       # Everything Flows
+    CAUSATION: float = SQRT5 * PHI    # Cause and Effect
+    GENDER: float = (PHI + PI) / 2    # Gender is in Everything
+
+    # Fundamental physical constants that govern universal structure
+    PLANCK_LENGTH: float = 1.616255e-35  # Smallest possible length
+    PLANCK_TIME: float = 5.391247e-44    # Smallest possible time unit
+    SPEED_OF_LIGHT: float = 299792458    # Speed of light in vacuum
+    FINE_STRUCTURE: float = FINE_STRUCTURE  # Electromagnetic coupling constant
+    
+    # Sacred ratios derived from natural phenomena
+    DNA_RATIO: float = 34/21  # Ratio found in DNA double helix
+    GOLDEN_SPIRAL: float = GOLDEN_SPIRAL  # Self-referential growth pattern
+    COSMIC_RATIO: float = PI * E / PHI  # Universal expansion ratio
+
+    # Archetypal resonance frequencies
+    ARCHETYPAL_FREQUENCIES: Dict[str, float] = field(default_factory=lambda: {
+        "unity": PHI,           # Oneness, wholeness
+        "duality": SQRT2,       # Polarities, reflection
+        "creation": SQRT3,      # Divine creation, growth
+        "stability": 4.0,       # Foundation, order
+        "change": SQRT5,        # Transformation
+        "harmony": 6.0,         # Balance, beauty
+        "spirituality": 7.0     # Mystical wisdom
+    })
+    
+    # Pattern significance thresholds
+    RESONANCE_THRESHOLD: float = 0.618  # Golden ratio reciprocal
+    QUANTUM_COHERENCE: float = PI / PHI  # Quantum stability measure
+
+    # Egyptian technology resonance patterns
+    EGYPTIAN_TECH: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
+        "ankh_device": {
+            "frequency": PHI * SQRT5,
+            "purpose": "Life force amplification and healing",
+            "materials": "Gold, copper, crystalline structures"
+        },
+        "pyramid_resonator": {
+            "frequency": PI * SQRT3,
+            "purpose": "Energy focusing and cosmic alignment",
+            "materials": "Limestone, granite, quartz crystal"
+        },
+        "djed_pillar": {
+            "frequency": E * PHI,
+            "purpose": "Electromagnetic energy stabilization",
+            "materials": "Gold-plated wood, electrum"
+        },
+        "was_scepter": {
+            "frequency": SQRT3 * PHI,
+            "purpose": "Harmonic wave generation",
+            "materials": "Copper, gold, ceremonial metals"
+        },
+        "menat_counter": {
+            "frequency": SQRT2 * PI,
+            "purpose": "Biorhythm harmonization",
+            "materials": "Semi-precious stones, copper"
+        },
+        "sistrum": {
+            "frequency": PHI * 7,
+            "purpose": "Sonic frequency modulation",
+            "materials": "Bronze, silver, gold"
+        },
+        "ba_sphere": {
+            "frequency": E * SQRT5,
+            "purpose": "Consciousness expansion",
+            "materials": "Gold, electrum, crystal"
+        },
+        "benben_stone": {
+            "frequency": PI * PI,
+            "purpose": "Primordial energy focusing",
+            "materials": "Meteorite iron, crystalline stone"
+        },
+        "lotus_resonator": {
+            "frequency": PHI * PI,
+            "purpose": "Spiritual awakening amplification",
+            "materials": "Blue lotus extract, gold vessel"
+        },
+        "scarab_circuit": {
+            "frequency": E * SQRT2,
+            "purpose": "Solar energy transformation",
+            "materials": "Lapis lazuli, gold, turquoise"
+        },
+        "uraeus_amplifier": {
+            "frequency": SQRT5 * SQRT3,
+            "purpose": "Kundalini energy activation",
+            "materials": "Gold, electrum, serpentine"
+        },
+        "thoth_tablet": {
+            "frequency": PHI * E,
+            "purpose": "Cosmic knowledge transmission",
+            "materials": "Emerald, gold inscriptions"
+        },
+        "heka_wand": {
+            "frequency": PI * SQRT5,
+            "purpose": "Magical energy direction",
+            "materials": "Ivory, gold, amethyst"
+        },
+        "sekhem_staff": {
+            "frequency": PHI * SQRT2 * PI,
+            "purpose": "Power manifestation",
+            "materials": "Cedar wood, gold caps, quartz"
+        }
+    })
+
+    # Modern resonance equivalents
+    MODERN_EQUIVALENTS: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
+        "quartz_crystal": {
+            "frequency": PHI * SQRT3,
+            "purpose": "Frequency stabilization",
+            "common_form": "Crystal oscillators, watches"
+        },
+        "copper_coil": {
+            "frequency": PI * E,
+            "purpose": "Electromagnetic induction",
+            "common_form": "Tesla coils, transformers"
+        },
+        "pyramid_frame": {
+            "frequency": PI * SQRT3,
+            "purpose": "Energy focusing",
+            "common_form": "Meditation pyramids, greenhouse structures"
+        },
+        "resonant_cavity": {
+            "frequency": PHI * 7,
+            "purpose": "Wave harmonization",
+            "common_form": "Singing bowls, bell metals"
+        },
+        "orgone_accumulator": {
+            "frequency": E * PHI,
+            "purpose": "Energy accumulation",
+            "common_form": "Layered organic/inorganic materials"
+        },
+        "plasma_sphere": {
+            "frequency": SQRT5 * PI,
+            "purpose": "Electromagnetic visualization",
+            "common_form": "Plasma balls, lightning spheres"
+        },
+        "fibonacci_spiral": {
+            "frequency": PHI * PHI,
+            "purpose": "Natural growth patterns",
+            "common_form": "Spiral structures, vortex generators"
+        }
+    })
+
+    # Synergy and compatibility thresholds
+    SYNERGY_THRESHOLD: float = 0.777  # Optimal harmony threshold
+    INTERFERENCE_THRESHOLD: float = 0.333  # Destructive interference threshold
+    
+    # Relationship resonance patterns
+    RELATIONSHIP_PATTERNS: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
+        "harmonic_resonance": {
+            "threshold": PHI / 2,
+            "description": "Natural flow and mutual enhancement"
+        },
+        "catalytic_growth": {
+            "threshold": E / 2,
+            "description": "Mutual growth and transformation"
+        },
+        "stable_foundation": {
+            "threshold": SQRT2 / 2,
+            "description": "Long-term stability and security"
+        },
+        "dynamic_balance": {
+            "threshold": PI / 3,
+            "description": "Complementary energies in motion"
+        },
+        "creative_synthesis": {
+            "threshold": SQRT3 / 2,
+            "description": "Innovation and new possibilities"
+        },
+        "quantum_entanglement": {
+            "threshold": FINE_STRUCTURE * 10,
+            "description": "Deep synchronicity and connection"
+        },
+        "evolutionary_path": {
+            "threshold": GOLDEN_SPIRAL / 2,
+            "description": "Shared growth and development"
+        }
+    })
+
+    # Practical alignment indicators
+    ALIGNMENT_METRICS: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
+        "energetic_compatibility": {
+            "weight": 1.5,
+            "description": "Overall energy resonance match"
+        },
+        "growth_potential": {
+            "weight": 1.3,
+            "description": "Capacity for mutual development"
+        },
+        "stability_factor": {
+            "weight": 1.2,
+            "description": "Long-term harmony and balance"
+        },
+        "synergy_quotient": {
+            "weight": 1.4,
+            "description": "Effectiveness of combined energies"
+        },
+        "practical_manifestation": {
+            "weight": 1.1,
+            "description": "Real-world implementation ease"
+        }
+    })
@@ -0,0 +1,374 @@
+"""
+Shared compute core for Quantum Hermetic Gematria.
+
+The web app, the desktop GUI and the legacy ``QuantumHermeticGematria`` class
+all build on :class:`GematriaCore`. It owns the letter table and returns
+results in a versioned schema (see ``SCHEMA_VERSION``); the dict shapes each
+front-end expects are produced from it by :mod:`adapters`.
+
+The dimension is a free setting. Above ``REFERENCE_DIMENSION``, the size
+the pattern thresholds were tuned at, features are computed over bands of
+the vector or rescaled to it, so they mean the same thing at 10 or 1024
+dimensions; at 10 they are exactly those of the original model. Vector math runs in float32. Vectors that are kept around
+(batches, indexes, caches) can be stored as float16 via ``storage_dtype``.
+The blocked kernels upcast them one cache-sized block at a time.
+
+The letter table is loaded from a versioned snapshot (see :mod:`model`);
+``model_version`` identifies it in results and cache keys. The core only
+depends on NumPy, so importing it pulls in neither torch nor matplotlib.
+torch is needed only to draw a table that has no snapshot.
+"""
+import logging
+import math
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from .metrics import stage
+    from .model import generate_table, load_snapshot, model_version, table_digest
+    from .normalize import AlphabetFolder
+except ImportError:  # executed as a script from inside the package directory
+    from metrics import stage
+    from model import generate_table, load_snapshot, model_version, table_digest
+    from normalize import AlphabetFolder
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a key is added to, removed from or changes meaning in the
+# dicts returned by GematriaCore.analyze / GematriaCore.compare.
+SCHEMA_VERSION = 3
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+ENERGETIC_PROPERTIES = ("harmony", "power", "intelligence", "creativity", "balance")
+
+# Dimension the pattern and interaction thresholds were tuned at
+REFERENCE_DIMENSION = 10
+
+STORAGE_DTYPES = ("float32", "float16")
+
+# Target working-set size of one block in the blocked kernels (about L2 size)
+BLOCK_BYTES = 256 * 1024
+
+# Distinct histograms calculate_batch remembers across blocks (about 200 bytes each)
+DEDUP_MAX_ENTRIES = 1 << 18
+
+
+class GematriaCore:
+    """Letter table plus the vector maths shared by every front-end."""
+
+    def __init__(self, dimension=10, seed=42, dtype="float32", model_dir=None):
+        if dimension < 2:
+            raise ValueError(f"dimension must be at least 2, got {dimension}")
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"dtype must be one of {STORAGE_DTYPES}, got {dtype!r}")
+        self.dimension = dimension
+        self.seed = seed
+        self.storage_dtype = np.dtype(dtype)
+        self.alphabet = ALPHABET
+        self.index = {char: i for i, char in enumerate(ALPHABET)}
+        self.folder = AlphabetFolder(ALPHABET)
+        self.table, self.model_version = self._load_table(model_dir)
+
+    def _load_table(self, model_dir):
+        """Return the (len(ALPHABET), dimension) table of unit letter vectors and its version"""
+        try:
+            table, manifest = load_snapshot(self.alphabet, self.dimension, self.seed, model_dir)
+            return table, manifest["version"]
+        except FileNotFoundError:
+            logger.warning("No model snapshot for dimension=%d seed=%d; drawing the table with torch. "
+                           "Run `python -m quantum_hermetic_gematria.model --dimension %d --seed %d` to persist it.",
+                           self.dimension, self.seed, self.dimension, self.seed)
+        table = generate_table(self.alphabet, self.dimension, self.seed)
+        return table, model_version(self.dimension, self.seed, table_digest(table))
+
+    def counts(self, text):
+        """Count how often each alphabet character occurs in text, after Unicode folding"""
+        return self.folder.counts(text)
+
+    def vector(self, counts):
+        """Return the normalized quantum vector for a histogram from counts()"""
+        result = counts @ self.table
+        norm = np.linalg.norm(result)
+        if norm > 0:
+            result /= norm
+        return result
+
+    def calculate(self, text):
+        """Return the normalized quantum vector for text"""
+        return self.vector(self.counts(text))
+
+    def calculate_batch(self, texts, dtype=None, stats=None):
+        """Return an (n, dimension) matrix of normalized vectors, one row per text
+
+        Rows are computed in float32 blocks and stored as ``dtype``
+        (default: the core's storage dtype). Each distinct histogram (see
+        ``histogram_key``) is computed once; later rows with the same one
+        are copied from the first, so duplicates, anagrams and case or
+        punctuation variants cost only their counting. Pass a
+        ``DedupStats`` as ``stats`` to have it updated.
+        """
+        out = np.empty((len(texts), self.dimension), dtype=dtype or self.storage_dtype)
+        return self.calculate_into(texts, out, stats=stats)
+
+    def calculate_into(self, texts, out, start=0, first_row=None, stats=None):
+        """calculate_batch writing into out[start:start + len(texts)]
+
+        For filling a large (e.g. memory-mapped) array a chunk at a time:
+        pass the same ``first_row`` dict with every chunk to deduplicate
+        across chunks. It maps histogram keys to rows of out and holds at
+        most DEDUP_MAX_ENTRIES of them.
+        """
+        first_row = {} if first_row is None else first_row
+        rows = block_rows(self.dimension)
+        for offset in range(0, len(texts), rows):
+            block = texts[offset:offset + rows]
+            begin = start + offset
+            own = np.arange(begin, begin + len(block))
+            source = own.copy()
+            new_counts, new_rows = [], []
+            for row, text in zip(own.tolist(), block):
+                counts = self.counts(text)
+                key = histogram_key(counts)
+                first = first_row.get(key)
+                if first is None:
+                    new_counts.append(counts)
+                    new_rows.append(row)
+                    if len(first_row) < DEDUP_MAX_ENTRIES:
+                        first_row[key] = row
+                else:
+                    source[row - begin] = first
+            if new_counts:
+                result = np.stack(new_counts) @ self.table
+                norms = np.linalg.norm(result, axis=1, keepdims=True)
+                np.divide(result, norms, out=result, where=norms > 0)
+                out[new_rows] = result
+            copied = np.flatnonzero(source != own)
+            if len(copied):
+                out[begin + copied] = out[source[copied]]
+            if stats is not None:
+                stats.add(len(block), len(new_rows))
+        return out
+
+    def similarity(self, text1, text2):
+        """Cosine similarity between the vectors of two texts"""
+        return float(np.dot(self.calculate(text1), self.calculate(text2)))
+
+    def analyze(self, text, counts=None):
+        """Analyze a single text and return a schema-versioned result dict
+
+        counts is the text's histogram, when the caller already has it.
+        """
+        with stage("calculate"):
+            vector = self.calculate(text) if counts is None else self.vector(counts)
+        with stage("features"):
+            return {
+                "schema_version": SCHEMA_VERSION,
+                "model_version": self.model_version,
+                "text": text,
+                "vector": vector,
+                "numerical_value": int(np.sum(vector * 100)),
+                "quantum_resonance": float(np.linalg.norm(vector)),
+                "energetic_properties": energetic_properties(vector),
+                "patterns": detect_patterns(vector),
+            }
+
+    def compare(self, phrase1, phrase2):
+        """Compare two phrases and return a schema-versioned result dict"""
+        with stage("calculate"):
+            vec1 = self.calculate(phrase1)
+            vec2 = self.calculate(phrase2)
+        with stage("features"):
+            return {
+                "schema_version": SCHEMA_VERSION,
+                "model_version": self.model_version,
+                "phrase1": phrase1,
+                "phrase2": phrase2,
+                "vector1": vec1,
+                "vector2": vec2,
+                "similarity": float(np.dot(vec1, vec2)),
+                "resonance_patterns": calculate_resonance(vec1, vec2),
+                "energetic_interactions": calculate_interactions(vec1, vec2),
+            }
+
+
+@lru_cache(maxsize=None)
+def get_core(dimension=10, seed=42, dtype="float32", model_dir=None):
+    """Return the process-wide core for (dimension, seed, dtype, model_dir), building it once"""
+    return GematriaCore(dimension=dimension, seed=seed, dtype=dtype, model_dir=model_dir)
+
+
+def histogram_key(counts):
+    """Canonical key of a histogram from GematriaCore.counts
+
+    Vectors and every feature derived from them depend only on the
+    histogram, so texts with equal keys (reorderings, or phrases differing
+    only in case, spacing or punctuation) get identical results.
+    """
+    return counts.tobytes()
+
+
+class DedupStats:
+    """Rows seen and distinct histograms computed by a deduplicating batch"""
+
+    def __init__(self):
+        self.rows = 0
+        self.unique = 0
+
+    def add(self, rows, unique):
+        self.rows += rows
+        self.unique += unique
+
+    @property
+    def ratio(self):
+        """Fraction of rows served from an earlier row with the same histogram"""
+        return 1 - self.unique / self.rows if self.rows else 0.0
+
+    def summary(self):
+        return {"rows": self.rows, "unique_histograms": self.unique, "dedup_ratio": round(self.ratio, 4)}
+
+
+def block_rows(dimension, itemsize=4):
+    """Rows of a (rows, dimension) block that fit in BLOCK_BYTES"""
+    return max(1, BLOCK_BYTES // (dimension * itemsize))
+
+
+def similarities(matrix, vectors):
+    """Dot products of every row of matrix with vectors, as float32
+
+    matrix may be float16 storage; it is upcast one block at a time so the
+    float32 copy never exceeds BLOCK_BYTES and the product runs on BLAS.
+    vectors is a single (dimension,) vector or a (k, dimension) matrix.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    out = np.empty((len(matrix),) + vectors.shape[:-1], dtype=np.float32)
+    if matrix.dtype == np.float32:
+        return np.matmul(matrix, vectors.T, out=out)
+    rows = block_rows(matrix.shape[1])
+    for start in range(0, len(matrix), rows):
+        block = matrix[start:start + rows].astype(np.float32)
+        np.matmul(block, vectors.T, out=out[start:start + len(block)])
+    return out
+
+
+def band_norms(vector, bands):
+    """L2 norm of each of `bands` contiguous slices of vector
+
+    For a unit vector the squared norms sum to 1 whatever the dimension.
+    Bands are empty (norm 0) when the dimension is smaller than `bands`.
+    """
+    return [float(np.linalg.norm(part)) for part in np.array_split(vector, bands)]
+
+
+def _reference_scale(vector):
+    """Factor mapping component magnitudes of a unit vector to REFERENCE_DIMENSION"""
+    return math.sqrt(len(vector) / REFERENCE_DIMENSION)
+
+
+def energetic_properties(vector):
+    """Map the vector to named energetic properties
+
+    Up to REFERENCE_DIMENSION these are the magnitudes of the leading
+    components, as in the original model; above it, the norms of bands of
+    the vector.
+    """
+    if len(vector) > REFERENCE_DIMENSION:
+        return dict(zip(ENERGETIC_PROPERTIES, band_norms(vector, len(ENERGETIC_PROPERTIES))))
+    return {name: float(abs(vector[i])) if i < len(vector) else 0.0 for i, name in enumerate(ENERGETIC_PROPERTIES)}
+
+
+def detect_patterns(vector):
+    """Detect patterns in a quantum vector"""
+    patterns = {}
+    scale = _reference_scale(vector)
+
+    # Pattern detection based on vector statistics (unbiased, like torch.std)
+    std = float(np.std(vector, ddof=1)) * scale
+
+    # Detect balance pattern
+    if std < 0.3:
+        patterns["balanced_energy"] = float(1 - std)
+
+    # Detect intensity pattern
+    max_val = float(np.max(np.abs(vector))) * scale
+    if max_val > 0.6:
+        patterns["intensity"] = max_val
+
+    # Detect harmony pattern
+    positive_ratio = float(np.count_nonzero(vector > 0) / len(vector))
+    if 0.4 <= positive_ratio <= 0.6:
+        patterns["harmonic"] = float(1 - abs(positive_ratio - 0.5) * 2)
+
+    # Detect resonance pattern: the two leading 30% bands have similar means
+    # (bands of 3 at the reference dimension)
+    k = max(1, round(0.3 * len(vector)))
+    drift = abs(float(np.mean(vector[0:k])) - float(np.mean(vector[k:2 * k])))
+    if drift * scale * math.sqrt(k / 3) < 0.1:
+        patterns["resonant"] = 0.8
+
+    return patterns
+
+
+def _entropy(vector):
+    """Shannon entropy of softmax(vector)"""
+    p = np.exp(vector - np.max(vector))
+    p /= p.sum()
+    return float(-np.sum(p * np.log(p + 1e-10)))
+
+
+def calculate_resonance(vec1, vec2):
+    """Calculate resonance patterns between two vectors"""
+    resonance = {}
+
+    # Constructive resonance (sum of vectors)
+    constructive = float(np.linalg.norm(vec1 + vec2))
+    if constructive > 1.2:
+        resonance["constructive"] = constructive - 1
+
+    # Harmonic resonance (dot product)
+    harmonic = float(np.dot(vec1, vec2))
+    if harmonic > 0.3:
+        resonance["harmonic"] = harmonic
+
+    # Complementary resonance (orthogonal components)
+    complementary = 1 - abs(harmonic)
+    if complementary > 0.5:
+        resonance["complementary"] = complementary
+
+    # Entropic resonance (difference in entropy)
+    entropic = 1 - abs(_entropy(vec1) - _entropy(vec2))
+    if entropic > 0.7:
+        resonance["entropic"] = entropic
+
+    return resonance
+
+
+def calculate_interactions(vec1, vec2):
+    """Calculate energetic interactions between two vectors"""
+    interactions = {}
+    scale = _reference_scale(vec1)
+
+    # Amplification (where both vectors have same sign and are strong)
+    amp = vec1 * vec2 * scale ** 2
+    amplification = float(np.count_nonzero(amp > 0.05) / len(amp))
+    if amplification > 0.3:
+        interactions["amplification"] = amplification
+
+    # Interference (where vectors have opposite signs)
+    interference = float(np.count_nonzero(amp < -0.05) / len(amp))
+    if interference > 0.2:
+        interactions["interference"] = interference
+
+    # Harmony (smooth distribution of combined energy)
+    combined = vec1 + vec2
+    harmony = 1 - min(float(np.std(combined, ddof=1)) * scale, 1)
+    if harmony > 0.6:
+        interactions["harmony"] = harmony
+
+    # Synergy (combined vector stronger than individual ones)
+    synergy = float(np.linalg.norm(combined)) - (float(np.linalg.norm(vec1)) + float(np.linalg.norm(vec2))) / 2
+    if synergy > 0.1:
+        interactions["synergy"] = synergy
+
+    return interactions
@@ -1,17 +1,97 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk, scrolledtext, filedialog
 import json
-from qhg import QuantumHermeticGematria
+import queue
+import threading
+import time
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
-from matplotlib.gridspec import GridSpec
+
+try:
+    from . import config
+    from .core import get_core
+    from .adapters import to_gui_analysis
+    from .rendering import DashboardRenderer
+except ImportError:  # executed as a script from inside the package directory
+    import config
+    from core import get_core
+    from adapters import to_gui_analysis
+    from rendering import DashboardRenderer
+
+# How often the Tk loop polls the worker for results
+POLL_MS = 30
+# Quiet period after the last keystroke before analysing the typed text
+TYPE_DEBOUNCE_MS = 300
+# Minimum time between two plot redraws
+PLOT_INTERVAL_MS = 100
+
+class AnalysisWorker:
+    """
+    Runs analyses on a background thread so the Tk main loop never blocks.
+
+    Every submit bumps a generation counter; requests and results from an
+    older generation are stale and are dropped, which cancels queued work and
+    stops a running batch between lines.
+    """
+    
+    def __init__(self, core):
+        self.core = core
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="qhg-analysis", daemon=True)
+        self._thread.start()
+        
+    def submit(self, kind, payload, system):
+        """Queue a 'text' or 'batch' analysis; returns its generation"""
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+        self.requests.put((generation, kind, payload, system))
+        return generation
+    
+    def is_stale(self, generation):
+        return generation != self.generation
+    
+    def stop(self):
+        self.requests.put(None)
+        
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            generation, kind, payload, system = request
+            if self.is_stale(generation):
+                continue
+            try:
+                if kind == "batch":
+                    result = []
+                    for line in payload:
+                        if self.is_stale(generation):
+                            break
+                        result.append(to_gui_analysis(self.core.analyze(line), system))
+                else:
+                    result = to_gui_analysis(self.core.analyze(payload), system)
+                error = None
+            except Exception as e:
+                result, error = None, e
+            if not self.is_stale(generation):
+                self.results.put((generation, kind, result, error))
 
 class QHGApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Quantum Hermetic Gematria Analyzer")
-        self.qhg = QuantumHermeticGematria()
+        settings = config.from_env()
+        self.core = get_core(settings["QHG_DIMENSION"], dtype=settings["QHG_STORAGE_DTYPE"],
+                             model_dir=settings["QHG_MODEL_DIR"] or None)
+        self.worker = AnalysisWorker(self.core)
+        self._debounce_job = None
+        self._plot_job = None
+        self._pending_plot = None
+        self._last_plot = 0.0
         
         # Configure style for a mystical appearance
         style = ttk.Style()
@@ -20,6 +100,8 @@ class QHGApp:
         style.configure("Sacred.TFrame", background="#1a1a2e")
         
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(POLL_MS, self.poll_results)
         
     def setup_ui(self):
         # Main frame with sacred geometry background
@@ -40,7 +122,9 @@ class QHGApp:
         input_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
         ttk.Label(input_frame, text="Enter Text:").grid(row=0, column=0, padx=5)
-        self.text_input = ttk.Entry(input_frame, width=40)
+        self.text_var = tk.StringVar()
+        self.text_var.trace_add("write", self.on_text_changed)
+        self.text_input = ttk.Entry(input_frame, width=40, textvariable=self.text_var)
         self.text_input.grid(row=0, column=1, padx=5)
         
         ttk.Label(input_frame, text="Gematria System:").grid(row=1, column=0, padx=5)
@@ -52,7 +136,11 @@ class QHGApp:
         # Analyze button with sacred geometry
         analyze_btn = ttk.Button(main_frame, text="⚡ Analyze Divine Patterns ⚡", 
                                command=self.analyze_text)
-        analyze_btn.grid(row=3, column=0, columnspan=2, pady=10)
+        analyze_btn.grid(row=3, column=0, pady=10)
+        
+        batch_btn = ttk.Button(main_frame, text="Analyze Batch File...",
+                             command=self.analyze_batch_file)
+        batch_btn.grid(row=3, column=1, pady=10)
         
         # Results section
         results_frame = ttk.LabelFrame(main_frame, text="Divine Revelations", padding="5")
@@ -67,30 +155,20 @@ class QHGApp:
         viz_frame = ttk.LabelFrame(main_frame, text="Sacred Geometry Visualization", padding="5")
         viz_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
-        # Create matplotlib figure with multiple subplots
+        # Create matplotlib figure; the renderer builds its subplots once
         self.fig = plt.figure(figsize=(12, 8))
-        gs = GridSpec(2, 2, figure=self.fig)
-        
-        # Sacred geometry plot
-        self.ax_geometry = self.fig.add_subplot(gs[0, 0])
-        self.ax_geometry.set_title("Sacred Geometry Resonance")
-        
-        # Hermetic principles plot
-        self.ax_hermetic = self.fig.add_subplot(gs[0, 1])
-        self.ax_hermetic.set_title("Hermetic Principle Alignment")
-        
-        # Quantum state plot
-        self.ax_quantum = self.fig.add_subplot(gs[1, 0])
-        self.ax_quantum.set_title("Quantum State Visualization")
-        
-        # Harmonic resonance plot
-        self.ax_harmonic = self.fig.add_subplot(gs[1, 1])
-        self.ax_harmonic.set_title("Harmonic Resonance Pattern")
-        
         self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
         self.canvas.get_tk_widget().grid(row=0, column=0, padx=5, pady=5)
+        self.renderer = DashboardRenderer(self.fig, self.core.dimension)
+        
+    def on_text_changed(self, *args):
+        """Re-analyze once typing pauses; newer input supersedes older requests"""
+        if self._debounce_job is not None:
+            self.root.after_cancel(self._debounce_job)
+        self._debounce_job = self.root.after(TYPE_DEBOUNCE_MS, self.analyze_text)
         
     def analyze_text(self):
+        self._debounce_job = None
         text = self.text_input.get()
         system = self.system_var.get()
         
@@ -99,15 +177,56 @@ class QHGApp:
             self.results_text.insert(tk.END, "Please enter sacred text to analyze.")
             return
         
-        # Get analysis results
-        results = self.qhg.analyze_text(text, system)
+        # Hand the analysis to the worker; results arrive in poll_results
+        self.worker.submit("text", text, system)
         
-        # Display text results with formatting
+    def analyze_batch_file(self):
+        path = filedialog.askopenfilename(title="Select a file with one phrase per line")
+        if not path:
+            return
+        with open(path, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
         self.results_text.delete(1.0, tk.END)
-        self.format_results(results)
+        self.results_text.insert(tk.END, f"Analyzing {len(lines)} phrases...")
+        self.worker.submit("batch", lines, self.system_var.get())
+        
+    def poll_results(self):
+        """Drain finished analyses from the worker without blocking the main loop"""
+        try:
+            while True:
+                generation, kind, results, error = self.worker.results.get_nowait()
+                if self.worker.is_stale(generation):
+                    continue
+                self.results_text.delete(1.0, tk.END)
+                if error is not None:
+                    self.results_text.insert(tk.END, f"Analysis failed: {error}")
+                elif kind == "batch":
+                    self.format_batch_results(results)
+                    if results:
+                        self.schedule_visualization(results[-1])
+                else:
+                    self.format_results(results)
+                    self.schedule_visualization(results)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self.poll_results)
+        
+    def schedule_visualization(self, results):
+        """Throttle redraws to one per PLOT_INTERVAL_MS, always showing the latest results"""
+        self._pending_plot = results
+        if self._plot_job is not None:
+            return
+        elapsed_ms = (time.monotonic() - self._last_plot) * 1000
+        self._plot_job = self.root.after(max(0, int(PLOT_INTERVAL_MS - elapsed_ms)), self.flush_visualization)
+        
+    def flush_visualization(self):
+        self._plot_job = None
+        self._last_plot = time.monotonic()
+        self.update_visualization(self._pending_plot)
         
-        # Update visualizations
-        self.update_visualization(results)
+    def close(self):
+        self.worker.stop()
+        self.root.destroy()
         
     def format_results(self, results):
         """Format results with mystical styling"""
@@ -128,51 +247,17 @@ class QHGApp:
         for principle, value in results['hermetic_resonances'].items():
             self.results_text.insert(tk.END, f"  • {principle.title()}: {value:.2f}\n")
         
+    def format_batch_results(self, results):
+        """One line per analysed phrase"""
+        self.results_text.insert(tk.END, f"✧ Batch Analysis: {len(results)} phrases ✧\n\n")
+        for result in results:
+            self.results_text.insert(tk.END, f"{result['text']}: base {result['base_value']}, "
+                                             f"{result['dominant_pattern']} / {result['dominant_principle']}\n")
+        
     def update_visualization(self, results):
-        """Update all visualization plots"""
-        # Clear the entire figure
-        self.fig.clear()
-        
-        # Recreate subplots
-        gs = GridSpec(2, 2, figure=self.fig)
-        self.ax_geometry = self.fig.add_subplot(gs[0, 0])
-        self.ax_hermetic = self.fig.add_subplot(gs[0, 1])
-        self.ax_quantum = self.fig.add_subplot(gs[1, 0])
-        self.ax_harmonic = self.fig.add_subplot(gs[1, 1])
-            
-        # Plot sacred geometry resonance
-        patterns = list(results['geometry_resonance'].keys())
-        values = list(results['geometry_resonance'].values())
-        bars = self.ax_geometry.bar(patterns, values)
-        self.ax_geometry.set_title("Sacred Geometry Resonance")
-        plt.setp(self.ax_geometry.xaxis.get_majorticklabels(), rotation=45)
-        
-        # Highlight dominant pattern
-        dominant_idx = patterns.index(results['dominant_pattern'])
-        bars[dominant_idx].set_color('gold')
-        
-        # Plot hermetic principles
-        principles = list(results['hermetic_resonances'].keys())
-        values = list(results['hermetic_resonances'].values())
-        self.ax_hermetic.plot(principles, values, 'o-', color='purple')
-        self.ax_hermetic.set_title("Hermetic Principle Alignment")
-        plt.setp(self.ax_hermetic.xaxis.get_majorticklabels(), rotation=45)
-        
-        # Plot quantum state
-        quantum_state = np.array(results['quantum_state'])
-        self.ax_quantum.plot(quantum_state, 'r--o')
-        self.ax_quantum.set_title("Quantum State")
-        
-        # Plot harmonic resonance
-        x = np.linspace(0, 2*np.pi, 100)
-        y = np.sin(x * results['harmonic_resonance'])
-        self.ax_harmonic.plot(x, y, color='blue')
-        self.ax_harmonic.set_title("Harmonic Resonance")
-        
-        # Adjust layout and redraw
-        plt.tight_layout()
-        self.canvas.draw()
-        self.canvas.flush_events()  # Force update
+        """Update all visualization plots in place"""
+        self.renderer.update(results)
+        self.renderer.draw()
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,278 @@
+"""
+Full per-user history of analyses and comparisons in a local SQLite file.
+
+The session cookie keeps only the last 10 of each (``/history``). With
+``QHG_HISTORY_DB`` set, every analysis and comparison is also written here
+under the user id kept in the session, for paging, export and analytics.
+Tables:
+
+- ``entries``: one row per analysis or comparison, with the result as JSON.
+  The index on ``(user, created, id)`` serves every listing. Pages are
+  keyset-paginated on that key: the cursor is the last row's
+  ``(created, id)``, so a page costs the same however deep it is, and
+  entries written meanwhile do not shift it
+- ``phrase_counts``: times each user analyzed each text, indexed by count
+  for "most analyzed"
+- ``daily``: per user and (local) day, the number of analyses and
+  comparisons and the sum of comparison compatibility
+
+The two aggregate tables are upserted in the same transaction as the entry,
+so stats read a handful of rows rather than scanning entries. The database
+runs in WAL mode: gunicorn workers write to it concurrently and readers do
+not block writers. Exports stream rows in batches of ``EXPORT_BATCH`` from
+a connection of their own, one response chunk per batch.
+"""
+import base64
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+KINDS = ("analysis", "comparison")
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH = 500
+
+CSV_COLUMNS = ("id", "timestamp", "kind", "text", "phrase2", "value")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    created REAL NOT NULL,
+    text TEXT NOT NULL,
+    phrase2 TEXT,
+    value NUMERIC,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_user_created ON entries (user, created, id);
+CREATE TABLE IF NOT EXISTS phrase_counts (
+    user TEXT NOT NULL,
+    text TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (user, text)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS phrase_counts_top ON phrase_counts (user, count DESC, text);
+CREATE TABLE IF NOT EXISTS daily (
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    analyses INTEGER NOT NULL DEFAULT 0,
+    comparisons INTEGER NOT NULL DEFAULT 0,
+    compatibility_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, day)
+) WITHOUT ROWID;
+"""
+
+
+def parse_time(value):
+    """Unix time of an ISO date or datetime in local time, e.g. 2024-05-01 or 2024-05-01 12:30"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def parse_day(value):
+    """Canonical YYYY-MM-DD form of a date, raising ValueError for anything with a time"""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError as e:
+        raise ValueError(f"Invalid day {value!r}; stats are per whole day, expected YYYY-MM-DD") from e
+
+
+def encode_cursor(created, entry_id):
+    return base64.urlsafe_b64encode(json.dumps([created, entry_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(created, id) of a cursor, raising ValueError for malformed ones"""
+    try:
+        created, entry_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(created), int(entry_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+def _like(text):
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class HistoryStore:
+    """Thread-safe access to the history database, one connection per thread"""
+
+    def __init__(self, path, dumps=json.dumps):
+        self.path = path
+        self.dumps = dumps
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _add(self, user, kind, text, phrase2, value, result, created):
+        created = time.time() if created is None else created
+        day = datetime.fromtimestamp(created).strftime("%Y-%m-%d")
+        with self.conn as conn:
+            conn.execute("INSERT INTO entries (user, kind, created, text, phrase2, value, result) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (user, kind, created, text, phrase2, value, self.dumps(result)))
+            if kind == "analysis":
+                conn.execute("INSERT INTO phrase_counts (user, text, count, last) VALUES (?, ?, 1, ?) "
+                             "ON CONFLICT (user, text) DO UPDATE SET count = count + 1, last = excluded.last",
+                             (user, text, created))
+                conn.execute("INSERT INTO daily (user, day, analyses) VALUES (?, ?, 1) "
+                             "ON CONFLICT (user, day) DO UPDATE SET analyses = analyses + 1", (user, day))
+            else:
+                conn.execute("INSERT INTO daily (user, day, comparisons, compatibility_sum) VALUES (?, ?, 1, ?) "
+                             "ON CONFLICT (user, day) DO UPDATE SET comparisons = comparisons + 1, "
+                             "compatibility_sum = compatibility_sum + excluded.compatibility_sum",
+                             (user, day, value or 0))
+
+    def add_analysis(self, user, text, result, created=None):
+        self._add(user, "analysis", text, None, result.get("numerical_value"), result, created)
+
+    def add_comparison(self, user, phrase1, phrase2, result, created=None):
+        self._add(user, "comparison", phrase1, phrase2, result.get("compatibility"), result, created)
+
+    def clear(self, user):
+        """Delete every entry and aggregate of user"""
+        with self.conn as conn:
+            for table in ("entries", "phrase_counts", "daily"):
+                conn.execute(f"DELETE FROM {table} WHERE user = ?", (user,))
+
+    def _query(self, user, kind=None, since=None, until=None, text=None, cursor=None, newest_first=True):
+        """SQL and parameters selecting user's entries matching the filters, in key order"""
+        where, params = ["user = ?"], [user]
+        if kind is not None:
+            if kind not in KINDS:
+                raise ValueError(f"Unknown kind {kind!r}; expected one of {', '.join(KINDS)}")
+            where.append("kind = ?")
+            params.append(kind)
+        if since is not None:
+            where.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created < ?")
+            params.append(until)
+        if text:
+            where.append("(text LIKE ? ESCAPE '\\' OR phrase2 LIKE ? ESCAPE '\\')")
+            params += [_like(text)] * 2
+        if cursor is not None:
+            where.append("(created, id) < (?, ?)" if newest_first else "(created, id) > (?, ?)")
+            params += list(cursor)
+        order = "DESC" if newest_first else "ASC"
+        sql = (f"SELECT id, kind, created, text, phrase2, value, result FROM entries "
+               f"WHERE {' AND '.join(where)} ORDER BY created {order}, id {order}")
+        return sql, params
+
+    def page(self, user, limit=50, cursor=None, **filters):
+        """Up to limit entries, newest first, after cursor; return (entries, next cursor or None)"""
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        sql, params = self._query(user, cursor=decode_cursor(cursor) if cursor else None, **filters)
+        rows = self.conn.execute(sql + " LIMIT ?", params + [limit + 1]).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][2], rows[limit - 1][0]) if len(rows) > limit else None
+        return [entry(row) for row in rows[:limit]], next_cursor
+
+    def iter_batches(self, user, **filters):
+        """Yield every matching row, oldest first, in lists of EXPORT_BATCH, from a dedicated connection"""
+        sql, params = self._query(user, newest_first=False, **filters)
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params)
+            while True:
+                batch = rows.fetchmany(EXPORT_BATCH)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            conn.close()
+
+    def stats(self, user, top=10, since=None, until=None):
+        """Totals, most analyzed phrases and mean compatibility per day, from the aggregate tables
+
+        The aggregates are kept per local day, so since and until are
+        YYYY-MM-DD days (see ``parse_day``), until exclusive. They bound the
+        totals and per-day figures; top phrases cover the whole history.
+        """
+        conn = self.conn
+        days = "user = ?"
+        params = [user]
+        if since is not None:
+            days += " AND day >= ?"
+            params.append(since)
+        if until is not None:
+            days += " AND day < ?"
+            params.append(until)
+        daily = conn.execute(f"SELECT day, analyses, comparisons, compatibility_sum FROM daily "
+                             f"WHERE {days} ORDER BY day", params).fetchall()
+        top_phrases = conn.execute("SELECT text, count FROM phrase_counts WHERE user = ? "
+                                   "ORDER BY count DESC, text LIMIT ?", (user, top)).fetchall()
+        return {
+            "analyses": sum(row[1] for row in daily),
+            "comparisons": sum(row[2] for row in daily),
+            "top_phrases": [{"text": text, "count": count} for text, count in top_phrases],
+            "compatibility_by_day": [{"day": day, "comparisons": comparisons,
+                                      "mean_compatibility": round(total / comparisons, 2)}
+                                     for day, _, comparisons, total in daily if comparisons],
+        }
+
+
+def timestamp(created):
+    return datetime.fromtimestamp(created).strftime(TIMESTAMP_FORMAT)
+
+
+def entry(row):
+    """API form of an entries row"""
+    entry_id, kind, created, text, phrase2, value, result = row
+    item = {"id": entry_id, "kind": kind, "timestamp": timestamp(created), "text": text}
+    if kind == "comparison":
+        item["phrase2"] = phrase2
+    item["result"] = json.loads(result)
+    return item
+
+
+def ndjson_chunks(batches, dumps=json.dumps):
+    """One JSON object per row; the stored result JSON is spliced in as is"""
+    for batch in batches:
+        lines = []
+        for entry_id, kind, created, text, phrase2, value, result in batch:
+            head = dumps({"id": entry_id, "kind": kind, "timestamp": timestamp(created), "text": text,
+                          "phrase2": phrase2, "value": value})
+            lines.append(f"{head[:-1]}, \"result\": {result}}}\n")
+        yield "".join(lines)
+
+
+def csv_chunks(batches):
+    """CSV header, then the rows of each batch without the full result"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows((entry_id, timestamp(created), kind, text, phrase2 or "", "" if value is None else value)
+                         for entry_id, kind, created, text, phrase2, value, _ in batch)
+        yield buffer.getvalue()
@@ -0,0 +1,251 @@
+"""
+Persisted inverted index of a phrase corpus by its /analyze labels.
+
+Answers "every phrase whose numerical_value is 93" or "whose primary
+pattern is sacred_geometry" without re-analysing the corpus. The indexed
+fields (``FIELDS``) depend only on the text (see ``adapters.web_labels``),
+so building the index needs no vectors. ``quantum_resonance`` is indexed by
+bucket of ``resonance_bucket`` (default 0.05): a query for 0.72 matches
+every phrase in [0.70, 0.75).
+
+An index is a directory of four files:
+
+- ``phrases.txt``: the corpus, one phrase per line; a phrase's id is its
+  0-based line number
+- ``offsets.npy``: int64 byte offset of every line in phrases.txt, plus the
+  end of the file
+- ``postings.bin``: one sorted posting list of phrase ids per (field, value).
+  With delta encoding (the default) a list is stored as the gaps between
+  consecutive ids in the narrowest unsigned type that fits them, and is
+  decoded with a single ``cumsum``
+- ``manifest.json``: format, encoding and, per field and value, the list's
+  ``[byte offset, length, dtype, first id]``
+
+Everything is memory-mapped, so opening an index is instant and workers
+share its pages. A query intersects the posting lists of its fields
+(shortest first) and unions the lists of several values
+of one field. Build with::
+
+    python -m quantum_hermetic_gematria.index corpus.txt -o lookup-index/
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from .adapters import web_labels
+except ImportError:  # executed as a script from inside the package directory
+    from adapters import web_labels
+
+INDEX_FORMAT = 1
+
+FIELDS = ("numerical_value", "primary_pattern", "resonance_quality", "geometric_harmony", "quantum_resonance")
+
+RESONANCE_BUCKET = 0.05
+
+# Decoded posting lists kept per process
+DECODED_CACHE_SIZE = 64
+
+
+def resonance_key(value, bucket):
+    """Key of the quantum_resonance bucket containing value, raising ValueError for inf and nan"""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Invalid quantum_resonance {value!r}; expected a finite number")
+    # Rounded first so that 0.7 / 0.05 == 13.999... still lands in bucket 14
+    return f"{math.floor(round(value / bucket, 6)) * bucket:.2f}"
+
+
+def index_keys(text, resonance_bucket=RESONANCE_BUCKET):
+    """The (field, key) pairs text is indexed under"""
+    labels = web_labels(text)
+    keys = {field: str(labels[field]) for field in FIELDS}
+    keys["quantum_resonance"] = resonance_key(labels["quantum_resonance"], resonance_bucket)
+    return keys
+
+
+def encode_postings(ids, delta=True):
+    """Encode sorted uint32 ids; return (bytes, dtype name, first id)"""
+    if not len(ids):
+        return b"", "uint8", 0
+    if not delta:
+        return ids.astype(np.uint32).tobytes(), "uint32", int(ids[0])
+    gaps = np.diff(ids)
+    dtype = np.min_scalar_type(int(gaps.max())) if len(gaps) else np.dtype(np.uint8)
+    return gaps.astype(dtype).tobytes(), dtype.name, int(ids[0])
+
+
+def build(corpus_path, output_dir, delta=True, resonance_bucket=RESONANCE_BUCKET):
+    """Index every line of corpus_path into output_dir; return the manifest"""
+    os.makedirs(output_dir, exist_ok=True)
+    codes = {field: array("H") for field in FIELDS}
+    values = {field: {} for field in FIELDS}
+    offsets = array("q", [0])
+    with open(corpus_path, "rb") as src, open(os.path.join(output_dir, "phrases.txt"), "wb") as dst:
+        for line in src:
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            dst.write(line)
+            offsets.append(offsets[-1] + len(line))
+            text = line.rstrip(b"\r\n").decode("utf-8", "replace")
+            for field, key in index_keys(text, resonance_bucket).items():
+                codes[field].append(values[field].setdefault(key, len(values[field])))
+    np.save(os.path.join(output_dir, "offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+
+    postings = {}
+    position = 0
+    with open(os.path.join(output_dir, "postings.bin"), "wb") as out:
+        for field in FIELDS:
+            field_codes = np.frombuffer(codes[field], dtype=np.uint16)
+            # A stable sort groups ids by value and keeps each group ascending
+            order = np.argsort(field_codes, kind="stable").astype(np.uint32)
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(field_codes, minlength=len(values[field])))])
+            postings[field] = {}
+            for key, code in sorted(values[field].items()):
+                body, dtype, first = encode_postings(order[bounds[code]:bounds[code + 1]], delta)
+                postings[field][key] = [position, int(bounds[code + 1] - bounds[code]), dtype, first]
+                out.write(body)
+                position += len(body)
+
+    manifest = {
+        "format": INDEX_FORMAT,
+        "phrases": len(offsets) - 1,
+        "encoding": "delta" if delta else "plain",
+        "resonance_bucket": resonance_bucket,
+        "postings": postings,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def intersect(lists, size):
+    """Ids present in every one of several sorted arrays of ids below size
+
+    Dense lists (over 1/64 of all ids) are tested through a bitmap, sparse
+    ones by binary search of the running result.
+    """
+    lists = sorted(lists, key=len)
+    result = lists[0]
+    for other in lists[1:]:
+        if not len(result) or not len(other):
+            return result[:0]
+        if len(other) * 64 >= size:
+            bitmap = np.zeros(size, dtype=bool)
+            bitmap[other] = True
+            result = result[bitmap[result]]
+        else:
+            position = np.minimum(np.searchsorted(other, result), len(other) - 1)
+            result = result[other[position] == result]
+    return result
+
+
+class LookupIndex:
+    """A built index, memory-mapped for querying"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{directory}: unsupported index format {manifest.get('format')!r}")
+        self.size = manifest["phrases"]
+        self.delta = manifest["encoding"] == "delta"
+        self.resonance_bucket = manifest["resonance_bucket"]
+        self.postings = manifest["postings"]
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        self._postings = self._map("postings.bin")
+        self._phrases = self._map("phrases.txt")
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _map(self, name):
+        path = os.path.join(self.directory, name)
+        if not os.path.getsize(path):  # an empty file cannot be mapped
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode="r")
+
+    def _decode(self, field, key):
+        offset, count, dtype, first = self.postings[field][key]
+        if not self.delta:
+            return np.frombuffer(self._postings, dtype=dtype, count=count, offset=offset)
+        ids = np.empty(count, dtype=np.uint32)
+        if count:
+            ids[0] = first
+            np.cumsum(np.frombuffer(self._postings, dtype=dtype, count=count - 1, offset=offset),
+                      dtype=np.uint32, out=ids[1:])
+            ids[1:] += np.uint32(first)
+        return ids
+
+    def ids(self, field, key):
+        """Sorted ids of the phrases whose field has key (empty if none do)"""
+        if key not in self.postings[field]:
+            return np.zeros(0, dtype=np.uint32)
+        with self._lock:
+            ids = self._decoded.get((field, key))
+            if ids is not None:
+                self._decoded.move_to_end((field, key))
+                return ids
+        ids = self._decode(field, key)
+        with self._lock:
+            self._decoded[(field, key)] = ids
+            while len(self._decoded) > DECODED_CACHE_SIZE:
+                self._decoded.popitem(last=False)
+        return ids
+
+    def key(self, field, value):
+        """Index key of a query value, raising ValueError for malformed ones"""
+        if field == "numerical_value":
+            return str(int(value))
+        if field == "quantum_resonance":
+            return resonance_key(value, self.resonance_bucket)
+        return str(value)
+
+    def lookup(self, criteria, limit=100, offset=0):
+        """Ids of the phrases matching every field of criteria, a {field: [values]} mapping
+
+        Several values for one field match any of them. Returns
+        ``(total, ids)`` with ids the requested page, ascending.
+        """
+        lists = []
+        for field, field_values in criteria.items():
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field {field!r}; expected one of {', '.join(FIELDS)}")
+            matches = [self.ids(field, self.key(field, value)) for value in field_values]
+            lists.append(matches[0] if len(matches) == 1 else np.unique(np.concatenate(matches)))
+        if not lists:
+            raise ValueError(f"At least one of {', '.join(FIELDS)} is required")
+        ids = intersect(lists, self.size)
+        return len(ids), ids[offset:offset + limit]
+
+    def phrase(self, phrase_id):
+        start, end = self.offsets[phrase_id], self.offsets[phrase_id + 1]
+        return self._phrases[start:end].tobytes().rstrip(b"\r\n").decode("utf-8", "replace")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the /lookup inverted index of a phrase corpus")
+    parser.add_argument("corpus", help="phrases to index, one per line")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--plain", action="store_true", help="store posting lists as plain uint32, not delta-encoded")
+    parser.add_argument("--resonance-bucket", type=float, default=RESONANCE_BUCKET)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    manifest = build(args.corpus, args.output_dir, delta=not args.plain, resonance_bucket=args.resonance_bucket)
+    size = os.path.getsize(os.path.join(args.output_dir, "postings.bin"))
+    print(f"indexed {manifest['phrases']} phrases in {time.perf_counter() - start:.1f}s "
+          f"({size / max(manifest['phrases'], 1):.1f} posting bytes per phrase)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
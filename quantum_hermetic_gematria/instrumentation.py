@@ -0,0 +1,275 @@
+"""
+Opt-in request instrumentation for the web app.
+
+``init_app`` reads ``QHG_METRICS_ENABLED``, ``QHG_PROFILE_*`` from app.config
+and installs only what is switched on:
+
+- per-stage timers (see :func:`metrics.stage`) and end-to-end request timing
+- Prometheus text exposition of every registered metric at /metrics
+- a request profiler that captures the next N requests as a cProfile pstats
+  file or as flamegraph collapsed stacks from a statistical sampler
+
+With everything off no middleware or hooks are installed.
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, current_app, jsonify, request
+from flask.sessions import SecureCookieSessionInterface
+
+try:
+    from . import metrics as qhg_metrics
+    from .metrics import REGISTRY, REQUEST_SECONDS, REQUESTS_TOTAL, stage
+except ImportError:  # executed as a script from inside the package directory
+    import metrics as qhg_metrics
+    from metrics import REGISTRY, REQUEST_SECONDS, REQUESTS_TOTAL, stage
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """Statistical sampler producing flamegraph-compatible collapsed stacks"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="qhg-stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def add_thread(self, ident):
+        with self._lock:
+            self._threads.add(ident)
+
+    def remove_thread(self, ident):
+        with self._lock:
+            self._threads.discard(ident)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                idents = list(self._threads)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Profiles the next N requests and dumps the aggregate to output_dir"""
+
+    MODES = ("cprofile", "sample")
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.last_output = None
+        self.remaining = 0
+        self._inflight = 0
+        self._mode = None
+        self._stats = None
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    def arm(self, requests, mode="cprofile"):
+        """Profile the next `requests` requests in the given mode"""
+        if mode not in self.MODES:
+            raise ValueError(f"unknown profile mode {mode!r}; expected one of {self.MODES}")
+        with self._lock:
+            if self.remaining or self._inflight:
+                raise RuntimeError("a profiling run is already in progress")
+            self._mode = mode
+            self._stats = None
+            if mode == "sample":
+                self._sampler = StackSampler()
+                self._sampler.start()
+            self.remaining = requests
+
+    def begin(self):
+        """Start profiling the current request if armed; returns a token or None"""
+        if not self.remaining:
+            return None
+        with self._lock:
+            if self.remaining <= 0:
+                return None
+            self.remaining -= 1
+            self._inflight += 1
+            mode = self._mode
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            return profile
+        ident = threading.get_ident()
+        self._sampler.add_thread(ident)
+        return ident
+
+    def end(self, token):
+        if isinstance(token, cProfile.Profile):
+            token.disable()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(token)
+                else:
+                    self._stats.add(token)
+        else:
+            self._sampler.remove_thread(token)
+        with self._lock:
+            self._inflight -= 1
+            finished = self.remaining == 0 and self._inflight == 0
+        if finished:
+            self._dump()
+
+    def _dump(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"qhg-profile-{os.getpid()}-{int(time.time())}")
+        if self._mode == "cprofile":
+            path = base + ".pstats"
+            self._stats.dump_stats(path)
+        else:
+            self._sampler.stop()
+            path = base + ".collapsed"
+            self._sampler.write(path)
+            self._sampler = None
+        self.last_output = path
+
+
+class _TimedResponse:
+    """Response iterable that calls finish once the body has been sent or closed
+
+    Streamed bodies are produced while the server iterates, after the app
+    has returned, so timing and profiling have to end here.
+    """
+
+    def __init__(self, iterable, finish):
+        self._iterable = iterable
+        self._finish = finish
+
+    def __iter__(self):
+        yield from self._iterable
+        self._done()
+
+    def _done(self):
+        finish, self._finish = self._finish, None
+        if finish is not None:
+            finish()
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, "close"):
+                self._iterable.close()
+        finally:
+            self._done()
+
+
+class InstrumentationMiddleware:
+    """WSGI wrapper recording request totals/latency and driving the profiler"""
+
+    def __init__(self, wsgi_app, profiler):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        token = self.profiler.begin() if self.profiler.remaining else None
+        start = time.perf_counter()
+        statuses = []
+
+        def _start_response(status, headers, exc_info=None):
+            statuses.append(status)
+            return start_response(status, headers, exc_info)
+
+        def finish():
+            if qhg_metrics.is_enabled():
+                endpoint = environ.get("qhg.endpoint") or "unmatched"
+                status = statuses[-1].split(" ", 1)[0] if statuses else "500"
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+                REQUESTS_TOTAL.inc(endpoint=endpoint, status=status)
+            if token is not None:
+                self.profiler.end(token)
+
+        try:
+            iterable = self.wsgi_app(environ, _start_response)
+        except BaseException:
+            finish()
+            raise
+        return _TimedResponse(iterable, finish)
+
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Cookie session interface that times session serialization"""
+
+    def save_session(self, app, session, response):
+        with stage("session_write"):
+            return super().save_session(app, session, response)
+
+
+def _tag_endpoint():
+    request.environ["qhg.endpoint"] = request.endpoint
+
+
+def metrics_view():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+def debug_profile():
+    token = current_app.config["QHG_PROFILE_TOKEN"]
+    if not hmac.compare_digest(request.headers.get("X-Profile-Token", ""), token):
+        return jsonify({"error": "Invalid profile token"}), 403
+    data = request.get_json(silent=True) or {}
+    profiler = current_app.extensions["qhg_profiler"]
+    try:
+        profiler.arm(int(data.get("requests", 100)), data.get("mode", "cprofile"))
+    except (ValueError, RuntimeError) as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"status": "armed", "requests": profiler.remaining,
+                    "output_dir": profiler.output_dir, "last_output": profiler.last_output})
+
+
+def init_app(app):
+    """Install the instrumentation configured in app.config"""
+    config = app.config
+    profiler = Profiler(config["QHG_PROFILE_DIR"])
+    app.extensions["qhg_profiler"] = profiler
+
+    if config["QHG_METRICS_ENABLED"]:
+        qhg_metrics.enable()
+        if type(app.session_interface) is SecureCookieSessionInterface:
+            app.session_interface = TimedSessionInterface()
+        app.before_request(_tag_endpoint)
+        app.add_url_rule("/metrics", "metrics", metrics_view)
+
+    if config["QHG_PROFILE_TOKEN"]:
+        app.add_url_rule("/debug/profile", "debug_profile", debug_profile, methods=["POST"])
+
+    if config["QHG_PROFILE_REQUESTS"]:
+        profiler.arm(config["QHG_PROFILE_REQUESTS"], config["QHG_PROFILE_MODE"])
+
+    if config["QHG_METRICS_ENABLED"] or config["QHG_PROFILE_TOKEN"] or config["QHG_PROFILE_REQUESTS"]:
+        app.wsgi_app = InstrumentationMiddleware(app.wsgi_app, profiler)
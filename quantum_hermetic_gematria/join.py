@@ -0,0 +1,209 @@
+"""
+Out-of-core similarity join: for every phrase in list A, the top-k most
+similar phrases in list B.
+
+Both lists are text files with one phrase per line. Each is embedded once
+into a memory-mapped ``.npy`` file of normalized vectors, the same vectors
+``QuantumHermeticGematria.calculate`` returns, stored as the core's storage
+dtype. The file name is keyed on the source's real path, size and
+modification time, so it is reused only for that same, unchanged file, and
+only if it has one row per line. The join then
+tiles A into blocks of ``block_rows`` rows. Workers process the tiles in
+parallel. Each worker streams B through in blocks of the same size, takes
+the Gram matrix of the two blocks and merges it into a running top-k with
+``argpartition``. Only the tile being worked on is in memory, about
+``16 * block_rows ** 2`` bytes per worker, so memory stays flat however long
+the lists are. Results are written as soon as each tile finishes, in A
+order, as newline-delimited JSON::
+
+    {"a": 0, "b": [812, 5, 77], "score": [0.998, 0.991, 0.990]}
+
+``a`` and ``b`` are 0-based line numbers of the input files.
+
+Usage::
+
+    python -m quantum_hermetic_gematria.join a.txt b.txt -k 10 -o matches.ndjson
+
+Each worker already runs its products on multi-threaded BLAS, so with
+several workers set ``OMP_NUM_THREADS=1`` (or ``OPENBLAS_NUM_THREADS=1``) to
+avoid oversubscribing the cores.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    from . import config
+    from .core import DedupStats, get_core
+except ImportError:  # executed as a script from inside the package directory
+    import config
+    from core import DedupStats, get_core
+
+logger = logging.getLogger(__name__)
+
+# Rows per tile of A and block of B; a worker holds about 16 * BLOCK_ROWS**2 bytes
+BLOCK_ROWS = 2048
+
+
+def read_phrases(path):
+    """Yield the phrases of a file, one per line, without the line break"""
+    with open(path, encoding="utf-8", newline="\n") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def count_lines(path):
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def embed(core, phrases_path, vectors_path, dtype=None, block_rows=BLOCK_ROWS, stats=None):
+    """Write the vectors of every phrase in phrases_path to an .npy file, one row per line
+
+    The file is written in blocks under a temporary name and renamed into
+    place at the end, so an interrupted run never leaves a partial file.
+    Repeated histograms are computed once (see
+    ``GematriaCore.calculate_into``); ``stats`` is updated with the count.
+    """
+    n = count_lines(phrases_path)
+    tmp_path = vectors_path + ".tmp.npy"
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype or core.storage_dtype,
+                                    shape=(n, core.dimension))
+    phrases = read_phrases(phrases_path)
+    first_row = {}
+    for start in range(0, n, block_rows):
+        block = list(itertools.islice(phrases, block_rows))
+        core.calculate_into(block, out, start, first_row, stats)
+    out.flush()
+    del out
+    os.replace(tmp_path, vectors_path)
+    return vectors_path
+
+
+def source_key(path):
+    """Short digest of a file's real path, size and modification time"""
+    stat = os.stat(path)
+    source = f"{os.path.realpath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return hashlib.blake2b(source.encode("utf-8", "surrogateescape"), digest_size=8).hexdigest()
+
+
+def vectors_for(core, phrases_path, work_dir, dtype=None):
+    """Path of the embedded vectors of phrases_path, embedding it if needed"""
+    dtype = np.dtype(dtype or core.storage_dtype)
+    name = f"{os.path.basename(phrases_path)}.{source_key(phrases_path)}.{core.model_version}.{dtype.name}.npy"
+    vectors_path = os.path.join(work_dir, name)
+    if os.path.exists(vectors_path):
+        rows = np.load(vectors_path, mmap_mode="r").shape[0]
+        if rows == count_lines(phrases_path):
+            logger.info("Reusing %s", vectors_path)
+            return vectors_path
+        logger.warning("Re-embedding %s: %s has %d rows, not one per line", phrases_path, vectors_path, rows)
+    start = time.perf_counter()
+    stats = DedupStats()
+    embed(core, phrases_path, vectors_path, dtype, stats=stats)
+    logger.info("Embedded %s in %.1fs: %d rows, %d distinct histograms (dedup ratio %.1f%%)",
+                phrases_path, time.perf_counter() - start, stats.rows, stats.unique, 100 * stats.ratio)
+    return vectors_path
+
+
+def topk(a, b, k, block_rows=BLOCK_ROWS):
+    """Indices and scores of the k rows of b most similar to each row of a
+
+    a and b are (n, dimension) arrays of unit vectors, possibly float16 memory
+    maps. Returns ``(index, score)``, both (len(a), k), best first.
+    """
+    a = np.asarray(a, dtype=np.float32)
+    k = min(k, len(b))
+    best_score = np.full((len(a), k), -np.inf, dtype=np.float32)
+    best_index = np.full((len(a), k), -1, dtype=np.int64)
+    for start in range(0, len(b), block_rows):
+        block = np.asarray(b[start:start + block_rows], dtype=np.float32)
+        gram = a @ block.T
+        # Only rows where the block beats the current k-th best need merging;
+        # once the running top-k has filled up that is a small minority
+        rows = np.flatnonzero((gram > best_score[:, :1]).any(axis=1))
+        if not len(rows):
+            continue
+        score = np.concatenate([best_score[rows], gram[rows]], axis=1)
+        index = np.concatenate([best_index[rows], np.broadcast_to(np.arange(start, start + len(block)),
+                                                                  (len(rows), len(block)))], axis=1)
+        # Partitioning at len(block) also leaves each row's k-th best in
+        # column 0, which is what the test above compares against
+        keep = np.argpartition(score, len(block), axis=1)[:, len(block):]
+        best_score[rows] = np.take_along_axis(score, keep, axis=1)
+        best_index[rows] = np.take_along_axis(index, keep, axis=1)
+    order = np.argsort(-best_score, axis=1, kind="stable")
+    return np.take_along_axis(best_index, order, axis=1), np.take_along_axis(best_score, order, axis=1)
+
+
+def _join_tile(task):
+    """Pool worker: top-k of rows [start, stop) of A against all of B"""
+    a_path, b_path, start, stop, k, block_rows = task
+    a = np.load(a_path, mmap_mode="r")
+    b = np.load(b_path, mmap_mode="r")
+    index, score = topk(a[start:stop], b, k, block_rows)
+    return start, index, score
+
+
+def join(a_path, b_path, out, k=10, workers=1, block_rows=BLOCK_ROWS):
+    """Write the top-k matches in B of every row of A to out as NDJSON; return the row count"""
+    n = np.load(a_path, mmap_mode="r").shape[0]
+    tasks = [(a_path, b_path, start, min(start + block_rows, n), k, block_rows)
+             for start in range(0, n, block_rows)]
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        tiles = pool.imap(_join_tile, tasks) if pool else map(_join_tile, tasks)
+        for start, index, score in tiles:
+            score = score.astype(np.float64).round(6)
+            out.writelines(json.dumps({"a": start + i, "b": row.tolist(), "score": s.tolist()}) + "\n"
+                           for i, (row, s) in enumerate(zip(index, score)))
+            out.flush()
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return n
+
+
+def main(argv=None):
+    settings = config.from_env()
+    parser = argparse.ArgumentParser(description="Top-k similarity join between two phrase lists")
+    parser.add_argument("a", help="phrases to find matches for, one per line")
+    parser.add_argument("b", help="phrases to match against, one per line")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS)
+    parser.add_argument("--work-dir", default=".", help="where embedded vector files are kept")
+    parser.add_argument("--dimension", type=int, default=settings["QHG_DIMENSION"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dtype", default=settings["QHG_STORAGE_DTYPE"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    core = get_core(args.dimension, args.seed, args.dtype, settings["QHG_MODEL_DIR"] or None)
+    os.makedirs(args.work_dir, exist_ok=True)
+    a_path = vectors_for(core, args.a, args.work_dir)
+    b_path = vectors_for(core, args.b, args.work_dir)
+
+    start = time.perf_counter()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        n = join(a_path, b_path, out, args.k, args.workers, args.block_rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    logger.info("Joined %d phrases in %.1fs", n, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
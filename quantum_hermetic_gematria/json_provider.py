@@ -0,0 +1,67 @@
+"""
+JSON providers for ``app.json``.
+
+``OrjsonProvider`` encodes with orjson, which serializes NumPy arrays and
+scalars natively, so results can carry ``np.ndarray`` vectors without a
+``tolist()`` round trip. It is used for responses, the cookie session and
+NDJSON streams. Without orjson installed, ``NumpyJSONProvider`` keeps the
+stdlib encoder and converts NumPy (and torch) values in ``default``.
+"""
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask's default provider plus NumPy arrays and scalars"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        tolist = getattr(o, "tolist", None)  # torch tensors
+        if callable(tolist):
+            return tolist()
+        return DefaultJSONProvider.default(o)
+
+    def dumps_bytes(self, obj):
+        return self.dumps(obj).encode("utf-8")
+
+
+class OrjsonProvider(NumpyJSONProvider):
+    """orjson-backed provider with native NumPy serialization"""
+
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps_bytes(self, obj):
+        option = self.option | orjson.OPT_SORT_KEYS if self.sort_keys else self.option
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        # kwargs such as separators are ignored: orjson output is always compact
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+PROVIDERS = {"orjson": OrjsonProvider, "default": NumpyJSONProvider}
+
+
+def make_provider(app, name="auto"):
+    """Instantiate the named provider; "auto" prefers orjson when installed"""
+    if name == "auto":
+        name = "orjson" if orjson is not None else "default"
+    if name == "orjson" and orjson is None:
+        raise RuntimeError("QHG_JSON_PROVIDER=orjson but orjson is not installed")
+    return PROVIDERS[name](app)
@@ -0,0 +1,198 @@
+"""
+In-process metrics registry and stage timers.
+
+Code on the hot path marks its stages with ``with stage("calculate"):``.
+Until ``enable`` is called, ``stage`` returns a shared no-op context manager,
+so a disabled build pays one function call per stage and nothing else.
+Counters registered by other subsystems are plain in-memory increments; the
+web app exposes them in the Prometheus text format at /metrics when
+instrumentation is on (see :mod:`instrumentation`).
+
+Metrics are kept per process. Under gunicorn each scrape of /metrics reports
+the worker that happened to serve it.
+
+This module has no third-party dependencies so the compute core can use it.
+"""
+import bisect
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class CounterMetric:
+    """Monotonic counter with optional labels"""
+    type = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name + _format_labels(key), value
+
+
+class GaugeMetric(CounterMetric):
+    """Value that can go up and down"""
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class HistogramMetric:
+    """Bucketed distribution of observed values"""
+    type = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._counts = {}
+        self._sums = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + "_bucket" + _format_labels(key, [("le", repr(bound))]), cumulative
+            cumulative += counts[-1]
+            yield self.name + "_bucket" + _format_labels(key, [("le", "+Inf")]), cumulative
+            yield self.name + "_sum" + _format_labels(key), total
+            yield self.name + "_count" + _format_labels(key), cumulative
+
+
+def _format_value(value):
+    """Sample value at full precision: shortest round-trip form, integral floats as ints"""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+class Registry:
+    """Named metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            return metric
+
+    def counter(self, name, help):
+        return self._get_or_create(CounterMetric, name, help)
+
+    def gauge(self, name, help):
+        return self._get_or_create(GaugeMetric, name, help)
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(HistogramMetric, name, help, buckets=buckets)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("qhg_stage_seconds", "Time spent in each request stage")
+REQUEST_SECONDS = REGISTRY.histogram("qhg_request_seconds", "End-to-end WSGI request time")
+REQUESTS_TOTAL = REGISTRY.counter("qhg_requests_total", "Requests served, by endpoint and status")
+
+_enabled = False
+_NULL_STAGE = nullcontext()
+
+
+class _StageTimer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, stage=self.name)
+        return False
+
+
+def enable():
+    """Turn on stage timing for this process"""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def stage(name):
+    """Context manager timing one request stage; a no-op unless metrics are enabled"""
+    if not _enabled:
+        return _NULL_STAGE
+    return _StageTimer(name)
@@ -0,0 +1,154 @@
+"""
+Versioned on-disk snapshots of the letter table.
+
+The table used to be regenerated from torch's global RNG in every process at
+every boot, so a torch upgrade could silently change every score. It is now
+generated once and shipped in ``models/`` as two files per (dimension, seed):
+
+- ``letters-d<dimension>-s<seed>.npy``: the float32 (len(alphabet), dimension)
+  table, memory-mapped read-only at load so workers share its pages
+- ``letters-d<dimension>-s<seed>.json``: manifest with the alphabet, shape,
+  SHA-256 of the table bytes and the model version tag
+
+The version tag (``d10-s42-<sha256 prefix>``) changes whenever the table
+does. It is returned in API responses and is part of cache keys.
+
+Regenerating needs torch::
+
+    python -m quantum_hermetic_gematria.model --dimension 10 256 1024
+    python -m quantum_hermetic_gematria.model --check
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+SNAPSHOT_FORMAT = 1
+
+
+class ModelSnapshotError(Exception):
+    """A snapshot that is corrupt or does not match the requested model"""
+
+
+def snapshot_paths(dimension, seed, directory=None):
+    """Return the (table, manifest) paths of a snapshot"""
+    base = os.path.join(directory or MODEL_DIR, f"letters-d{dimension}-s{seed}")
+    return base + ".npy", base + ".json"
+
+
+def table_digest(table):
+    """SHA-256 of the table as contiguous float32 bytes"""
+    return hashlib.sha256(np.ascontiguousarray(table, dtype=np.float32).tobytes()).hexdigest()
+
+
+def model_version(dimension, seed, digest):
+    return f"d{dimension}-s{seed}-{digest[:12]}"
+
+
+def generate_table(alphabet, dimension, seed):
+    """Draw the unit letter vectors the way the original model did
+
+    Uses a private torch generator, so the global torch and NumPy RNGs are
+    left alone; the draws are identical to ``torch.manual_seed(seed)``.
+    """
+    import torch
+
+    generator = torch.Generator().manual_seed(seed)
+    rows = []
+    for _ in alphabet:
+        vec = torch.randn(dimension, generator=generator)
+        rows.append((vec / torch.norm(vec)).numpy())
+    return np.stack(rows).astype(np.float32)
+
+
+def save_snapshot(table, alphabet, dimension, seed, directory=None):
+    """Write the table and its manifest atomically; return the manifest"""
+    table_path, manifest_path = snapshot_paths(dimension, seed, directory)
+    os.makedirs(os.path.dirname(table_path), exist_ok=True)
+    digest = table_digest(table)
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": model_version(dimension, seed, digest),
+        "dimension": dimension,
+        "seed": seed,
+        "alphabet": alphabet,
+        "dtype": "float32",
+        "sha256": digest,
+    }
+    with open(table_path + ".tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(table, dtype=np.float32))
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(table_path + ".tmp", table_path)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+
+def load_snapshot(alphabet, dimension, seed, directory=None):
+    """Return (table, manifest) for a snapshot, with the table memory-mapped
+
+    Raises FileNotFoundError if there is no snapshot, and ModelSnapshotError
+    if it does not match the alphabet/shape or fails its checksum.
+    """
+    table_path, manifest_path = snapshot_paths(dimension, seed, directory)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ModelSnapshotError(f"{manifest_path}: unsupported snapshot format {manifest.get('format')!r}")
+    if manifest["alphabet"] != alphabet:
+        raise ModelSnapshotError(f"{manifest_path}: snapshot alphabet does not match")
+    table = np.load(table_path, mmap_mode="r")
+    if table.shape != (len(alphabet), dimension) or table.dtype != np.float32:
+        raise ModelSnapshotError(f"{table_path}: expected float32 {(len(alphabet), dimension)}, "
+                                 f"got {table.dtype} {table.shape}")
+    if table_digest(table) != manifest["sha256"]:
+        raise ModelSnapshotError(f"{table_path}: checksum mismatch")
+    return table, manifest
+
+
+def main(argv=None):
+    # Imported here: core imports this module
+    try:
+        from .core import ALPHABET
+    except ImportError:  # executed as a script from inside the package directory
+        from core import ALPHABET
+
+    parser = argparse.ArgumentParser(description="Generate or verify letter-table snapshots")
+    parser.add_argument("--dimension", type=int, nargs="+", default=[10])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default=MODEL_DIR)
+    parser.add_argument("--check", action="store_true",
+                        help="verify every snapshot in --output-dir against a fresh draw instead of writing")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failed = False
+        for manifest_path in sorted(glob.glob(os.path.join(args.output_dir, "letters-*.json"))):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            try:
+                table, _ = load_snapshot(ALPHABET, manifest["dimension"], manifest["seed"], args.output_dir)
+                fresh = generate_table(ALPHABET, manifest["dimension"], manifest["seed"])
+                status = "ok" if np.array_equal(table, fresh) else "differs from a fresh draw"
+            except (OSError, ModelSnapshotError) as e:
+                status = str(e)
+            failed |= status != "ok"
+            print(f"{manifest['version']}: {status}")
+        return 1 if failed else 0
+
+    for dimension in args.dimension:
+        table = generate_table(ALPHABET, dimension, args.seed)
+        manifest = save_snapshot(table, ALPHABET, dimension, args.seed, args.output_dir)
+        print(f"wrote {manifest['version']} to {snapshot_paths(dimension, args.seed, args.output_dir)[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
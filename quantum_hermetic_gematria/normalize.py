@@ -0,0 +1,115 @@
+"""
+Text folding onto the model alphabet.
+
+Each character is NFKD-decomposed, stripped of combining marks and
+upper-cased, so ``É`` counts as ``E``, ``ß`` as ``SS`` and full-width ``１``
+as ``1``. Characters with no alphabet equivalent are dropped.
+``AlphabetFolder`` applies this without a Python-level loop over the text:
+
+- ASCII text goes through ``bytes.translate`` with a 256-entry table that
+  upper-cases and deletes everything outside the alphabet
+- short non-ASCII text goes through ``str.translate`` with a folding table
+- longer text is decoded to code points (UTF-32) and mapped through a byte
+  lookup table covering the Basic Multilingual Plane; only characters that
+  fold to several letters (``ß``, ligatures, Roman numerals) or lie outside
+  the BMP are expanded one distinct code point at a time
+
+The tables are filled for ASCII through Latin Extended-B at startup and
+extended lazily, one entry per new code point, for other scripts.
+"""
+import unicodedata
+
+import numpy as np
+
+# Code points folded eagerly at startup (ASCII through Latin Extended-B)
+PRECOMPUTED_RANGE = range(0x250)
+
+# Below this length str.translate beats the NumPy lookup's fixed overhead
+LUT_MIN_LENGTH = 100
+
+# Lookup-table size (the BMP) and its marker values; real entries are indices < 253
+LUT_SIZE = 0x10000
+MULTI = 253
+UNSEEN = 254
+DROP = 255
+
+
+class _FoldTable(dict):
+    """str.translate table: code point -> string of alphabet-index characters, or None"""
+
+    def __init__(self, folder):
+        super().__init__()
+        self.folder = folder
+
+    def __missing__(self, codepoint):
+        folded = self.folder.fold_char(chr(codepoint))
+        self[codepoint] = folded
+        if codepoint < LUT_SIZE:
+            lut = self.folder.lut
+            lut[codepoint] = DROP if folded is None else ord(folded) if len(folded) == 1 else MULTI
+        return folded
+
+
+class AlphabetFolder:
+    """Maps text to indices into alphabet, folding case, diacritics and compatibility forms"""
+
+    def __init__(self, alphabet):
+        if len(alphabet) >= MULTI:
+            raise ValueError(f"alphabet must have fewer than {MULTI} characters")
+        self.alphabet = alphabet
+        self.index = {char: i for i, char in enumerate(alphabet)}
+
+        table = bytearray(range(256))
+        drop = bytearray()
+        for byte in range(128):
+            i = self.index.get(chr(byte).upper())
+            if i is None:
+                drop.append(byte)
+            else:
+                table[byte] = i
+        self._ascii_table = bytes(table)
+        self._ascii_drop = bytes(drop)
+        # Index bytes back to alphabet characters, for fold()
+        self._to_alphabet = bytes(ord(alphabet[b]) if b < len(alphabet) else 0 for b in range(256))
+
+        self.lut = np.full(LUT_SIZE, UNSEEN, dtype=np.uint8)
+        self.table = _FoldTable(self)
+        for codepoint in PRECOMPUTED_RANGE:
+            self.table[codepoint]
+
+    def fold_char(self, char):
+        """Alphabet-index characters for one character, or None to drop it"""
+        decomposed = unicodedata.normalize("NFKD", char)
+        stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+        upper = unicodedata.normalize("NFKD", stripped.upper())
+        indices = "".join(chr(self.index[c]) for c in upper if c in self.index)
+        return indices or None
+
+    def indices(self, text):
+        """Alphabet indices of the characters of text, in order, as bytes"""
+        if text.isascii():
+            return text.encode("ascii").translate(self._ascii_table, self._ascii_drop)
+        return text.translate(self.table).encode("latin-1")
+
+    def counts(self, text):
+        """float32 count of each alphabet character in text"""
+        size = len(self.alphabet)
+        if text.isascii() or len(text) < LUT_MIN_LENGTH:
+            indices = np.frombuffer(self.indices(text), dtype=np.uint8)
+            return np.bincount(indices, minlength=size).astype(np.float32)
+
+        codepoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        mapped = self.lut[np.minimum(codepoints, LUT_SIZE - 1)]
+        mapped[codepoints >= LUT_SIZE] = MULTI
+        counts = np.bincount(mapped, minlength=256)
+        result = counts[:size].astype(np.float32)
+        if counts[MULTI] or counts[UNSEEN]:
+            special = codepoints[(mapped == MULTI) | (mapped == UNSEEN)]
+            for codepoint, n in zip(*np.unique(special, return_counts=True)):
+                for char in self.table[int(codepoint)] or ():
+                    result[ord(char)] += n
+        return result
+
+    def fold(self, text):
+        """text folded to the alphabet characters that count towards its vector"""
+        return self.indices(text).translate(self._to_alphabet).decode("ascii")
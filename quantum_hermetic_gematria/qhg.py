@@ -1,524 +1,89 @@
 import numpy as np
-import math
-from typing import Dict, Tuple, List, Union
 import torch
-from dataclasses import dataclass, field
-from torch.nn import functional as F
-from scipy import stats
 import matplotlib.pyplot as plt
 
-@dataclass
-class UniversalConstants:
-    """Core universal constants and sacred ratios"""
-    PHI: float = 1.618033988749895  # Golden Ratio - Divine Proportion
-    PI: float = 3.141592653589793   # Circle/Sphere - Unity
-    E: float = 2.718281828459045    # Natural Growth
-    SQRT2: float = 1.414213562373095  # Root of Duality
-    SQRT3: float = 1.732050807568877  # Triangle - Creation
-    SQRT5: float = 2.236067977499790  # Pentagram - Life Force
-    
-    # Sacred number sequences
-    FIBONACCI: List[int] = field(default_factory=lambda: [1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233])
-    PRIME: List[int] = field(default_factory=lambda: [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41])
-    
-    # Platonic solid angles (degrees) - Perfect Forms
-    PLATONIC_ANGLES: Dict[str, float] = field(default_factory=lambda: {
-        "tetrahedron": 19.471220634490697,  # Fire
-        "cube": 90.0,                       # Earth
-        "octahedron": 109.47122063449069,   # Air
-        "dodecahedron": 116.56505117707799, # Aether
-        "icosahedron": 138.19074733861384   # Water
-    })
-
-    # Hermetic principle resonances
-    MENTALISM: float = PHI ** 2       # The All is Mind
-    CORRESPONDENCE: float = PI * PHI   # As Above, So Below
-    VIBRATION: float = E * PHI        # Nothing Rests
-    POLARITY: float = SQRT2 * PHI     # Everything is Dual
-    RHYTHM: float = SQRT3 * PHI       # Everything Flows
-    CAUSATION: float = SQRT5 * PHI    # Cause and Effect
-    GENDER: float = (PHI + PI) / 2    # Gender is in Everything
-
-    # Fundamental physical constants that govern universal structure
-    PLANCK_LENGTH: float = 1.616255e-35  # Smallest possible length
-    PLANCK_TIME: float = 5.391247e-44    # Smallest possible time unit
-    SPEED_OF_LIGHT: float = 299792458    # Speed of light in vacuum
-    FINE_STRUCTURE: float = 0.0072973525693  # Electromagnetic coupling constant
-    
-    # Sacred ratios derived from natural phenomena
-    DNA_RATIO: float = 34/21  # Ratio found in DNA double helix
-    GOLDEN_SPIRAL: float = PHI ** (1/PHI)  # Self-referential growth pattern
-    COSMIC_RATIO: float = PI * E / PHI  # Universal expansion ratio
-
-    # Archetypal resonance frequencies
-    ARCHETYPAL_FREQUENCIES: Dict[str, float] = field(default_factory=lambda: {
-        "unity": PHI,           # Oneness, wholeness
-        "duality": SQRT2,       # Polarities, reflection
-        "creation": SQRT3,      # Divine creation, growth
-        "stability": 4.0,       # Foundation, order
-        "change": SQRT5,        # Transformation
-        "harmony": 6.0,         # Balance, beauty
-        "spirituality": 7.0     # Mystical wisdom
-    })
-    
-    # Pattern significance thresholds
-    RESONANCE_THRESHOLD: float = 0.618  # Golden ratio reciprocal
-    QUANTUM_COHERENCE: float = PI / PHI  # Quantum stability measure
-
-    # Egyptian technology resonance patterns
-    EGYPTIAN_TECH: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
-        "ankh_device": {
-            "frequency": PHI * SQRT5,
-            "purpose": "Life force amplification and healing",
-            "materials": "Gold, copper, crystalline structures"
-        },
-        "pyramid_resonator": {
-            "frequency": PI * SQRT3,
-            "purpose": "Energy focusing and cosmic alignment",
-            "materials": "Limestone, granite, quartz crystal"
-        },
-        "djed_pillar": {
-            "frequency": E * PHI,
-            "purpose": "Electromagnetic energy stabilization",
-            "materials": "Gold-plated wood, electrum"
-        },
-        "was_scepter": {
-            "frequency": SQRT3 * PHI,
-            "purpose": "Harmonic wave generation",
-            "materials": "Copper, gold, ceremonial metals"
-        },
-        "menat_counter": {
-            "frequency": SQRT2 * PI,
-            "purpose": "Biorhythm harmonization",
-            "materials": "Semi-precious stones, copper"
-        },
-        "sistrum": {
-            "frequency": PHI * 7,
-            "purpose": "Sonic frequency modulation",
-            "materials": "Bronze, silver, gold"
-        },
-        "ba_sphere": {
-            "frequency": E * SQRT5,
-            "purpose": "Consciousness expansion",
-            "materials": "Gold, electrum, crystal"
-        },
-        "benben_stone": {
-            "frequency": PI * PI,
-            "purpose": "Primordial energy focusing",
-            "materials": "Meteorite iron, crystalline stone"
-        },
-        "lotus_resonator": {
-            "frequency": PHI * PI,
-            "purpose": "Spiritual awakening amplification",
-            "materials": "Blue lotus extract, gold vessel"
-        },
-        "scarab_circuit": {
-            "frequency": E * SQRT2,
-            "purpose": "Solar energy transformation",
-            "materials": "Lapis lazuli, gold, turquoise"
-        },
-        "uraeus_amplifier": {
-            "frequency": SQRT5 * SQRT3,
-            "purpose": "Kundalini energy activation",
-            "materials": "Gold, electrum, serpentine"
-        },
-        "thoth_tablet": {
-            "frequency": PHI * E,
-            "purpose": "Cosmic knowledge transmission",
-            "materials": "Emerald, gold inscriptions"
-        },
-        "heka_wand": {
-            "frequency": PI * SQRT5,
-            "purpose": "Magical energy direction",
-            "materials": "Ivory, gold, amethyst"
-        },
-        "sekhem_staff": {
-            "frequency": PHI * SQRT2 * PI,
-            "purpose": "Power manifestation",
-            "materials": "Cedar wood, gold caps, quartz"
-        }
-    })
-
-    # Modern resonance equivalents
-    MODERN_EQUIVALENTS: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
-        "quartz_crystal": {
-            "frequency": PHI * SQRT3,
-            "purpose": "Frequency stabilization",
-            "common_form": "Crystal oscillators, watches"
-        },
-        "copper_coil": {
-            "frequency": PI * E,
-            "purpose": "Electromagnetic induction",
-            "common_form": "Tesla coils, transformers"
-        },
-        "pyramid_frame": {
-            "frequency": PI * SQRT3,
-            "purpose": "Energy focusing",
-            "common_form": "Meditation pyramids, greenhouse structures"
-        },
-        "resonant_cavity": {
-            "frequency": PHI * 7,
-            "purpose": "Wave harmonization",
-            "common_form": "Singing bowls, bell metals"
-        },
-        "orgone_accumulator": {
-            "frequency": E * PHI,
-            "purpose": "Energy accumulation",
-            "common_form": "Layered organic/inorganic materials"
-        },
-        "plasma_sphere": {
-            "frequency": SQRT5 * PI,
-            "purpose": "Electromagnetic visualization",
-            "common_form": "Plasma balls, lightning spheres"
-        },
-        "fibonacci_spiral": {
-            "frequency": PHI * PHI,
-            "purpose": "Natural growth patterns",
-            "common_form": "Spiral structures, vortex generators"
-        }
-    })
-
-    # Synergy and compatibility thresholds
-    SYNERGY_THRESHOLD: float = 0.777  # Optimal harmony threshold
-    INTERFERENCE_THRESHOLD: float = 0.333  # Destructive interference threshold
-    
-    # Relationship resonance patterns
-    RELATIONSHIP_PATTERNS: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
-        "harmonic_resonance": {
-            "threshold": PHI / 2,
-            "description": "Natural flow and mutual enhancement"
-        },
-        "catalytic_growth": {
-            "threshold": E / 2,
-            "description": "Mutual growth and transformation"
-        },
-        "stable_foundation": {
-            "threshold": SQRT2 / 2,
-            "description": "Long-term stability and security"
-        },
-        "dynamic_balance": {
-            "threshold": PI / 3,
-            "description": "Complementary energies in motion"
-        },
-        "creative_synthesis": {
-            "threshold": SQRT3 / 2,
-            "description": "Innovation and new possibilities"
-        },
-        "quantum_entanglement": {
-            "threshold": FINE_STRUCTURE * 10,
-            "description": "Deep synchronicity and connection"
-        },
-        "evolutionary_path": {
-            "threshold": GOLDEN_SPIRAL / 2,
-            "description": "Shared growth and development"
-        }
-    })
-
-    # Practical alignment indicators
-    ALIGNMENT_METRICS: Dict[str, Dict[str, Union[float, str]]] = field(default_factory=lambda: {
-        "energetic_compatibility": {
-            "weight": 1.5,
-            "description": "Overall energy resonance match"
-        },
-        "growth_potential": {
-            "weight": 1.3,
-            "description": "Capacity for mutual development"
-        },
-        "stability_factor": {
-            "weight": 1.2,
-            "description": "Long-term harmony and balance"
-        },
-        "synergy_quotient": {
-            "weight": 1.4,
-            "description": "Effectiveness of combined energies"
-        },
-        "practical_manifestation": {
-            "weight": 1.1,
-            "description": "Real-world implementation ease"
-        }
-    })
+try:
+    from .constants import UniversalConstants
+    from .core import get_core, detect_patterns, calculate_resonance, calculate_interactions
+    from .adapters import (to_legacy_analysis, to_legacy_comparison, generate_interpretation,
+                           generate_comparison_interpretation)
+    from .rendering import ScatterRenderer
+except ImportError:  # executed as a script from inside the package directory
+    from constants import UniversalConstants
+    from core import get_core, detect_patterns, calculate_resonance, calculate_interactions
+    from adapters import (to_legacy_analysis, to_legacy_comparison, generate_interpretation,
+                          generate_comparison_interpretation)
+    from rendering import ScatterRenderer
 
 class QuantumHermeticGematria:
     """
     A class implementing Quantum Hermetic Gematria calculations.
-    This is a placeholder implementation to fix the import error.
+
+    Torch-facing wrapper around the shared GematriaCore; instances with the
+    same (dimension, seed) share one letter table.
     """
     
     def __init__(self, dimension=10, seed=42):
         self.dimension = dimension
         self.seed = seed
-        torch.manual_seed(seed)
-        np.random.seed(seed)
+        self.core = get_core(dimension, seed)
+        self._scatter = None
         
         # Initialize quantum vectors for each letter/number
         self.initialize_vectors()
     
     def initialize_vectors(self):
-        """Initialize quantum vectors for gematria calculations"""
-        # Create quantum vectors for letters A-Z and numbers
-        self.vectors = {}
-        for i, char in enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"):
-            # Create normalized random vector
-            vec = torch.randn(self.dimension)
-            self.vectors[char] = vec / torch.norm(vec)
+        """Expose the core letter table as per-character torch vectors"""
+        # Copied: the core's table is a read-only memory map
+        self.vectors = {char: torch.tensor(self.core.table[i])
+                        for i, char in enumerate(self.core.alphabet)}
     
     def calculate(self, text):
         """Calculate the quantum gematria value for the given text"""
-        text = text.upper()
-        result = torch.zeros(self.dimension)
-        
-        for char in text:
-            if char in self.vectors:
-                result += self.vectors[char]
-        
-        # Normalize the result
-        if torch.norm(result) > 0:
-            result = result / torch.norm(result)
-            
-        return result
+        return torch.from_numpy(self.core.calculate(text))
     
     def calculate_similarity(self, text1, text2):
         """Calculate similarity between two texts using quantum gematria"""
-        vec1 = self.calculate(text1)
-        vec2 = self.calculate(text2)
-        
-        # Calculate cosine similarity
-        similarity = torch.dot(vec1, vec2)
-        return similarity.item()
+        return self.core.similarity(text1, text2)
     
     def analyze_text(self, text):
         """Analyze text using quantum hermetic principles"""
-        # Calculate quantum vector
-        quantum_vector = self.calculate(text)
-        
-        # Generate numerical value (sum of components)
-        numerical_value = int(torch.sum(quantum_vector * 100).item())
-        
-        # Calculate "quantum resonance" (norm of vector)
-        quantum_resonance = float(torch.norm(quantum_vector).item())
-        
-        # Calculate energetic properties (using vector components)
-        energetic_properties = {
-            "harmony": float(abs(quantum_vector[0]).item()),
-            "power": float(abs(quantum_vector[1]).item()),
-            "intelligence": float(abs(quantum_vector[2]).item()),
-            "creativity": float(abs(quantum_vector[3]).item()),
-            "balance": float(abs(quantum_vector[4]).item())
-        }
-        
-        # Identify patterns
-        patterns = self._detect_patterns(quantum_vector)
-        
-        # Create interpretation
-        interpretation = self._generate_interpretation(energetic_properties, patterns)
-        
-        # Return complete analysis
-        return {
-            "text": text,
-            "numerical_value": numerical_value,
-            "quantum_resonance": quantum_resonance,
-            "energetic_properties": energetic_properties,
-            "patterns": patterns,
-            "interpretation": interpretation,
-            "vector": quantum_vector.tolist()
-        }
+        return to_legacy_analysis(self.core.analyze(text))
     
     def compare_phrases(self, phrase1, phrase2):
         """Compare two phrases using quantum hermetic gematria"""
-        # Calculate individual vectors
-        vec1 = self.calculate(phrase1)
-        vec2 = self.calculate(phrase2)
-        
-        # Calculate similarity (cosine similarity)
-        similarity = self.calculate_similarity(phrase1, phrase2)
-        
-        # Calculate compatibility score (0-100)
-        compatibility = int((similarity + 1) * 50)  # Convert from [-1,1] to [0,100]
-        
-        # Calculate resonance patterns
-        resonance_patterns = self._calculate_resonance(vec1, vec2)
-        
-        # Calculate energetic interactions
-        energetic_interactions = self._calculate_interactions(vec1, vec2)
-        
-        # Generate interpretation
-        interpretation = self._generate_comparison_interpretation(similarity, resonance_patterns)
-        
-        # Return comparison results
-        return {
-            "phrase1": phrase1,
-            "phrase2": phrase2,
-            "similarity": similarity,
-            "compatibility": compatibility,
-            "resonance_patterns": resonance_patterns,
-            "energetic_interactions": energetic_interactions,
-            "interpretation": interpretation
-        }
+        return to_legacy_comparison(self.core.compare(phrase1, phrase2))
     
     def _detect_patterns(self, vector):
         """Detect patterns in the quantum vector"""
-        patterns = {}
-        
-        # Pattern detection based on vector statistics
-        mean = float(torch.mean(vector).item())
-        std = float(torch.std(vector).item())
-        
-        # Detect balance pattern
-        if std < 0.3:
-            patterns["balanced_energy"] = float(1 - std)
-        
-        # Detect intensity pattern
-        max_val = float(torch.max(torch.abs(vector)).item())
-        if max_val > 0.6:
-            patterns["intensity"] = float(max_val)
-        
-        # Detect harmony pattern
-        positive_ratio = float((vector > 0).sum().item() / len(vector))
-        if 0.4 <= positive_ratio <= 0.6:
-            patterns["harmonic"] = float(1 - abs(positive_ratio - 0.5) * 2)
-        
-        # Detect resonance pattern
-        if torch.abs(torch.mean(vector[0:3]) - torch.mean(vector[3:6])).item() < 0.1:
-            patterns["resonant"] = float(0.8)
-        
-        return patterns
+        return detect_patterns(np.asarray(vector))
     
     def _generate_interpretation(self, properties, patterns):
         """Generate an interpretation based on properties and patterns"""
-        # Find the dominant property
-        dominant_property = max(properties.items(), key=lambda x: x[1])[0]
-        
-        # Find dominant pattern
-        dominant_pattern = max(patterns.items(), key=lambda x: x[1])[0] if patterns else None
-        
-        # Base interpretation on dominant property
-        interpretations = {
-            "harmony": "This text resonates with harmonic energies, promoting balance and peace.",
-            "power": "This text carries a powerful energetic signature, emphasizing strength and transformation.",
-            "intelligence": "This text aligns with intellectual and analytical energies, enhancing clarity of thought.",
-            "creativity": "This text embodies creative energies, inspiring imagination and innovation.",
-            "balance": "This text represents balanced energies, supporting wholeness and integration."
-        }
-        
-        # Basic interpretation
-        interpretation = interpretations.get(dominant_property, "This text has a unique quantum signature.")
-        
-        # Add pattern information if available
-        if dominant_pattern:
-            pattern_desc = {
-                "balanced_energy": "The energies are evenly distributed, creating a stable and balanced field.",
-                "intensity": "There is a concentrated point of energy, suggesting intensity and focus.",
-                "harmonic": "The pattern shows harmonic oscillation between complementary energies.",
-                "resonant": "There is a resonant field that amplifies the core qualities."
-            }
-            interpretation += " " + pattern_desc.get(dominant_pattern, "")
-        
-        return interpretation
+        return generate_interpretation(properties, patterns)
     
     def _calculate_resonance(self, vec1, vec2):
         """Calculate resonance patterns between two vectors"""
-        # Initialize resonance patterns
-        resonance = {}
-        
-        # Calculate different types of resonance
-        
-        # Constructive resonance (sum of vectors)
-        constructive = torch.norm(vec1 + vec2).item()
-        if constructive > 1.2:
-            resonance["constructive"] = float(constructive - 1)
-        
-        # Harmonic resonance (dot product)
-        harmonic = torch.dot(vec1, vec2).item()
-        if harmonic > 0.3:
-            resonance["harmonic"] = float(harmonic)
-        
-        # Complementary resonance (orthogonal components)
-        complementary = 1 - abs(harmonic)
-        if complementary > 0.5:
-            resonance["complementary"] = float(complementary)
-        
-        # Entropic resonance (difference in entropy)
-        p1 = torch.nn.functional.softmax(vec1, dim=0)
-        p2 = torch.nn.functional.softmax(vec2, dim=0)
-        ent1 = -torch.sum(p1 * torch.log(p1 + 1e-10)).item()
-        ent2 = -torch.sum(p2 * torch.log(p2 + 1e-10)).item()
-        entropic = 1 - abs(ent1 - ent2)
-        if entropic > 0.7:
-            resonance["entropic"] = float(entropic)
-        
-        return resonance
+        return calculate_resonance(np.asarray(vec1), np.asarray(vec2))
     
     def _calculate_interactions(self, vec1, vec2):
         """Calculate energetic interactions between two vectors"""
-        # Calculate various interactions
-        interactions = {}
-        
-        # Amplification (where both vectors have same sign and are strong)
-        amp = (vec1 * vec2)
-        amplification = float(torch.sum((amp > 0.05)).item() / len(amp))
-        if amplification > 0.3:
-            interactions["amplification"] = amplification
-        
-        # Interference (where vectors have opposite signs)
-        interference = float(torch.sum((vec1 * vec2 < -0.05)).item() / len(vec1))
-        if interference > 0.2:
-            interactions["interference"] = interference
-        
-        # Harmony (smooth distribution of combined energy)
-        combined = vec1 + vec2
-        std_combined = torch.std(combined).item()
-        harmony = 1 - min(std_combined, 1)
-        if harmony > 0.6:
-            interactions["harmony"] = float(harmony)
-        
-        # Synergy (combined vector stronger than individual ones)
-        synergy = torch.norm(combined).item() - (torch.norm(vec1).item() + torch.norm(vec2).item()) / 2
-        if synergy > 0.1:
-            interactions["synergy"] = float(synergy)
-        
-        return interactions
+        return calculate_interactions(np.asarray(vec1), np.asarray(vec2))
     
     def _generate_comparison_interpretation(self, similarity, resonance):
         """Generate interpretation for comparison"""
-        # Base interpretation on similarity
-        if similarity > 0.8:
-            interpretation = "These phrases are in exceptional quantum alignment, revealing profound conceptual resonance."
-        elif similarity > 0.5:
-            interpretation = "These phrases share significant energetic harmony, indicating compatible concepts."
-        elif similarity > 0.2:
-            interpretation = "These phrases have moderate resonance, with some shared qualities and some differences."
-        elif similarity > -0.2:
-            interpretation = "These phrases have limited harmonic connection, suggesting mostly independent concepts."
-        elif similarity > -0.5:
-            interpretation = "These phrases show some energetic opposition, representing contrasting concepts."
-        else:
-            interpretation = "These phrases demonstrate strong energetic opposition, potentially representing opposing forces."
-        
-        # Add resonance patterns if present
-        if "constructive" in resonance:
-            interpretation += " There is strong constructive resonance, suggesting these concepts amplify each other."
-        elif "harmonic" in resonance:
-            interpretation += " Harmonic resonance is present, indicating natural alignment between these concepts."
-        elif "complementary" in resonance:
-            interpretation += " There is complementary resonance, suggesting these concepts complete each other."
-        
-        return interpretation
+        return generate_comparison_interpretation(similarity, resonance)
     
     def visualize(self, text, dimensions=(0, 1)):
-        """Visualize the quantum gematria for a text in 2D"""
-        vector = self.calculate(text)
-        
-        fig, ax = plt.subplots(figsize=(8, 8))
-        ax.scatter(vector[dimensions[0]].item(), vector[dimensions[1]].item(), s=100, c='red')
-        ax.set_xlim(-1, 1)
-        ax.set_ylim(-1, 1)
-        ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-        ax.axvline(x=0, color='k', linestyle='-', alpha=0.3)
-        ax.set_title(f"Quantum Gematria for '{text}'")
-        ax.set_xlabel(f"Dimension {dimensions[0]}")
-        ax.set_ylabel(f"Dimension {dimensions[1]}")
-        
-        return fig
+        """
+        Visualize the quantum gematria for a text in 2D.
+
+        The figure is created on the first call and updated in place on later
+        calls, so every call returns the same figure.
+        """
+        if self._scatter is None:
+            self._scatter = ScatterRenderer(plt.figure(figsize=(8, 8)))
+        return self._scatter.update(text, self.core.calculate(text), dimensions)
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,197 @@
+"""
+Persistent matplotlib renderers for the GUI and the web app.
+
+Building a figure, its axes and a GridSpec (plus ``tight_layout``) costs far
+more than drawing it. The renderers here create their figure and artists
+once and afterwards only push new data into them (``set_height``,
+``set_data``, ``set_text``):
+
+- ``DashboardRenderer``: the GUI's four-panel view, redrawn by blitting
+- ``ScatterRenderer``: the 2D view behind ``QuantumHermeticGematria.visualize``
+- ``PngCache``: Agg-rendered PNGs for ``/visualize.png``, keyed by content
+
+Axis limits are fixed up front (every plotted quantity is bounded), so an
+update never needs a relayout.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.gridspec import GridSpec
+
+try:
+    from .adapters import CONSTANTS, HERMETIC_PRINCIPLES, to_gui_analysis
+except ImportError:  # executed as a script from inside the package directory
+    from adapters import CONSTANTS, HERMETIC_PRINCIPLES, to_gui_analysis
+
+BAR_COLOR = "C0"
+DOMINANT_COLOR = "gold"
+HARMONIC_X = np.linspace(0, 2 * np.pi, 100)
+
+
+class DashboardRenderer:
+    """
+    Four-panel GUI dashboard whose artists are built once and updated in place.
+
+    With ``blit=True`` the data artists are animated: a full draw caches the
+    static background and ``draw`` only repaints the artists over it. The
+    figure must already be attached to its canvas.
+    """
+
+    def __init__(self, fig, dimension, blit=True):
+        self.fig = fig
+        self.blit = blit
+        self._background = None
+        gs = GridSpec(2, 2, figure=fig)
+
+        solids = list(CONSTANTS.PLATONIC_ANGLES)
+        self.ax_geometry = fig.add_subplot(gs[0, 0])
+        self.ax_geometry.set_title("Sacred Geometry Resonance")
+        self.bars = self.ax_geometry.bar(solids, np.zeros(len(solids)), color=BAR_COLOR)
+        self.ax_geometry.set_ylim(0, 1)
+        self.ax_geometry.tick_params(axis="x", labelrotation=45)
+
+        principles = list(HERMETIC_PRINCIPLES)
+        self.ax_hermetic = fig.add_subplot(gs[0, 1])
+        self.ax_hermetic.set_title("Hermetic Principle Alignment")
+        (self.hermetic_line,) = self.ax_hermetic.plot(principles, np.zeros(len(principles)), "o-", color="purple")
+        self.ax_hermetic.set_ylim(0, max(HERMETIC_PRINCIPLES.values()) * 1.05)
+        self.ax_hermetic.tick_params(axis="x", labelrotation=45)
+
+        self.ax_quantum = fig.add_subplot(gs[1, 0])
+        self.ax_quantum.set_title("Quantum State")
+        (self.quantum_line,) = self.ax_quantum.plot(np.arange(dimension), np.zeros(dimension), "r--o")
+        self.ax_quantum.set_xlim(-0.5, dimension - 0.5)
+        self.ax_quantum.set_ylim(-1.05, 1.05)
+
+        self.ax_harmonic = fig.add_subplot(gs[1, 1])
+        self.ax_harmonic.set_title("Harmonic Resonance")
+        (self.harmonic_line,) = self.ax_harmonic.plot(HARMONIC_X, np.zeros_like(HARMONIC_X), color="blue")
+        self.ax_harmonic.set_ylim(-1.1, 1.1)
+
+        self.artists = list(self.bars) + [self.hermetic_line, self.quantum_line, self.harmonic_line]
+        fig.tight_layout()
+        if blit:
+            for artist in self.artists:
+                artist.set_animated(True)
+            fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def update(self, results):
+        """Push a to_gui_analysis result into the existing artists"""
+        dominant = results["dominant_pattern"]
+        for bar, (pattern, value) in zip(self.bars, results["geometry_resonance"].items()):
+            bar.set_height(value)
+            bar.set_color(DOMINANT_COLOR if pattern == dominant else BAR_COLOR)
+        self.hermetic_line.set_ydata(list(results["hermetic_resonances"].values()))
+        self.quantum_line.set_ydata(results["quantum_state"])
+        self.harmonic_line.set_ydata(np.sin(HARMONIC_X * results["harmonic_resonance"]))
+
+    def _on_draw(self, event):
+        # A full draw (first show, resize) leaves out the animated artists;
+        # keep that as the background and paint the artists on top.
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            artist.axes.draw_artist(artist)
+
+    def draw(self):
+        """Blit the artists over the cached background, or do a full draw if there is none"""
+        canvas = self.fig.canvas
+        if not self.blit or self._background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(self._background)
+        self._draw_artists()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+
+class ScatterRenderer:
+    """2D view of one vector, reusing a single figure across texts"""
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.ax = fig.add_subplot(1, 1, 1)
+        (self.point,) = self.ax.plot([0], [0], "o", markersize=10, color="red")
+        self.ax.set_xlim(-1, 1)
+        self.ax.set_ylim(-1, 1)
+        self.ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
+        self.ax.axvline(x=0, color='k', linestyle='-', alpha=0.3)
+
+    def update(self, text, vector, dimensions=(0, 1)):
+        self.point.set_data([float(vector[dimensions[0]])], [float(vector[dimensions[1]])])
+        self.ax.set_title(f"Quantum Gematria for '{text}'")
+        self.ax.set_xlabel(f"Dimension {dimensions[0]}")
+        self.ax.set_ylabel(f"Dimension {dimensions[1]}")
+        return self.fig
+
+
+class PngCache:
+    """
+    Agg-rendered PNGs keyed by what they show.
+
+    One figure per view is kept for the lifetime of the process and guarded
+    by a lock, since Agg figures are not thread safe. Rendered bytes are
+    kept in an LRU of ``max_entries`` so identical requests never re-render.
+    """
+
+    VIEWS = ("scatter", "dashboard")
+
+    def __init__(self, core, max_entries=256, dpi=80):
+        self.core = core
+        self.max_entries = max_entries
+        self.dpi = dpi
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._renderers = {}
+
+    def key(self, view, text, dimensions):
+        payload = f"{self.core.model_version}\0{view}\0{dimensions[0]},{dimensions[1]}\0{text}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def _renderer(self, view):
+        renderer = self._renderers.get(view)
+        if renderer is None:
+            if view == "scatter":
+                fig = Figure(figsize=(6, 6), dpi=self.dpi)
+                FigureCanvasAgg(fig)
+                renderer = ScatterRenderer(fig)
+            else:
+                fig = Figure(figsize=(10, 7), dpi=self.dpi)
+                FigureCanvasAgg(fig)
+                renderer = DashboardRenderer(fig, self.core.dimension, blit=False)
+            self._renderers[view] = renderer
+        return renderer
+
+    def get(self, view, text, dimensions=(0, 1)):
+        """Return (etag, png_bytes) for a view of text, rendering on a miss"""
+        if view not in self.VIEWS:
+            raise ValueError(f"unknown view {view!r}; expected one of {self.VIEWS}")
+        if not all(0 <= d < self.core.dimension for d in dimensions):
+            raise ValueError(f"dimensions must be in [0, {self.core.dimension})")
+        key = self.key(view, text, dimensions)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                return key, png
+
+            renderer = self._renderer(view)
+            if view == "scatter":
+                renderer.update(text, self.core.calculate(text), dimensions)
+            else:
+                renderer.update(to_gui_analysis(self.core.analyze(text)))
+            buf = io.BytesIO()
+            renderer.fig.canvas.print_png(buf)
+            png = buf.getvalue()
+
+            self._entries[key] = png
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return key, png
@@ -0,0 +1,220 @@
+"""
+Single-flight coalescing of identical concurrent computations.
+
+``SingleFlight.do(op, fn, *args)`` runs ``fn(*args)`` once per key no matter
+how many callers ask for the same key at the same time; the others wait and
+receive the same result object. Results must therefore be treated as
+read-only by callers.
+
+Within a worker, threads coalesce on an in-memory table. Across gunicorn
+workers the in-process leader additionally takes an ``flock`` on one of a
+fixed set of lock-file stripes under ``shared_dir`` and marks its key with
+a ``.leading`` file while it computes:
+
+- a worker that finds the stripe locked and its key marked drops a
+  ``.want`` marker and waits for the lock. If the key is not marked, the
+  stripe is held for another key and the worker computes the result itself
+  rather than queue behind it
+- the leader, once done, writes the result to ``<key>.json`` only if a
+  ``.want`` marker exists, so uncontended results never touch the disk
+- the waiter then reads that file instead of recomputing
+
+Waiters serve whatever result file they find, so ``shared_dir`` must be
+private: it is created with mode 0700, and an existing directory owned by
+another user or open to others is refused.
+
+Keys are the exact arguments: the web adapters echo and hash the input text,
+so any normalization would change the response. Where ``fcntl`` is missing
+(Windows) only in-process coalescing is done.
+"""
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+try:
+    from .metrics import REGISTRY
+except ImportError:  # executed as a script from inside the package directory
+    from metrics import REGISTRY
+
+SINGLEFLIGHT_TOTAL = REGISTRY.counter(
+    "qhg_singleflight_total", "Single-flight calls by op and outcome (leader, shared_local, shared_remote)")
+COALESCING_RATIO = REGISTRY.gauge(
+    "qhg_singleflight_coalescing_ratio", "Fraction of single-flight calls served by another caller's computation")
+
+
+def private_dir(path):
+    """Create path as a 0700 directory, or check that an existing one is private to this user"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.geteuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+    return path
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _touch(path):
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one computation"""
+
+    def __init__(self, shared_dir=None, stripes=4096, wait_timeout=30.0, result_ttl=5.0,
+                 dumps=json.dumps, loads=json.loads, namespace=""):
+        self.shared_dir = shared_dir if fcntl is not None else None
+        self.stripes = stripes
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        # Prefixed to every key, e.g. the model version, so shared result files
+        # written by workers running another model are never picked up
+        self.namespace = namespace
+        # Encoder for shared result files; the app passes app.json so NumPy values survive
+        self.dumps = dumps
+        self.loads = loads
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._total = 0
+        self._shared = 0
+        if self.shared_dir:
+            private_dir(self.shared_dir)
+
+    def do(self, op, fn, *args):
+        """Return fn(*args), sharing the computation with concurrent identical calls"""
+        key = json.dumps([self.namespace, op, *args], ensure_ascii=False)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait(self.wait_timeout)
+            if not call.done.is_set():
+                return fn(*args)
+            self._record(op, "shared_local")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.shared_dir:
+                call.result, outcome = self._do_shared(key, fn, args)
+            else:
+                call.result, outcome = fn(*args), "leader"
+            self._record(op, outcome)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _record(self, op, outcome):
+        SINGLEFLIGHT_TOTAL.inc(op=op, outcome=outcome)
+        with self._lock:
+            self._total += 1
+            if outcome != "leader":
+                self._shared += 1
+            ratio = self._shared / self._total
+        COALESCING_RATIO.set(ratio)
+
+    def _paths(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        stripe = int(digest[:8], 16) % self.stripes
+        base = os.path.join(self.shared_dir, digest)
+        return (os.path.join(self.shared_dir, f"stripe-{stripe}.lock"),
+                base + ".leading", base + ".want", base + ".json")
+
+    def _do_shared(self, key, fn, args):
+        lock_path, leading_path, want_path, result_path = self._paths(key)
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if not os.path.exists(leading_path):
+                    # The stripe is held for another key: compute instead of queueing behind it
+                    return fn(*args), "leader"
+                _touch(want_path)
+                if not self._wait_for_lock(fd):
+                    return fn(*args), "leader"
+                result = self._read_result(result_path, key)
+                if result is not None:
+                    return result, "shared_remote"
+
+            _touch(leading_path)
+            try:
+                result = fn(*args)
+                if os.path.exists(want_path):
+                    self._write_result(result_path, key, result)
+                    _unlink(want_path)
+            finally:
+                _unlink(leading_path)
+            return result, "leader"
+        finally:
+            os.close(fd)  # closing the descriptor releases the flock
+
+    def _wait_for_lock(self, fd):
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.001
+        while time.monotonic() < deadline:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        return False
+
+    def _read_result(self, path, key):
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                return None
+            with open(path, encoding="utf-8") as f:
+                entry = self.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        return entry["result"] if entry.get("key") == key else None
+
+    def _write_result(self, path, key, result):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(tmp, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+            f.write(self.dumps({"key": key, "result": result}))
+        os.replace(tmp, path)
+        self._sweep()
+
+    def _sweep(self):
+        """Drop result and marker files older than the TTL so the directory stays small"""
+        cutoff = time.time() - self.result_ttl
+        try:
+            with os.scandir(self.shared_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith((".json", ".want", ".leading")) and entry.stat().st_mtime < cutoff:
+                        _unlink(entry.path)
+        except OSError:
+            pass
@@ -128,6 +128,30 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    // Live similarity preview, computed in the browser from /model.json
+    const liveSimilarity = document.getElementById('live-similarity');
+    let modelPromise = null;
+
+    async function updateLiveSimilarity() {
+        const phrase1 = phrase1Input.value.trim();
+        const phrase2 = phrase2Input.value.trim();
+        if (!phrase1 || !phrase2 || !window.Gematria) {
+            liveSimilarity.textContent = '';
+            return;
+        }
+        modelPromise = modelPromise || Gematria.load(document.body.dataset.modelUrl);
+        try {
+            const model = await modelPromise;
+            liveSimilarity.textContent = `Live similarity: ${model.similarity(phrase1, phrase2).toFixed(2)}`;
+        } catch (error) {
+            modelPromise = null;
+            liveSimilarity.textContent = '';
+        }
+    }
+
+    phrase1Input.addEventListener('input', updateLiveSimilarity);
+    phrase2Input.addEventListener('input', updateLiveSimilarity);
+
     // History functionality
     const historyList = document.getElementById('history-list');
     const clearHistoryBtn = document.getElementById('clear-history-btn');
@@ -0,0 +1,101 @@
+/*
+ * Client-side gematria vectors.
+ *
+ * Reproduces GematriaCore.calculate and GematriaCore.similarity in the
+ * browser from the letter table served at /model.json, so comparisons can
+ * be previewed without a server round trip. Text is folded like the server:
+ * NFKD, combining marks stripped, upper-cased, then kept only if it is in
+ * the model alphabet. Vectors are Float32Arrays; results match the server
+ * to float32 rounding.
+ *
+ * Usage:
+ *     const model = await Gematria.load('/model.json?v=...');
+ *     model.similarity('love', 'peace');
+ */
+(function (root) {
+    'use strict';
+
+    class GematriaModel {
+        constructor(data) {
+            this.version = data.model_version;
+            this.alphabet = data.alphabet;
+            this.dimension = data.dimension;
+            this.table = new Float32Array(this.alphabet.length * this.dimension);
+            data.table.forEach((row, i) => this.table.set(row, i * this.dimension));
+            this.index = new Map([...this.alphabet].map((c, i) => [c, i]));
+            this.folded = new Map();
+        }
+
+        // Alphabet indices a single character folds to
+        fold(char) {
+            let indices = this.folded.get(char);
+            if (indices === undefined) {
+                const upper = char.normalize('NFKD').replace(/\p{Mn}/gu, '').toUpperCase().normalize('NFKD');
+                indices = [...upper].filter(c => this.index.has(c)).map(c => this.index.get(c));
+                this.folded.set(char, indices);
+            }
+            return indices;
+        }
+
+        counts(text) {
+            const counts = new Float32Array(this.alphabet.length);
+            for (const char of text) {
+                for (const i of this.fold(char)) {
+                    counts[i] += 1;
+                }
+            }
+            return counts;
+        }
+
+        // Normalized vector for text, like GematriaCore.calculate
+        calculate(text) {
+            const dim = this.dimension;
+            const counts = this.counts(text);
+            const vector = new Float32Array(dim);
+            counts.forEach((n, i) => {
+                if (n === 0) return;
+                const offset = i * dim;
+                for (let d = 0; d < dim; d++) {
+                    vector[d] += n * this.table[offset + d];
+                }
+            });
+            let norm = 0;
+            for (let d = 0; d < dim; d++) {
+                norm += vector[d] * vector[d];
+            }
+            norm = Math.sqrt(norm);
+            if (norm > 0) {
+                for (let d = 0; d < dim; d++) {
+                    vector[d] /= norm;
+                }
+            }
+            return vector;
+        }
+
+        // Cosine similarity of two texts, like GematriaCore.similarity
+        similarity(text1, text2) {
+            const a = this.calculate(text1);
+            const b = this.calculate(text2);
+            let dot = 0;
+            for (let d = 0; d < this.dimension; d++) {
+                dot += a[d] * b[d];
+            }
+            return Math.fround(dot);
+        }
+    }
+
+    async function load(url = '/model.json') {
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error(`Failed to load model: ${response.status}`);
+        }
+        return new GematriaModel(await response.json());
+    }
+
+    const Gematria = { GematriaModel, load };
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = Gematria;
+    } else {
+        root.Gematria = Gematria;
+    }
+})(typeof self !== 'undefined' ? self : this);
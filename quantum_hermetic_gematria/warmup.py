@@ -0,0 +1,72 @@
+"""
+Boot-time warmup and readiness state.
+
+At startup the app runs ``Warmup`` on a background thread: it exercises the
+compute path once (analysis, comparison, JSON encoding and both plot views,
+so lazy imports and first-draw costs are paid before traffic arrives), then
+precomputes the configured hot phrases into the result cache.
+``/readyz`` reports 503 until it has finished; ``/healthz`` answers as soon
+as the process can serve at all.
+
+Hot phrases come from ``QHG_WARMUP_PHRASES`` (comma-separated) and
+``QHG_WARMUP_FILE`` (one phrase per line).
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROBE_PHRASES = ("Quantum Hermetic Gematria", "As above, so below")
+
+
+def load_phrases(phrases=(), path=""):
+    """Configured hot phrases, file entries after inline ones, without duplicates"""
+    hot = list(phrases)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            hot.extend(line.strip() for line in f)
+    return list(dict.fromkeys(p for p in hot if p))
+
+
+class Warmup:
+    """Runs the warmup once and records whether the worker is ready"""
+
+    def __init__(self, analyze, compare, dumps, png_cache=None, phrases=()):
+        self.analyze = analyze
+        self.compare = compare
+        self.dumps = dumps
+        self.png_cache = png_cache
+        self.phrases = list(phrases)
+        self.ready = threading.Event()
+        self.error = None
+        self.seconds = None
+
+    def start(self):
+        threading.Thread(target=self.run, name="qhg-warmup", daemon=True).start()
+        return self
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.dumps(self.analyze(PROBE_PHRASES[0]))
+            self.dumps(self.compare(*PROBE_PHRASES))
+            if self.png_cache is not None:
+                for view in self.png_cache.VIEWS:
+                    self.png_cache.get(view, PROBE_PHRASES[0])
+            for phrase in self.phrases:
+                self.analyze(phrase)
+        except Exception as e:  # a failed warmup must not keep the worker unready forever
+            self.error = e
+            logger.exception("Warmup failed")
+        self.seconds = time.perf_counter() - start
+        logger.info(f"Warmup done in {self.seconds:.2f}s ({len(self.phrases)} hot phrases)")
+        self.ready.set()
+
+    def status(self):
+        return {
+            "warm": self.ready.is_set(),
+            "warmup_seconds": self.seconds,
+            "warmup_phrases": len(self.phrases),
+            "warmup_error": str(self.error) if self.error else None,
+        }